@@ -0,0 +1,112 @@
+"""Multi-row insert support for the ``POST /{resource}/bulk`` endpoints"""
+from typing import Generic, List, Sequence, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, SQLModel
+
+ReadT = TypeVar("ReadT")
+
+
+class BulkItemError(BaseModel):
+    """Error for a single item of a bulk request, by position in the payload"""
+    index: int
+    detail: str
+
+
+class BulkResult(BaseModel, Generic[ReadT]):
+    """Outcome of a bulk request"""
+    created: List[ReadT] = []
+    errors: List[BulkItemError] = []
+
+
+def _error_detail(exc: DBAPIError) -> str:
+    return " ".join(str(exc.orig).split())
+
+
+def insert_rows(
+    session: Session,
+    model: Type[SQLModel],
+    read_model: Type[SQLModel],
+    items: Sequence[SQLModel],
+) -> Tuple[List[Tuple[int, SQLModel]], List[BulkItemError]]:
+    """Insert ``items`` with multi-row ``INSERT ... RETURNING`` without committing.
+
+    The whole batch is tried first as a single statement (batched into
+    multi-row VALUES by the driver). If the database rejects it, each row is
+    retried inside its own savepoint to find out which items failed.
+    Returns the created rows paired with their index in ``items``, and the
+    per-item errors.
+    """
+    if not items:
+        return [], []
+    primary_keys = {column.name for column in model.__table__.primary_key.columns}
+    rows = [
+        model.model_validate(item).model_dump(exclude=primary_keys)
+        for item in items
+    ]
+    statement = insert(model).returning(
+        *model.__table__.columns, sort_by_parameter_order=True
+    )
+
+    try:
+        with session.begin_nested():
+            result = session.execute(statement, rows).all()
+        return [
+            (index, read_model.model_validate(row._mapping))
+            for index, row in enumerate(result)
+        ], []
+    except DBAPIError:
+        pass
+
+    created, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            with session.begin_nested():
+                result = session.execute(statement, [row]).one()
+            created.append((index, read_model.model_validate(result._mapping)))
+        except DBAPIError as exc:
+            errors.append(BulkItemError(index=index, detail=_error_detail(exc)))
+    return created, errors
+
+
+def finish_bulk(
+    session: Session,
+    created: List[Tuple[int, SQLModel]],
+    errors: List[BulkItemError],
+    atomic: bool,
+) -> BulkResult:
+    """Commit a bulk request, or roll it back with 409 if ``atomic`` and any item failed"""
+    if errors and atomic:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=[error.model_dump() for error in sorted(errors, key=lambda e: e.index)]
+        )
+
+    session.commit()
+    return BulkResult(
+        created=[item for _, item in created],
+        errors=sorted(errors, key=lambda e: e.index)
+    )
+
+
+def bulk_insert(
+    session: Session,
+    model: Type[SQLModel],
+    read_model: Type[SQLModel],
+    items: Sequence[SQLModel],
+    atomic: bool = True,
+) -> BulkResult:
+    """Insert ``items`` in one transaction and report errors per item.
+
+    With ``atomic`` any failure rolls everything back and answers 409 with the
+    per-item errors; otherwise the valid rows are committed and the failures
+    are reported alongside them.
+    """
+    if not items:
+        return BulkResult()
+    created, errors = insert_rows(session, model, read_model, items)
+    return finish_bulk(session, created, errors, atomic)
@@ -0,0 +1,252 @@
+"""Read-through cache for the catalog routers (facultades, carreras, cursos, secciones).
+
+Entries are stored as JSON-compatible data so the in-process and the Redis
+backend behave the same. Keys embed two per-namespace generation counters:
+bumping ``list`` drops every cached page of a resource after a write, and
+bumping ``all`` drops the items too after set-based changes such as imports.
+
+Invalidation runs after the writing transaction commits. A read racing with
+a write may still store the previous value; ``CACHE_TTL_SECONDS`` bounds how
+long it survives, and likewise bounds staleness across worker processes when
+the in-process backend is used.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Type
+
+from pydantic import BaseModel
+from sqlmodel import SQLModel
+
+from app.config import settings
+from app.pagination import Page, PaginationParams
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """Thread-safe LRU dictionary whose entries expire after a TTL"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Kept apart so that LRU eviction can never reset a generation
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Any]:
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                if key in self._counters:
+                    values.append(self._counters[key])
+                    continue
+                entry = self._entries.get(key)
+                if entry is None or entry[0] < now:
+                    self._entries.pop(key, None)
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(entry[1])
+        return values
+
+    def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys: List[str]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class KeyedLock:
+    """One lock per key, kept only while some thread holds or waits for it.
+
+    Lets the in-process caches load each key under its own lock without
+    keeping a lock for every key ever requested.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> [lock, threads holding or waiting for it]
+        self._locks: Dict[Hashable, list] = {}
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class RedisBackend:
+    """Shared backend so that every worker sees the same entries and invalidations"""
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def get_many(self, keys: List[str]) -> List[Any]:
+        return [
+            None if raw is None else json.loads(raw)
+            for raw in self._client.mget(keys)
+        ]
+
+    def set(self, key: str, value: Any, ttl: int):
+        self._client.set(key, json.dumps(value), ex=ttl)
+
+    def delete(self, keys: List[str]):
+        if keys:
+            self._client.delete(*keys)
+
+    def incr(self, key: str) -> int:
+        return self._client.incr(key)
+
+
+class CacheStats(BaseModel):
+    """Hit/miss counters of one namespace"""
+    hits: int = 0
+    misses: int = 0
+
+
+@dataclass
+class _Generations:
+    all: int
+    list: int
+
+
+class ReadThroughCache:
+    """Per-resource cache of single items and list pages"""
+
+    def __init__(self, backend, ttl: int, prefix: str = "cache"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self._stats: Dict[str, CacheStats] = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, namespace: str, hit: bool):
+        with self._stats_lock:
+            stats = self._stats.setdefault(namespace, CacheStats())
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+
+    def stats(self) -> Dict[str, CacheStats]:
+        """Snapshot of the counters since the process started"""
+        with self._stats_lock:
+            return {namespace: stats.model_copy() for namespace, stats in self._stats.items()}
+
+    def _generation_keys(self, namespace: str) -> List[str]:
+        return [f"{self.prefix}:{namespace}:gen:all", f"{self.prefix}:{namespace}:gen:list"]
+
+    def _item_key(self, namespace: str, generation: int, item_id) -> str:
+        return f"{self.prefix}:{namespace}:{generation}:item:{item_id}"
+
+    def _read_through(self, namespace: str, build_key, load):
+        """Look up ``build_key(generations)``, falling back to ``load()``"""
+        generations = self.backend.get_many(self._generation_keys(namespace))
+        key = build_key(_Generations(*(int(g or 0) for g in generations)))
+        value = self.backend.get_many([key])[0]
+        if value is not None:
+            self._count(namespace, hit=True)
+            return value
+
+        self._count(namespace, hit=False)
+        value = load()
+        if value is not _MISSING:
+            self.backend.set(key, value, self.ttl)
+        return value
+
+    def get_item(
+        self,
+        namespace: str,
+        item_id: int,
+        read_model: Type[SQLModel],
+        load: Callable[[], Optional[SQLModel]],
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached item, or load it; missing items are not cached"""
+        def load_item():
+            item = load()
+            if item is None:
+                return _MISSING
+            return read_model.model_validate(item).model_dump(mode="json")
+
+        value = self._read_through(
+            namespace, lambda gen: self._item_key(namespace, gen.all, item_id), load_item
+        )
+        return None if value is _MISSING else value
+
+    def get_page(
+        self,
+        namespace: str,
+        pagination: PaginationParams,
+        read_model: Type[SQLModel],
+        load: Callable[[], Page],
+        query: str = "",
+    ) -> Page:
+        """Return a cached list page (items and next cursor), or load it.
+
+        ``query`` identifies the filters and sort order of the page.
+        """
+        params = f"{pagination.skip}:{pagination.limit}:{pagination.cursor or ''}:{query}"
+
+        def load_page():
+            page = load()
+            return {
+                "items": [read_model.model_validate(item).model_dump(mode="json") for item in page.items],
+                "next_cursor": page.next_cursor,
+            }
+
+        value = self._read_through(
+            namespace,
+            lambda gen: f"{self.prefix}:{namespace}:{gen.all}.{gen.list}:list:{params}",
+            load_page,
+        )
+        return Page(items=value["items"], next_cursor=value["next_cursor"])
+
+    def invalidate(self, namespace: str, item_ids: Iterable[int] = ()):
+        """Drop some items of ``namespace`` and every cached page of it"""
+        ids = list(item_ids)
+        if ids:
+            generation = int(self.backend.get_many(self._generation_keys(namespace)[:1])[0] or 0)
+            self.backend.delete([self._item_key(namespace, generation, item_id) for item_id in ids])
+        self.backend.incr(self._generation_keys(namespace)[1])
+
+    def clear(self, namespace: str):
+        """Drop everything cached for ``namespace``"""
+        self.backend.incr(self._generation_keys(namespace)[0])
+
+
+def _make_backend():
+    if settings.CACHE_REDIS_URL:
+        return RedisBackend(settings.CACHE_REDIS_URL)
+    return MemoryBackend(settings.CACHE_MAX_ENTRIES)
+
+
+catalog_cache = ReadThroughCache(_make_backend(), settings.CACHE_TTL_SECONDS, prefix="catalogo")
@@ -0,0 +1,266 @@
+"""Conditional GET (ETag / Last-Modified) for the detail and list routes.
+
+Every table carries a ``fecha_actualizacion`` column that SQLAlchemy bumps on
+each ORM or Core UPDATE, so the version of a row can be read without loading
+the row. When a request has ``If-None-Match`` or ``If-Modified-Since`` the
+routes first fetch only the key and version columns, and answer 304 without
+loading or serializing the body if the client's copy is still current.
+
+ETags are weak: they identify the representation selected by the URL, not
+the exact bytes, which may differ with the content encoding.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+
+from fastapi import Request, Response, status
+from sqlmodel import Session, SQLModel, select
+
+from app.fields import Fields
+from app.includes import Includes
+from app.pagination import Page, PaginationParams, paginate_rows, split_key
+from app.responses import json_list_response, json_response, select_read_columns
+
+VERSION_COLUMN = "fecha_actualizacion"
+
+
+def _field(item: Any, name: str) -> Any:
+    """Attribute of a model/row, or key of a cached dict"""
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+def _version(item: Any) -> datetime:
+    version = _field(item, VERSION_COLUMN)
+    return datetime.fromisoformat(version) if isinstance(version, str) else version
+
+
+def _nested_versions(item: Any) -> List[str]:
+    """Versions of the related rows embedded by ``include=``, if any"""
+    if not isinstance(item, dict):
+        return []
+    versions = []
+    for value in item.values():
+        if isinstance(value, dict):
+            versions.append(_version(value).isoformat())
+            versions.extend(_nested_versions(value))
+    return versions
+
+
+def _http_time(value: datetime) -> datetime:
+    # Stored timestamps are naive local time
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def is_conditional(request: Request) -> bool:
+    """Whether the client sent a validator it wants checked"""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def _opaque(tag: str) -> str:
+    return tag.strip().removeprefix("W/")
+
+
+@dataclass
+class Validators:
+    """ETag and optional Last-Modified of one response"""
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    @classmethod
+    def _digest(cls, request: Request, parts: List[str]) -> str:
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update(f"{request.url.path}?{request.url.query}".encode())
+        for part in parts:
+            digest.update(part.encode())
+            digest.update(b";")
+        return f'W/"{digest.hexdigest()}"'
+
+    @classmethod
+    def for_item(cls, request: Request, version: datetime) -> "Validators":
+        """Validators of a single row"""
+        return cls(
+            etag=cls._digest(request, [version.isoformat()]),
+            last_modified=_http_time(version),
+        )
+
+    @classmethod
+    def for_page(cls, request: Request, page: Page, key: str) -> "Validators":
+        """Validators of a list page, from the key and version of each item.
+
+        No Last-Modified is sent: rows leaving the page do not move the
+        newest version forward. Embedded related rows count as part of
+        their item.
+        """
+        parts = [
+            "@".join([str(_field(item, key)), _version(item).isoformat(), *_nested_versions(item)])
+            for item in page.items
+        ]
+        parts.append(page.next_cursor or "")
+        return cls(etag=cls._digest(request, parts))
+
+    def matches(self, request: Request) -> bool:
+        """Whether the client's cached copy is still current"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {_opaque(tag) for tag in if_none_match.split(",")}
+            return "*" in tags or _opaque(self.etag) in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified:
+            try:
+                return self.last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag}
+        if self.last_modified:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def apply(self, response: Response) -> None:
+        response.headers.update(self.headers())
+
+    def not_modified(self) -> Response:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers())
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    session: Session,
+    model: Type[SQLModel],
+    item_id: int,
+    load: Optional[Callable[[], Any]] = None,
+    fields: Optional[Fields] = None,
+) -> Union[Any, Response, None]:
+    """Fetch one row honouring the conditional headers.
+
+    Returns the row (or whatever ``load`` returns instead of ``session.get``),
+    ``None`` if it does not exist, or a 304 response. Without ``load`` a
+    conditional request is first answered from the version column alone.
+    With ``fields`` only those columns are read (when there is no ``load``)
+    and the row is returned already serialized, as a response.
+    """
+    pk = getattr(model, model.__table__.primary_key.columns.keys()[0])
+    if load is None and fields:
+        def load():
+            return session.execute(
+                select(*fields.columns(model, VERSION_COLUMN)).where(pk == item_id)
+            ).first()
+    if load is None and is_conditional(request):
+        version = session.exec(
+            select(getattr(model, VERSION_COLUMN)).where(pk == item_id)
+        ).first()
+        if version is None:
+            return None
+        validators = Validators.for_item(request, version)
+        if validators.matches(request):
+            return validators.not_modified()
+
+    item = load() if load is not None else session.get(model, item_id)
+    if item is None:
+        return None
+    validators = Validators.for_item(request, _version(item))
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+    return json_response(request, response, fields.project(item)) if fields else item
+
+
+def conditional_page(
+    request: Request,
+    response: Response,
+    load: Callable[[], Page],
+    key: str,
+    probe: Optional[Callable[[], Page]] = None,
+    expand: Optional[Callable[[List[Any]], List[Any]]] = None,
+    fields: Optional[Fields] = None,
+) -> Response:
+    """Return the items of ``load()`` (rows or dicts) with an ETag, or a 304 response.
+
+    ``probe`` loads the same page with only ``key`` and the version column;
+    for conditional requests it is tried before the full page. ``expand``
+    embeds related rows in the items (see app.includes); their versions
+    are not in the probe, so it is skipped. ``fields`` trims the items
+    once the ETag is computed.
+    """
+    if probe is not None and expand is None and is_conditional(request):
+        validators = Validators.for_page(request, probe(), key)
+        if validators.matches(request):
+            return validators.not_modified()
+
+    page = load()
+    if expand is not None:
+        page = Page(items=expand(page.items), next_cursor=page.next_cursor)
+    validators = Validators.for_page(request, page, key)
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+    items = page.apply(response)
+    if fields:
+        items = [fields.project(item) for item in items]
+    return json_list_response(request, response, items)
+
+
+def paginate_versions(session: Session, statement, pagination: PaginationParams, *order_by) -> Page:
+    """``paginate`` selecting only the sort keys and the version column"""
+    model = statement.column_descriptions[0]["entity"]
+    columns = [split_key(key)[0] for key in order_by]
+    light = statement.with_only_columns(*columns, getattr(model, VERSION_COLUMN))
+    return paginate_rows(session, light, pagination, *order_by)
+
+
+def page_columns(
+    statement,
+    read_model: Type[SQLModel],
+    *order_by,
+    includes: Optional[Includes] = None,
+    fields: Optional[Fields] = None,
+):
+    """Narrow a ``select(Model)`` to the columns a list page needs.
+
+    Without ``fields`` that is the whole read model; with it, the requested
+    fields plus the sort keys, the version column and the foreign keys of
+    the included relations.
+    """
+    if not fields:
+        return select_read_columns(statement, read_model)
+    required = [split_key(key)[0].key for key in order_by]
+    required.append(VERSION_COLUMN)
+    if includes:
+        required.extend(includes.foreign_keys())
+    return fields.select(statement, *required)
+
+
+def conditional_paginate(
+    request: Request,
+    response: Response,
+    session: Session,
+    statement,
+    pagination: PaginationParams,
+    *order_by,
+    read_model: Type[SQLModel],
+    includes: Optional[Includes] = None,
+    fields: Optional[Fields] = None,
+) -> Response:
+    """``paginate`` with ETag support and the version-only fast path for 304s.
+
+    The page is read as the plain columns of ``read_model`` (or only of
+    ``fields``) and serialized without going through the response model
+    again, with the relations requested in ``includes`` embedded.
+    """
+    key = split_key(order_by[-1])[0].key
+    rows = page_columns(statement, read_model, *order_by, includes=includes, fields=fields)
+    return conditional_page(
+        request,
+        response,
+        lambda: paginate_rows(session, rows, pagination, *order_by),
+        key,
+        probe=lambda: paginate_versions(session, statement, pagination, *order_by),
+        expand=(lambda items: includes.expand(session, items)) if includes else None,
+        fields=fields,
+    )
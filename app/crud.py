@@ -0,0 +1,87 @@
+"""Single-statement writes for the create, update and delete routes.
+
+Each write is one ``INSERT``/``UPDATE``/``DELETE ... RETURNING`` that hands
+back the columns the route needs, so a create or update costs that statement
+and the commit, instead of a lookup, the write and a ``SELECT`` to refresh
+the row after the commit. A missing row shows up as an empty ``RETURNING``,
+which the routes turn into the same 404 as before. ``fecha_actualizacion``
+is still bumped by its ``onupdate``, so ETags move as with the ORM.
+
+The statements are built separately from their execution so the async
+routes can run them too.
+"""
+from typing import Any, Dict, Optional, Type
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.engine import Row
+from sqlmodel import Session, SQLModel, select
+
+from app.responses import read_columns
+
+
+def _pk(model: Type[SQLModel]):
+    return getattr(model, model.__table__.primary_key.columns.keys()[0])
+
+
+def insert_statement(model: Type[SQLModel], read_model: Type[SQLModel], item: SQLModel):
+    """``INSERT`` of a create schema, returning the read-model columns"""
+    values = model.model_validate(item).model_dump(exclude={_pk(model).key})
+    return insert(model).values(values).returning(*read_columns(model, read_model))
+
+
+def update_statement(
+    model: Type[SQLModel],
+    read_model: Type[SQLModel],
+    item_id: int,
+    values: Dict[str, Any],
+    *where,
+):
+    """``UPDATE`` of one row by primary key, returning the read-model columns.
+
+    ``where`` adds conditions the row must meet to be updated. Without
+    ``values`` nothing is written and the row is only read.
+    """
+    columns = read_columns(model, read_model)
+    if not values:
+        return select(*columns).where(_pk(model) == item_id, *where)
+    return (
+        update(model)
+        .where(_pk(model) == item_id, *where)
+        .values(values)
+        .returning(*columns)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delete_statement(model: Type[SQLModel], item_id: int, *columns):
+    """``DELETE`` of one row by primary key, returning the primary key and ``columns``"""
+    return (
+        delete(model)
+        .where(_pk(model) == item_id)
+        .returning(_pk(model), *columns)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def create_row(session: Session, model: Type[SQLModel], read_model: Type[SQLModel], item: SQLModel) -> SQLModel:
+    """Insert ``item`` without committing and return it as ``read_model``"""
+    row = session.execute(insert_statement(model, read_model, item)).one()
+    return read_model.model_validate(row._mapping)
+
+
+def update_row(
+    session: Session,
+    model: Type[SQLModel],
+    read_model: Type[SQLModel],
+    item_id: int,
+    values: Dict[str, Any],
+    *where,
+) -> Optional[SQLModel]:
+    """Update one row without committing; ``None`` if it does not exist (or fails ``where``)"""
+    row = session.execute(update_statement(model, read_model, item_id, values, *where)).first()
+    return read_model.model_validate(row._mapping) if row else None
+
+
+def delete_row(session: Session, model: Type[SQLModel], item_id: int, *columns) -> Optional[Row]:
+    """Delete one row without committing; its key and ``columns``, or ``None`` if it did not exist"""
+    return session.execute(delete_statement(model, item_id, *columns)).first()
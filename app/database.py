@@ -1,14 +1,123 @@
+import logging
+import random
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import create_engine, SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.config import settings
+from app.metrics import TimedQueuePool, current_request, instrument_engine
+
+sql_logger = logging.getLogger("app.sql")
+
+# Logged parameter lists are cut to this many characters
+MAX_LOGGED_PARAMETERS = 2000
+
+# Statements PostgreSQL can EXPLAIN, by first keyword
+EXPLAINABLE = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "VALUES"}
+
+
+class SqlTracer:
+    """Logs slow statements, and a sample of the others, with the route that ran them.
+
+    When neither is configured no event listener is installed, so tracing
+    costs nothing.
+    """
+
+    def __init__(self, slow_ms: int, sample_rate: float, explain: bool):
+        self.slow_seconds = slow_ms / 1000
+        self.sample_rate = sample_rate
+        self.explain = explain
+
+    @property
+    def enabled(self) -> bool:
+        return self.slow_seconds > 0 or self.sample_rate > 0
+
+    def install(self, engine: Engine) -> None:
+        if self.enabled:
+            event.listen(engine, "before_cursor_execute", self._before)
+            event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        context.trace_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context.trace_started
+        slow = 0 < self.slow_seconds <= elapsed
+        if not slow and not (self.sample_rate and random.random() < self.sample_rate):
+            return
+
+        stats = current_request.get()
+        route = stats.route if stats is not None else "-"
+        logged = repr(parameters)
+        if len(logged) > MAX_LOGGED_PARAMETERS:
+            logged = logged[:MAX_LOGGED_PARAMETERS] + "..."
+        if not slow:
+            sql_logger.info("Sampled query (%.1f ms) [%s]: %s | params=%s",
+                            elapsed * 1000, route, statement, logged)
+            return
+
+        plan = ""
+        if self.explain and not executemany and conn.dialect.name == "postgresql":
+            plan = "\n" + self._plan(cursor, statement, parameters)
+        sql_logger.warning("Slow query (%.1f ms) [%s]: %s | params=%s%s",
+                           elapsed * 1000, route, statement, logged, plan)
+
+    @staticmethod
+    def _plan(cursor, statement, parameters) -> str:
+        if statement.lstrip().split(None, 1)[0].upper() not in EXPLAINABLE:
+            return "(no plan for this statement)"
+        # Plain EXPLAIN plans without executing, so it is safe for writes too.
+        # It runs on a raw cursor, out of the engine events, inside a savepoint
+        # so that a failure cannot abort the caller's transaction.
+        explain = cursor.connection.cursor()
+        try:
+            explain.execute("SAVEPOINT sql_trace_explain")
+            try:
+                explain.execute("EXPLAIN " + statement, parameters)
+                plan = "\n".join(row[0] for row in explain.fetchall())
+                explain.execute("RELEASE SAVEPOINT sql_trace_explain")
+                return plan
+            except Exception:
+                explain.execute("ROLLBACK TO SAVEPOINT sql_trace_explain")
+                raise
+        except Exception as exc:  # the plan is best effort
+            return f"(EXPLAIN failed: {exc})"
+        finally:
+            explain.close()
+
+
+sql_tracer = SqlTracer(
+    settings.SQL_SLOW_QUERY_MS, settings.SQL_TRACE_SAMPLE_RATE, settings.SQL_EXPLAIN_SLOW
+)
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    echo=True,
+    echo=settings.SQL_ECHO,
+    poolclass=TimedQueuePool,
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20
 )
+instrument_engine(engine)
+sql_tracer.install(engine)
+
+# Async engine, only created when the async routes are enabled so that
+# asyncpg is not required otherwise
+async_engine = None
+if settings.USE_ASYNC_DB:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20
+    )
+    instrument_engine(async_engine.sync_engine)
+    sql_tracer.install(async_engine.sync_engine)
 
 
 def create_db_and_tables():
@@ -20,3 +129,11 @@ def get_session():
     """Dependency for getting database session"""
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    """Dependency for getting an async database session"""
+    if async_engine is None:
+        raise RuntimeError("Async database access is disabled (USE_ASYNC_DB)")
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,106 @@
+"""Sparse fieldsets (``fields=``) for the list and detail endpoints.
+
+``fields=estudiante_id,nombre,apellido`` returns only those keys of each
+item, in the read model's order; relations added with ``include=`` are kept.
+Unknown names answer 422. Outside the catalog cache the query is narrowed
+too: it selects the requested columns plus the ones the route needs itself
+(sort keys for the cursor, the version column for the ETag, foreign keys of
+included relations), so a narrow read can be served by a covering index
+without touching the table. The catalog resources keep whole rows in
+app.cache and are projected from there.
+"""
+from typing import Any, ClassVar, Dict, List, Optional, Type
+
+from fastapi import HTTPException, Query, status
+from sqlmodel import SQLModel
+
+from app.models.calificacion import CalificacionRead
+from app.models.carrera import CarreraRead
+from app.models.curso import CursoRead
+from app.models.estudiante import EstudianteRead
+from app.models.facultad import FacultadRead
+from app.models.matricula import MatriculaRead
+from app.models.pago import PagoRead
+from app.models.prerrequisito import PrerequisitoRead
+from app.models.profesor import ProfesorRead
+from app.models.seccion import SeccionRead
+
+FIELDS_DESCRIPTION = "Comma separated fields to return instead of the whole item"
+
+
+class Fields:
+    """Fields of ``read_model`` requested for one response; empty means all"""
+    read_model: ClassVar[Type[SQLModel]]
+
+    def __init__(self, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+        names = {part.strip() for part in (fields or "").split(",")} - {""}
+        unknown = names.difference(self.read_model.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}; "
+                       f"fields must be among: {', '.join(self.read_model.model_fields)}"
+            )
+        self.names: List[str] = [name for name in self.read_model.model_fields if name in names]
+
+    def __bool__(self) -> bool:
+        return bool(self.names)
+
+    def columns(self, model: Type[SQLModel], *required: str) -> List[Any]:
+        """Columns of ``model`` to select: the requested fields and the ``required`` ones"""
+        wanted = [*self.names, *(name for name in required if name not in self.names)]
+        return [getattr(model, name) for name in dict.fromkeys(wanted)]
+
+    def select(self, statement, *required: str):
+        """Narrow a ``select(Model)`` to ``columns``, keeping its filters"""
+        model = statement.column_descriptions[0]["entity"]
+        return statement.with_only_columns(*self.columns(model, *required))
+
+    def project(self, item: Any) -> Dict[str, Any]:
+        """The requested keys of a row or dict, plus any embedded relation"""
+        values = item if isinstance(item, dict) else item._asdict()
+        fields = self.read_model.model_fields
+        return {
+            name: value for name, value in values.items()
+            if name in self.names or name not in fields
+        }
+
+
+class FacultadFields(Fields):
+    read_model = FacultadRead
+
+
+class CarreraFields(Fields):
+    read_model = CarreraRead
+
+
+class CursoFields(Fields):
+    read_model = CursoRead
+
+
+class PrerrequisitoFields(Fields):
+    read_model = PrerequisitoRead
+
+
+class EstudianteFields(Fields):
+    read_model = EstudianteRead
+
+
+class ProfesorFields(Fields):
+    read_model = ProfesorRead
+
+
+class SeccionFields(Fields):
+    read_model = SeccionRead
+
+
+class MatriculaFields(Fields):
+    read_model = MatriculaRead
+
+
+class PagoFields(Fields):
+    read_model = PagoRead
+
+
+class CalificacionFields(Fields):
+    read_model = CalificacionRead
@@ -0,0 +1,232 @@
+"""Typed filters and sort keys accepted by the list endpoints.
+
+Each resource declares a ``ListFilters`` subclass whose ``__init__`` names
+its query parameters, so FastAPI validates and documents them. Every filter
+is an equality on an indexed column (or an ``IN`` over an indexed subquery)
+compiled with bound parameters; ``activo`` is the only unindexed one and is
+meant to narrow the other filters. Sort keys are restricted to indexed
+columns of the read model, so a sorted page is an index scan and its keyset
+cursor can be built from the returned rows. ``sort=-apellido`` sorts
+descending; the primary key always breaks ties.
+"""
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from sqlmodel import SQLModel, select
+
+from app.models.calificacion import Calificacion
+from app.models.carrera import Carrera
+from app.models.curso import Curso
+from app.models.estudiante import Estudiante
+from app.models.facultad import Facultad
+from app.models.matricula import Matricula
+from app.models.pago import Pago
+from app.models.prerrequisito import Prerrequisito
+from app.models.profesor import Profesor
+from app.models.seccion import Seccion
+
+SORT_DESCRIPTION = "Sort key, prefixed with '-' for descending order"
+
+
+class ListFilters:
+    """Filters and sort order of one list request"""
+    model: ClassVar[Type[SQLModel]]
+    # Indexed read-model columns that ``sort`` may name, besides the primary key
+    sort_keys: ClassVar[Tuple[str, ...]] = ()
+
+    def __init__(self, sort: Optional[str], **values: Any):
+        self.sort = sort
+        self.values: Dict[str, Any] = {name: value for name, value in values.items() if value is not None}
+
+    @classmethod
+    def _pk_name(cls) -> str:
+        return cls.model.__table__.primary_key.columns.keys()[0]
+
+    def clause(self, name: str, value: Any):
+        """SQL predicate of one filter; override for filters on other tables"""
+        return getattr(self.model, name) == value
+
+    def apply(self, statement):
+        """Add the filters to a ``select`` of the model"""
+        clauses = [self.clause(name, value) for name, value in self.values.items()]
+        return statement.where(*clauses) if clauses else statement
+
+    def order_by(self) -> Tuple[Any, ...]:
+        """Sort keys for ``paginate``, ending with the primary key"""
+        pk = getattr(self.model, self._pk_name())
+        if not self.sort:
+            return (pk,)
+        name = self.sort.removeprefix("-")
+        allowed = (*self.sort_keys, self._pk_name())
+        if name not in allowed:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"sort must be one of: {', '.join(allowed)} (optionally prefixed with '-')"
+            )
+        column = getattr(self.model, name)
+        key = column.desc() if self.sort.startswith("-") else column
+        return (key,) if name == self._pk_name() else (key, pk)
+
+    def cache_key(self) -> str:
+        """Canonical form of the filters and sort, for cached pages"""
+        parts: List[str] = [f"{name}={self.values[name]}" for name in sorted(self.values)]
+        if self.sort:
+            parts.append(f"sort={self.sort}")
+        return "&".join(parts)
+
+
+class FacultadFilters(ListFilters):
+    model = Facultad
+    sort_keys = ("nombre",)
+
+    def __init__(
+        self,
+        activo: Optional[bool] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(sort, activo=activo)
+
+
+class CarreraFilters(ListFilters):
+    model = Carrera
+    sort_keys = ("nombre",)
+
+    def __init__(
+        self,
+        facultad_id: Optional[int] = None,
+        activo: Optional[bool] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(sort, facultad_id=facultad_id, activo=activo)
+
+
+class CursoFilters(ListFilters):
+    model = Curso
+    sort_keys = ("codigo", "nombre")
+
+    def __init__(
+        self,
+        carrera_id: Optional[int] = None,
+        nivel_semestre: Optional[int] = Query(None, gt=0),
+        activo: Optional[bool] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(sort, carrera_id=carrera_id, nivel_semestre=nivel_semestre, activo=activo)
+
+
+class PrerrequisitoFilters(ListFilters):
+    model = Prerrequisito
+
+    def __init__(
+        self,
+        curso_id: Optional[int] = None,
+        curso_req_id: Optional[int] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(sort, curso_id=curso_id, curso_req_id=curso_req_id)
+
+
+class EstudianteFilters(ListFilters):
+    model = Estudiante
+    sort_keys = ("apellido", "dni")
+
+    def __init__(
+        self,
+        dni: Optional[str] = None,
+        email: Optional[str] = None,
+        activo: Optional[bool] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(sort, dni=dni, email=email, activo=activo)
+
+
+class ProfesorFilters(ListFilters):
+    model = Profesor
+    sort_keys = ("apellido", "dni")
+
+    def __init__(
+        self,
+        dni: Optional[str] = None,
+        email: Optional[str] = None,
+        activo: Optional[bool] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(sort, dni=dni, email=email, activo=activo)
+
+
+class SeccionFilters(ListFilters):
+    model = Seccion
+    sort_keys = ("periodo_academico",)
+
+    def __init__(
+        self,
+        curso_id: Optional[int] = None,
+        profesor_id: Optional[int] = None,
+        periodo_academico: Optional[str] = None,
+        activo: Optional[bool] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(
+            sort, curso_id=curso_id, profesor_id=profesor_id,
+            periodo_academico=periodo_academico, activo=activo
+        )
+
+
+def _secciones_of(periodo_academico: str):
+    return select(Seccion.seccion_id).where(Seccion.periodo_academico == periodo_academico)
+
+
+class MatriculaFilters(ListFilters):
+    model = Matricula
+    sort_keys = ("fecha_matricula",)
+
+    def __init__(
+        self,
+        estudiante_id: Optional[int] = None,
+        seccion_id: Optional[int] = None,
+        estado: Optional[str] = None,
+        periodo_academico: Optional[str] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(
+            sort, estudiante_id=estudiante_id, seccion_id=seccion_id,
+            estado=estado, periodo_academico=periodo_academico
+        )
+
+    def clause(self, name: str, value: Any):
+        if name == "periodo_academico":
+            return Matricula.seccion_id.in_(_secciones_of(value))
+        return super().clause(name, value)
+
+
+class PagoFilters(ListFilters):
+    model = Pago
+    sort_keys = ("fecha_pago",)
+
+    def __init__(
+        self,
+        matricula_id: Optional[int] = None,
+        estado: Optional[str] = None,
+        referencia: Optional[str] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(sort, matricula_id=matricula_id, estado=estado, referencia=referencia)
+
+
+class CalificacionFilters(ListFilters):
+    model = Calificacion
+
+    def __init__(
+        self,
+        matricula_id: Optional[int] = None,
+        seccion_id: Optional[int] = None,
+        sort: Optional[str] = Query(None, description=SORT_DESCRIPTION),
+    ):
+        super().__init__(sort, matricula_id=matricula_id, seccion_id=seccion_id)
+
+    def clause(self, name: str, value: Any):
+        if name == "seccion_id":
+            return Calificacion.matricula_id.in_(
+                select(Matricula.matricula_id).where(Matricula.seccion_id == value)
+            )
+        return super().clause(name, value)
@@ -0,0 +1,323 @@
+"""CSV import pipeline: streaming validation, COPY into a staging table, single upsert"""
+import csv
+import io
+import tempfile
+from dataclasses import dataclass
+from enum import Enum
+from typing import BinaryIO, Callable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import UniqueConstraint, text
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, SQLModel
+
+from app.cache import catalog_cache
+from app.models.estudiante import Estudiante, EstudianteCreate
+from app.models.matricula import Matricula, MatriculaCreate
+from app.models.seccion import Seccion, SeccionCreate
+from app.services.enrollment import ESTADO_ANULADO, SECCION_FULL, lock_secciones, recount_seats
+from app.services.prerequisites import MISSING_PREREQUISITES, NOTA_APROBATORIA
+from app.services.schedule import schedule_index
+from app.services.transcripts import refresh_matriculas_where
+
+# Keep the report bounded even when a whole file is malformed
+MAX_REPORTED_ERRORS = 1000
+
+# NULL marker used in the staged COPY stream
+_NULL = "\\N"
+
+# Valid rows are staged in memory up to this size, then spill to disk
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+
+class ImportResource(str, Enum):
+    """Resources that can be loaded from CSV"""
+    estudiantes = "estudiantes"
+    secciones = "secciones"
+    matriculas = "matriculas"
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    """How a CSV resource maps onto its table"""
+    model: Type[SQLModel]
+    create_model: Type[SQLModel]
+    conflict_columns: Tuple[str, ...]
+    # Runs right before the merge, given the staging table; rejects rows from it
+    before_merge: Optional[Callable[[Session, str, "_Report"], None]] = None
+    # Runs in the import transaction after the merge, given the staging table
+    after_merge: Optional[Callable[[Session, str], None]] = None
+    # catalog_cache namespaces made stale by the import
+    cached: Tuple[str, ...] = ()
+    # Whether the import changes timetables or who attends them
+    schedule: bool = False
+
+
+def _before_matriculas_merge(session: Session, staging: str, report: "_Report"):
+    # Same rule as app.services.prerequisites, for new matriculas only
+    _reject_returned(
+        session.execute(text(
+            f"DELETE FROM {staging} t WHERE NOT EXISTS ("
+            f"SELECT 1 FROM matricula x WHERE x.estudiante_id = t.estudiante_id AND x.seccion_id = t.seccion_id"
+            f") AND EXISTS ("
+            f"SELECT 1 FROM seccion s JOIN prerrequisito p ON p.curso_id = s.curso_id "
+            f"WHERE s.seccion_id = t.seccion_id AND NOT EXISTS ("
+            f"SELECT 1 FROM matricula m "
+            f"JOIN seccion ms ON ms.seccion_id = m.seccion_id "
+            f"JOIN calificacion c ON c.matricula_id = m.matricula_id "
+            f"WHERE m.estudiante_id = t.estudiante_id AND ms.curso_id = p.curso_req_id "
+            f"AND c.nota >= {NOTA_APROBATORIA})"
+            f") RETURNING _fila"
+        )),
+        report,
+        MISSING_PREREQUISITES,
+    )
+
+    # New seats beyond what is free are rejected in file order, as reserve_seat
+    # would; the secciones stay locked until the recount after the merge
+    lock_secciones(session, session.execute(text(f"SELECT DISTINCT seccion_id FROM {staging}")).scalars())
+    _reject_returned(
+        session.execute(text(
+            f"DELETE FROM {staging} d USING ("
+            f"SELECT t._fila, row_number() OVER (PARTITION BY t.seccion_id ORDER BY t._fila) AS orden, "
+            f"s.capacidad_maxima - s.matriculados + coalesce(l.liberados, 0) AS libres "
+            f"FROM {staging} t JOIN seccion s ON s.seccion_id = t.seccion_id "
+            f"LEFT JOIN ("
+            f"SELECT r.seccion_id, count(*) AS liberados FROM {staging} r "
+            f"JOIN matricula m USING (estudiante_id, seccion_id) "
+            f"WHERE r.estado = '{ESTADO_ANULADO}' AND m.estado <> '{ESTADO_ANULADO}' GROUP BY r.seccion_id"
+            f") l ON l.seccion_id = t.seccion_id "
+            f"WHERE t.estado <> '{ESTADO_ANULADO}' AND NOT EXISTS ("
+            f"SELECT 1 FROM matricula m WHERE m.estudiante_id = t.estudiante_id "
+            f"AND m.seccion_id = t.seccion_id AND m.estado <> '{ESTADO_ANULADO}')"
+            f") n WHERE d._fila = n._fila AND n.orden > n.libres RETURNING d._fila"
+        )),
+        report,
+        SECCION_FULL,
+    )
+
+
+def _after_matriculas_merge(session: Session, staging: str):
+    rows = session.execute(text(f"SELECT DISTINCT seccion_id FROM {staging}"))
+    recount_seats(session, [seccion_id for (seccion_id,) in rows])
+
+    refresh_matriculas_where(
+        session,
+        text(
+            f"SELECT m.matricula_id FROM matricula m "
+            f"JOIN {staging} t USING (estudiante_id, seccion_id)"
+        ).columns(Matricula.matricula_id)
+    )
+
+
+IMPORT_SPECS = {
+    ImportResource.estudiantes: ImportSpec(Estudiante, EstudianteCreate, ("dni",)),
+    ImportResource.secciones: ImportSpec(
+        Seccion, SeccionCreate, ("curso_id", "codigo", "periodo_academico"),
+        cached=("seccion",), schedule=True
+    ),
+    ImportResource.matriculas: ImportSpec(
+        Matricula, MatriculaCreate, ("estudiante_id", "seccion_id"),
+        before_merge=_before_matriculas_merge, after_merge=_after_matriculas_merge,
+        cached=("seccion",), schedule=True
+    ),
+}
+
+
+class ImportRowError(BaseModel):
+    """A rejected CSV row, identified by its line number in the file"""
+    row: int
+    detail: str
+
+
+class ImportResult(BaseModel):
+    """Outcome of a CSV import"""
+    resource: ImportResource
+    total_rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[ImportRowError] = []
+
+
+class _Report:
+    def __init__(self, result: ImportResult):
+        self.result = result
+
+    def reject(self, row: int, detail: str):
+        self.result.rejected += 1
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            self.result.errors.append(ImportRowError(row=row, detail=detail))
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def _stage_rows(spec: ImportSpec, columns: List[str], source: BinaryIO, report: _Report):
+    """Validate the CSV row by row and write accepted rows in COPY CSV format.
+
+    Empty cells are dropped so the schema default applies; ``None`` is written
+    as the COPY NULL marker.
+    """
+    staged = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode="w+", newline="")
+    writer = csv.writer(staged)
+    reader = csv.DictReader(io.TextIOWrapper(source, encoding="utf-8-sig", newline=""))
+
+    # The plain pydantic validator skips SQLModel's per-attribute instrumentation,
+    # which dominates the cost at this volume. Table-only columns such as
+    # fecha_registro get their default once per import.
+    validator = spec.create_model.__pydantic_validator__
+    table_defaults = {
+        name: field.get_default(call_default_factory=True)
+        for name, field in spec.model.model_fields.items()
+        if name in columns and name not in spec.create_model.model_fields
+    }
+
+    for record in reader:
+        report.result.total_rows += 1
+        values = {key: value for key, value in record.items() if key and value not in ("", None)}
+        try:
+            row = validator.validate_python(values).model_dump()
+        except ValidationError as exc:
+            report.reject(reader.line_num, _validation_detail(exc))
+            continue
+        row.update(table_defaults)
+        writer.writerow(
+            [_NULL if row[column] is None else row[column] for column in columns]
+            + [reader.line_num]
+        )
+
+    staged.seek(0)
+    return staged
+
+
+def _reject_returned(cursor, report: _Report, detail: str):
+    for (row,) in cursor.fetchall():
+        report.reject(row, detail)
+
+
+def import_csv(session: Session, resource: ImportResource, source: BinaryIO) -> ImportResult:
+    """Validate, stage with COPY and merge a CSV file in a single transaction"""
+    if session.get_bind().dialect.name != "postgresql":
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="CSV import requires PostgreSQL"
+        )
+
+    spec = IMPORT_SPECS[resource]
+    table = spec.model.__table__
+    primary_keys = {column.name for column in table.primary_key.columns}
+    columns = [column.name for column in table.columns if column.name not in primary_keys]
+    report = _Report(ImportResult(resource=resource))
+
+    staged = _stage_rows(spec, columns, source, report)
+    staging = f"import_{table.name}"
+    column_list = ", ".join(columns)
+    key_list = ", ".join(spec.conflict_columns)
+
+    dbapi = session.get_bind().dialect.dbapi
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.execute(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {table.name} WITH NO DATA"
+        )
+        cursor.execute(f"ALTER TABLE {staging} ADD COLUMN _fila integer")
+        cursor.copy_expert(
+            f"COPY {staging} ({column_list}, _fila) FROM STDIN WITH (FORMAT csv, NULL '\\N')", staged
+        )
+
+        # Rows pointing at missing parents would abort the merge
+        for fk in table.foreign_keys:
+            parent = fk.column
+            cursor.execute(
+                f"DELETE FROM {staging} t WHERE NOT EXISTS ("
+                f"SELECT 1 FROM {parent.table.name} p "
+                f"WHERE p.{parent.name} = t.{fk.parent.name}) RETURNING _fila"
+            )
+            _reject_returned(
+                cursor, report, f"{fk.parent.name} does not reference an existing {parent.table.name}"
+            )
+
+        # Other unique keys already taken by a different row would abort it too
+        unique_keys = [
+            [column.name for column in constraint.columns]
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+            and {column.name for column in constraint.columns} != set(spec.conflict_columns)
+        ]
+        key_match = " AND ".join(f"x.{c} = t.{c}" for c in spec.conflict_columns)
+        for unique_columns in unique_keys:
+            match = " AND ".join(f"x.{c} = t.{c}" for c in unique_columns)
+            cursor.execute(
+                f"DELETE FROM {staging} t WHERE EXISTS ("
+                f"SELECT 1 FROM {table.name} x WHERE {match} AND NOT ({key_match})"
+                f") RETURNING _fila"
+            )
+            _reject_returned(
+                cursor, report, f"{', '.join(unique_columns)} already used by another {table.name}"
+            )
+
+        # ON CONFLICT cannot touch the same row twice: the last occurrence wins
+        duplicate_match = " AND ".join(f"a.{c} = b.{c}" for c in spec.conflict_columns)
+        cursor.execute(
+            f"DELETE FROM {staging} a USING {staging} b "
+            f"WHERE {duplicate_match} AND a._fila < b._fila RETURNING a._fila"
+        )
+        _reject_returned(cursor, report, f"Duplicated {key_list} in file, superseded by a later row")
+
+        # Two rows of the file claiming another unique key: the first one keeps it
+        for unique_columns in unique_keys:
+            match = " AND ".join(f"a.{c} = b.{c}" for c in unique_columns)
+            cursor.execute(
+                f"DELETE FROM {staging} a USING {staging} b "
+                f"WHERE {match} AND a._fila > b._fila RETURNING a._fila"
+            )
+            _reject_returned(
+                cursor, report, f"{', '.join(unique_columns)} already used by an earlier row of the file"
+            )
+
+        if spec.before_merge:
+            spec.before_merge(session, staging, report)
+
+        # Updated rows also get a new version (columns with an onupdate)
+        updates = ", ".join(
+            f"{column} = EXCLUDED.{column}"
+            for column in columns
+            if (column in spec.create_model.model_fields or table.c[column].onupdate is not None)
+            and column not in spec.conflict_columns
+        )
+        cursor.execute(
+            f"WITH merged AS ("
+            f"INSERT INTO {table.name} ({column_list}) "
+            f"SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT ({key_list}) DO UPDATE SET {updates} "
+            f"RETURNING (xmax = 0) AS inserted"
+            f") SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) "
+            f"FROM merged"
+        )
+        report.result.inserted, report.result.updated = cursor.fetchone()
+
+        if spec.after_merge:
+            spec.after_merge(session, staging)
+    except (dbapi.Error, DBAPIError) as exc:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=" ".join(str(getattr(exc, "orig", exc)).split())
+        )
+    finally:
+        cursor.close()
+        staged.close()
+
+    session.commit()
+    for namespace in spec.cached:
+        catalog_cache.clear(namespace)
+    if spec.schedule:
+        schedule_index.invalidate()
+    return report.result
@@ -0,0 +1,159 @@
+"""Related resources embedded in list responses (``include=``).
+
+``include=curso,profesor`` or ``include=estudiante,seccion.curso`` adds the
+named many-to-one relations to every item of the page as nested read
+models (``null`` when the foreign key is empty). Each relation is loaded for
+the whole page at once, ``WHERE pk IN (...)`` over the foreign keys found in
+the page, as ``selectinload`` does: a page costs one query per requested
+relation whatever its size, and a dotted path one more per step. A row
+referenced by several items is loaded once and shared.
+"""
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Type
+
+from fastapi import HTTPException, Query, status
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.calificacion import Calificacion, CalificacionReadWithRelations
+from app.models.curso import Curso, CursoRead
+from app.models.estudiante import Estudiante, EstudianteRead
+from app.models.matricula import Matricula, MatriculaRead, MatriculaReadWithRelations
+from app.models.pago import Pago, PagoReadWithRelations
+from app.models.profesor import Profesor, ProfesorRead
+from app.models.seccion import Seccion, SeccionRead, SeccionReadWithRelations
+from app.responses import select_read_columns
+
+INCLUDE_DESCRIPTION = (
+    "Related resources to embed in each item, comma separated; "
+    "a dotted path goes further (e.g. seccion.curso)"
+)
+
+
+@dataclass(frozen=True)
+class Relation:
+    """Row of ``model`` that the ``foreign_key`` column of an item points at"""
+    foreign_key: str
+    model: Type[SQLModel]
+    read_model: Type[SQLModel]
+
+    @property
+    def key(self) -> str:
+        return self.model.__table__.primary_key.columns.keys()[0]
+
+    def statement(self, ids: List[Any]):
+        """Read-model columns of the rows with the given primary keys"""
+        pk = getattr(self.model, self.key)
+        return select_read_columns(select(self.model), self.read_model).where(pk.in_(ids))
+
+
+RELATIONS: Dict[Type[SQLModel], Dict[str, Relation]] = {
+    Seccion: {
+        "curso": Relation("curso_id", Curso, CursoRead),
+        "profesor": Relation("profesor_id", Profesor, ProfesorRead),
+    },
+    Matricula: {
+        "estudiante": Relation("estudiante_id", Estudiante, EstudianteRead),
+        "seccion": Relation("seccion_id", Seccion, SeccionRead),
+    },
+    Pago: {"matricula": Relation("matricula_id", Matricula, MatriculaRead)},
+    Calificacion: {"matricula": Relation("matricula_id", Matricula, MatriculaRead)},
+}
+
+
+def _paths(model: Type[SQLModel], prefix: str = "") -> Iterable[str]:
+    for name, relation in RELATIONS.get(model, {}).items():
+        yield prefix + name
+        yield from _paths(relation.model, f"{prefix}{name}.")
+
+
+def _as_dict(item: Any) -> Dict[str, Any]:
+    # Copy cached dicts: the nested rows must not end up in the cache
+    return dict(item) if isinstance(item, dict) else item._asdict()
+
+
+def _plan(model: Type[SQLModel], rows: List[Dict[str, Any]], tree: Dict[str, dict]):
+    """Yield the query of each relation in ``tree``; the rows sent back are attached"""
+    for name, subtree in tree.items():
+        relation = RELATIONS[model][name]
+        ids = sorted({row[relation.foreign_key] for row in rows} - {None})
+        related: Dict[Any, Dict[str, Any]] = {}
+        if ids:
+            found = yield relation.statement(ids)
+            related = {item[relation.key]: item for item in map(_as_dict, found)}
+        for row in rows:
+            row[name] = related.get(row[relation.foreign_key])
+        if subtree and related:
+            yield from _plan(relation.model, list(related.values()), subtree)
+
+
+class Includes:
+    """Relations requested for one list request, as a tree of names"""
+    model: ClassVar[Type[SQLModel]]
+    # Item schema of the list route, with every relation as an optional field
+    read_model: ClassVar[Type[SQLModel]]
+
+    def __init__(self, include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION)):
+        self.tree: Dict[str, dict] = {}
+        for path in filter(None, (part.strip() for part in (include or "").split(","))):
+            self._add(path)
+
+    def _add(self, path: str) -> None:
+        model, node = self.model, self.tree
+        for name in path.split("."):
+            if name not in RELATIONS.get(model, {}):
+                allowed = ", ".join(_paths(self.model))
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"include must be a comma separated list of: {allowed}"
+                )
+            model, node = RELATIONS[model][name].model, node.setdefault(name, {})
+
+    def __bool__(self) -> bool:
+        return bool(self.tree)
+
+    def foreign_keys(self) -> List[str]:
+        """Columns of the items that the requested relations start from"""
+        return [RELATIONS[self.model][name].foreign_key for name in self.tree]
+
+    def expand(self, session: Session, items: Iterable[Any]) -> List[Dict[str, Any]]:
+        """``items`` (rows or cached dicts) as dicts with the requested relations"""
+        rows = [_as_dict(item) for item in items]
+        plan = _plan(self.model, rows, self.tree)
+        try:
+            statement = next(plan)
+            while True:
+                statement = plan.send(session.execute(statement).all())
+        except StopIteration:
+            return rows
+
+    async def expand_async(self, session: AsyncSession, items: Iterable[Any]) -> List[Dict[str, Any]]:
+        """``expand`` on an async session"""
+        rows = [_as_dict(item) for item in items]
+        plan = _plan(self.model, rows, self.tree)
+        try:
+            statement = next(plan)
+            while True:
+                statement = plan.send((await session.execute(statement)).all())
+        except StopIteration:
+            return rows
+
+
+class SeccionIncludes(Includes):
+    model = Seccion
+    read_model = SeccionReadWithRelations
+
+
+class MatriculaIncludes(Includes):
+    model = Matricula
+    read_model = MatriculaReadWithRelations
+
+
+class PagoIncludes(Includes):
+    model = Pago
+    read_model = PagoReadWithRelations
+
+
+class CalificacionIncludes(Includes):
+    model = Calificacion
+    read_model = CalificacionReadWithRelations
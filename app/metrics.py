@@ -0,0 +1,244 @@
+"""Request, SQL and connection-pool metrics in the Prometheus text format.
+
+``MetricsMiddleware`` times every request and labels it with the route
+template (``/api/v1/estudiantes/{estudiante_id}``), not the raw path, so
+the number of series stays bounded. SQLAlchemy cursor events add each
+statement's duration to the request being served, found through a context
+variable (it is copied into the threadpool running sync endpoints). Pool
+checkout wait is timed by ``TimedQueuePool``.
+
+Everything is kept in process memory: with several workers, each exposes
+its own numbers on ``/metrics`` and Prometheus aggregates them.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.cache import catalog_cache
+
+Labels = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Requests that matched no route share one label value
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in values)
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+http_requests = Counter("http_requests_total", "HTTP requests by route and status code")
+http_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", LATENCY_BUCKETS
+)
+db_queries = Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", QUERY_COUNT_BUCKETS
+)
+db_time = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per HTTP request", LATENCY_BUCKETS
+)
+db_statements = Histogram(
+    "db_statement_duration_seconds", "Duration of single SQL statements", LATENCY_BUCKETS
+)
+pool_wait = Histogram(
+    "db_pool_checkout_wait_seconds", "Time waiting for a pooled connection", POOL_WAIT_BUCKETS
+)
+
+
+@dataclass
+class RequestStats:
+    """SQL work done while serving one request"""
+    scope: Optional[dict] = None
+    queries: int = 0
+    db_seconds: float = 0.0
+
+    @property
+    def route(self) -> str:
+        """``METHOD /route/template`` once routed"""
+        return f"{self.scope['method']} {_route_label(self.scope)}" if self.scope else UNMATCHED_ROUTE
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and SQL work per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = (("method", scope["method"]), ("route", _route_label(scope)))
+            http_requests.inc(route + (("status", str(status_code)),))
+            http_latency.observe(elapsed, route)
+            db_queries.observe(stats.queries, route)
+            db_time.observe(stats.db_seconds, route)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own context so failed statements leave nothing behind
+    context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.metrics_started
+    db_statements.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement run on ``engine`` (pass ``sync_engine`` for async engines)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection.
+
+    The wait includes opening a new connection when the pool has none idle.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.observe(time.perf_counter() - started)
+
+
+def _samples(
+    name: str, kind: str, help_text: str, samples: Iterable[Tuple[Labels, float]]
+) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return lines
+
+
+def render_metrics(engine: Engine) -> str:
+    """Every metric of this process in the Prometheus text exposition format"""
+    lines: List[str] = []
+    for metric in (http_requests, http_latency, db_queries, db_time, db_statements, pool_wait):
+        lines.extend(metric.render())
+
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        lines.extend(_samples("db_pool_size", "gauge", "Configured pool size", [((), pool.size())]))
+        lines.extend(_samples("db_pool_checked_out", "gauge", "Connections in use", [((), pool.checkedout())]))
+        lines.extend(_samples("db_pool_overflow", "gauge", "Connections beyond pool_size", [((), max(pool.overflow(), 0))]))
+
+    stats = sorted(catalog_cache.stats().items())
+    lines.extend(_samples(
+        "catalog_cache_hits_total", "counter", "Catalog cache hits",
+        [((("namespace", namespace),), counters.hits) for namespace, counters in stats]
+    ))
+    lines.extend(_samples(
+        "catalog_cache_misses_total", "counter", "Catalog cache misses",
+        [((("namespace", namespace),), counters.misses) for namespace, counters in stats]
+    ))
+    return "\n".join(lines) + "\n"
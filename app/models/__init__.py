@@ -8,6 +8,9 @@ from .seccion import Seccion
 from .matricula import Matricula
 from .pago import Pago
 from .calificacion import Calificacion
+from .estadistica import mv_estadisticas_matricula
+from .historial import HistorialAcademico
+from . import busqueda  # registers the search indexes
 
 __all__ = [
     "Estudiante",
@@ -20,4 +23,6 @@ __all__ = [
     "Matricula",
     "Pago",
     "Calificacion",
+    "mv_estadisticas_matricula",
+    "HistorialAcademico",
 ]
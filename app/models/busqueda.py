@@ -0,0 +1,75 @@
+"""Search indexes of estudiante and profesor (PostgreSQL only).
+
+Names, DNI and email are matched in a normalized form: lower case with the
+Spanish accents folded (``translate``, which needs no extension and, unlike
+``unaccent``, can be used in an index). Two kinds of index serve it:
+
+* b-tree indexes in the "C" collation for prefixes of "nombre apellido", of
+  apellido alone, of the DNI and of the email (autocomplete); unlike
+  ``text_pattern_ops`` they also return the matches in order, so a search
+  can stop early;
+* a trigram GIN index over the whole document for infix and fuzzy matches,
+  created only where the ``pg_trgm`` extension can be installed.
+"""
+from typing import Tuple
+
+from sqlalchemy import DDL, event
+from sqlmodel import SQLModel
+
+ACCENTED = "ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç"
+PLAIN = "aaaaeeeeiiiioooouuuuncaaaaeeeeiiiioooouuuunc"
+
+# Searchable texts, as the columns (common to both tables) joined with spaces
+FULL_NAME = ("nombre", "apellido")
+SURNAME = ("apellido",)
+EMAIL = ("email",)
+DOCUMENT = ("nombre", "apellido", "dni", "email")
+
+SEARCHABLE_TABLES = ("estudiante", "profesor")
+
+
+def normalized_sql(columns: Tuple[str, ...]) -> str:
+    """SQL of ``columns`` joined, lower-cased and without accents"""
+    joined = " || ' ' || ".join(columns)
+    return f"translate(lower({joined}), '{ACCENTED}', '{PLAIN}')"
+
+
+def prefix_sql(columns: Tuple[str, ...]) -> str:
+    """``normalized_sql`` in the collation of the prefix indexes"""
+    return f'({normalized_sql(columns)}) COLLATE "C"'
+
+
+CREATE_PG_TRGM = """
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'pg_trgm is not available, search falls back to prefix matching';
+END
+$$
+"""
+
+
+def _index_statements(table: str):
+    yield f"CREATE INDEX IF NOT EXISTS idx_{table}_nombre_completo ON {table} (({prefix_sql(FULL_NAME)}))"
+    yield f"CREATE INDEX IF NOT EXISTS idx_{table}_apellido_prefijo ON {table} (({prefix_sql(SURNAME)}))"
+    yield f'CREATE INDEX IF NOT EXISTS idx_{table}_dni_prefijo ON {table} ((dni COLLATE "C"))'
+    yield f"CREATE INDEX IF NOT EXISTS idx_{table}_email_prefijo ON {table} (({prefix_sql(EMAIL)}))"
+    yield f"""
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        CREATE INDEX IF NOT EXISTS idx_{table}_busqueda
+            ON {table} USING gin (({normalized_sql(DOCUMENT)}) gin_trgm_ops);
+    END IF;
+END
+$$
+"""
+
+
+for _statement in (CREATE_PG_TRGM, *(s for t in SEARCHABLE_TABLES for s in _index_statements(t))):
+    event.listen(
+        SQLModel.metadata,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql")
+    )
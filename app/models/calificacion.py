@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from sqlmodel import Field, SQLModel
 
+from app.models.matricula import MatriculaReadWithRelations
+
 
 class CalificacionBase(SQLModel):
     """Base model for Calificacion"""
@@ -15,6 +17,9 @@ class Calificacion(CalificacionBase, table=True):
     """Calificacion table model"""
     calificacion_id: Optional[int] = Field(default=None, primary_key=True)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class CalificacionCreate(CalificacionBase):
@@ -32,3 +37,38 @@ class CalificacionRead(CalificacionBase):
     """Schema for reading a Calificacion"""
     calificacion_id: int
     fecha_registro: datetime
+    fecha_actualizacion: datetime
+
+
+class CalificacionReadWithRelations(CalificacionRead):
+    """Calificacion with the relations requested with ``include=``"""
+    matricula: Optional[MatriculaReadWithRelations] = None
+
+
+class NotaSeccionUpdate(SQLModel):
+    """Grade of one matricula in a seccion gradebook upload"""
+    matricula_id: int
+    nota: Optional[Decimal] = Field(default=None, ge=0, le=20, decimal_places=2)
+    observacion: Optional[str] = None
+
+
+class NotaSeccionRead(SQLModel):
+    """One roster line of a seccion gradebook"""
+    matricula_id: int
+    estudiante_id: int
+    apellido: str
+    nombre: str
+    dni: str
+    estado_matricula: str
+    calificacion_id: Optional[int] = None
+    nota: Optional[Decimal] = None
+    observacion: Optional[str] = None
+    fecha_actualizacion: Optional[datetime] = None
+
+
+class RegistroNotasRead(SQLModel):
+    """Roster of a seccion with the current calificacion of each matricula"""
+    seccion_id: int
+    codigo: str
+    periodo_academico: str
+    estudiantes: List[NotaSeccionRead]
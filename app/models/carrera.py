@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -15,8 +16,15 @@ class CarreraBase(SQLModel):
 
 class Carrera(CarreraBase, table=True):
     """Carrera table model"""
+    __table_args__ = (
+        Index("idx_carrera_facultad", "facultad_id"),
+    )
+
     carrera_id: Optional[int] = Field(default=None, primary_key=True)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class CarreraCreate(CarreraBase):
@@ -38,3 +46,4 @@ class CarreraRead(CarreraBase):
     """Schema for reading a Carrera"""
     carrera_id: int
     fecha_registro: datetime
+    fecha_actualizacion: datetime
@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -16,8 +17,16 @@ class CursoBase(SQLModel):
 
 class Curso(CursoBase, table=True):
     """Curso table model"""
+    __table_args__ = (
+        Index("idx_curso_carrera", "carrera_id", "nivel_semestre"),
+        Index("idx_curso_nombre", "nombre"),
+    )
+
     curso_id: Optional[int] = Field(default=None, primary_key=True)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class CursoCreate(CursoBase):
@@ -40,3 +49,4 @@ class CursoRead(CursoBase):
     """Schema for reading a Curso"""
     curso_id: int
     fecha_registro: datetime
+    fecha_actualizacion: datetime
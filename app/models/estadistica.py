@@ -0,0 +1,109 @@
+from decimal import Decimal
+from enum import Enum
+from typing import List, Optional
+from sqlalchemy import DDL, column, event, table
+from sqlmodel import SQLModel
+
+
+class NivelEstadistica(str, Enum):
+    """Aggregation level of a row in mv_estadisticas_matricula"""
+    PERIODO = "PERIODO"
+    FACULTAD = "FACULTAD"
+    CARRERA = "CARRERA"
+
+
+class EstadisticaMatriculaRead(SQLModel):
+    """Schema for reading enrollment statistics"""
+    nivel: NivelEstadistica
+    periodo_academico: str
+    facultad_id: Optional[int] = None
+    facultad: Optional[str] = None
+    carrera_id: Optional[int] = None
+    carrera: Optional[str] = None
+    total_estudiantes: int
+    total_matriculas: int
+    ingresos_totales: Optional[Decimal] = None
+
+
+class PromedioEstudianteRead(SQLModel):
+    """Credit-weighted average and ranking of one estudiante"""
+    posicion: int
+    estudiante_id: int
+    promedio_ponderado: float
+    creditos: int
+    creditos_aprobados: int
+    # Share of the ranked estudiantes with a lower promedio, 0-100
+    percentil: float
+
+
+class RankingRead(SQLModel):
+    """Estudiantes of a carrera and/or periodo ordered by weighted average"""
+    carrera_id: Optional[int] = None
+    periodo_academico: Optional[str] = None
+    total_estudiantes: int
+    promedio_general: Optional[float] = None
+    p25: Optional[float] = None
+    p50: Optional[float] = None
+    p75: Optional[float] = None
+    p90: Optional[float] = None
+    estudiantes: List[PromedioEstudianteRead]
+
+
+# Materialized summary of v_estadisticas_matricula at three levels (periodo,
+# facultad, carrera), so reads cost O(groups) instead of a five-table join.
+# The unique index is required by REFRESH MATERIALIZED VIEW CONCURRENTLY.
+mv_estadisticas_matricula = table(
+    "mv_estadisticas_matricula",
+    column("nivel"),
+    column("periodo_academico"),
+    column("grupo_id"),
+    column("facultad_id"),
+    column("facultad"),
+    column("carrera_id"),
+    column("carrera"),
+    column("total_estudiantes"),
+    column("total_matriculas"),
+    column("ingresos_totales"),
+)
+
+CREATE_MV_ESTADISTICAS_MATRICULA = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_estadisticas_matricula AS
+SELECT
+    CASE
+        WHEN GROUPING(f.facultad_id) = 1 THEN 'PERIODO'
+        WHEN GROUPING(ca.carrera_id) = 1 THEN 'FACULTAD'
+        ELSE 'CARRERA'
+    END AS nivel,
+    s.periodo_academico,
+    COALESCE(ca.carrera_id, f.facultad_id, 0) AS grupo_id,
+    f.facultad_id,
+    f.nombre AS facultad,
+    ca.carrera_id,
+    ca.nombre AS carrera,
+    COUNT(DISTINCT m.estudiante_id) AS total_estudiantes,
+    COUNT(m.matricula_id) AS total_matriculas,
+    SUM(m.costo) AS ingresos_totales
+FROM
+    matricula m
+    JOIN seccion s ON m.seccion_id = s.seccion_id
+    JOIN curso c ON s.curso_id = c.curso_id
+    JOIN carrera ca ON c.carrera_id = ca.carrera_id
+    JOIN facultad f ON ca.facultad_id = f.facultad_id
+GROUP BY GROUPING SETS (
+    (s.periodo_academico),
+    (s.periodo_academico, f.facultad_id, f.nombre),
+    (s.periodo_academico, f.facultad_id, f.nombre, ca.carrera_id, ca.nombre)
+)
+"""
+
+CREATE_UK_MV_ESTADISTICAS_MATRICULA = """
+CREATE UNIQUE INDEX IF NOT EXISTS uk_mv_estadisticas_matricula
+    ON mv_estadisticas_matricula (nivel, periodo_academico, grupo_id)
+"""
+
+for _statement in (CREATE_MV_ESTADISTICAS_MATRICULA, CREATE_UK_MV_ESTADISTICAS_MATRICULA):
+    event.listen(
+        SQLModel.metadata,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql")
+    )
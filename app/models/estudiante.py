@@ -1,5 +1,6 @@
 from datetime import datetime, date
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -17,8 +18,20 @@ class EstudianteBase(SQLModel):
 
 class Estudiante(EstudianteBase, table=True):
     """Estudiante table model"""
+    __table_args__ = (
+        Index("idx_estudiante_apellido", "apellido"),
+        # Covers ?sort=apellido&fields=... with id, nombre and apellido (index-only scan)
+        Index(
+            "idx_estudiante_directorio", "apellido", "estudiante_id",
+            postgresql_include=["nombre", "fecha_actualizacion"]
+        ),
+    )
+
     estudiante_id: Optional[int] = Field(default=None, primary_key=True)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class EstudianteCreate(EstudianteBase):
@@ -42,3 +55,4 @@ class EstudianteRead(EstudianteBase):
     """Schema for reading an Estudiante"""
     estudiante_id: int
     fecha_registro: datetime
+    fecha_actualizacion: datetime
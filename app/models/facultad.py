@@ -16,6 +16,9 @@ class Facultad(FacultadBase, table=True):
     """Facultad table model"""
     facultad_id: Optional[int] = Field(default=None, primary_key=True)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class FacultadCreate(FacultadBase):
@@ -36,3 +39,4 @@ class FacultadRead(FacultadBase):
     """Schema for reading a Facultad"""
     facultad_id: int
     fecha_registro: datetime
+    fecha_actualizacion: datetime
@@ -0,0 +1,56 @@
+from decimal import Decimal
+from typing import List, Optional
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class HistorialAcademico(SQLModel, table=True):
+    """Precomputed transcript line, one per matricula.
+
+    Denormalized copy of v_historial_academico maintained by
+    app.services.transcripts, so a transcript is a single index range scan.
+    """
+    __tablename__ = "historial_academico"
+    __table_args__ = (
+        Index("idx_historial_estudiante", "estudiante_id", "periodo_academico", "codigo_curso"),
+        Index("idx_historial_seccion", "seccion_id"),
+        Index("idx_historial_curso", "curso_id"),
+    )
+
+    matricula_id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    estudiante_id: int
+    seccion_id: int
+    curso_id: int
+    carrera_id: int
+    codigo_curso: str = Field(max_length=20)
+    nombre_curso: str = Field(max_length=100)
+    creditos: int
+    nivel_semestre: int
+    carrera: str = Field(max_length=100)
+    periodo_academico: str = Field(max_length=20)
+    estado_matricula: str = Field(max_length=20)
+    nota: Optional[Decimal] = Field(default=None, decimal_places=2)
+    estado: str = Field(max_length=20)
+
+
+class HistorialCursoRead(SQLModel):
+    """A curso in a student's transcript"""
+    matricula_id: int
+    codigo_curso: str
+    nombre_curso: str
+    creditos: int
+    nivel_semestre: int
+    carrera: str
+    periodo_academico: str
+    estado_matricula: str
+    nota: Optional[Decimal] = None
+    estado: str
+
+
+class HistorialAcademicoRead(SQLModel):
+    """Schema for reading a student's academic history (kardex)"""
+    estudiante_id: int
+    estudiante: str
+    dni: str
+    creditos_aprobados: int
+    cursos: List[HistorialCursoRead]
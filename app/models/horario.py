@@ -0,0 +1,27 @@
+from enum import Enum
+from typing import List, Optional
+from sqlmodel import SQLModel
+
+
+class TipoConflicto(str, Enum):
+    """Resource booked twice at the same time"""
+    AULA = "AULA"
+    PROFESOR = "PROFESOR"
+    ESTUDIANTE = "ESTUDIANTE"
+
+
+class ConflictoHorario(SQLModel):
+    """Two secciones of a periodo whose timetables overlap on one resource"""
+    tipo: TipoConflicto
+    recurso: str
+    # None for a seccion that is being created
+    seccion_id: Optional[int]
+    seccion_conflicto_id: int
+
+
+class ReporteConflictos(SQLModel):
+    """Every timetable clash of a periodo"""
+    periodo_academico: str
+    conflictos: List[ConflictoHorario]
+    # Secciones whose horario/dias could not be parsed, hence not checked
+    sin_horario_valido: List[int]
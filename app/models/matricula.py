@@ -1,8 +1,12 @@
 from datetime import datetime, date
 from typing import Optional
 from decimal import Decimal
+from sqlalchemy import Index, UniqueConstraint
 from sqlmodel import Field, SQLModel
 
+from app.models.estudiante import EstudianteRead
+from app.models.seccion import SeccionReadWithRelations
+
 
 class MatriculaBase(SQLModel):
     """Base model for Matricula"""
@@ -16,8 +20,20 @@ class MatriculaBase(SQLModel):
 
 class Matricula(MatriculaBase, table=True):
     """Matricula table model"""
+    __table_args__ = (
+        Index("idx_matricula_seccion", "seccion_id"),
+        Index("idx_matricula_estado", "estado"),
+        Index("idx_matricula_fecha", "fecha_matricula"),
+        UniqueConstraint("estudiante_id", "seccion_id", name="uk_matricula_seccion"),
+    )
+
     matricula_id: Optional[int] = Field(default=None, primary_key=True)
+    # Sum of the PROCESADO pagos, maintained by app.services.payments
+    monto_pagado: Decimal = Field(default=Decimal("0"), decimal_places=2)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class MatriculaCreate(MatriculaBase):
@@ -35,4 +51,12 @@ class MatriculaUpdate(SQLModel):
 class MatriculaRead(MatriculaBase):
     """Schema for reading a Matricula"""
     matricula_id: int
+    monto_pagado: Decimal
     fecha_registro: datetime
+    fecha_actualizacion: datetime
+
+
+class MatriculaReadWithRelations(MatriculaRead):
+    """Matricula with the relations requested with ``include=``"""
+    estudiante: Optional[EstudianteRead] = None
+    seccion: Optional[SeccionReadWithRelations] = None
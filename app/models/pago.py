@@ -1,8 +1,11 @@
 from datetime import datetime, date
 from typing import Optional
 from decimal import Decimal
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
+from app.models.matricula import MatriculaReadWithRelations
+
 
 class PagoBase(SQLModel):
     """Base model for Pago"""
@@ -10,14 +13,24 @@ class PagoBase(SQLModel):
     fecha_pago: date = Field(default_factory=date.today)
     monto: Decimal = Field(gt=0, decimal_places=2)
     metodo_pago: str = Field(max_length=50)
-    referencia: Optional[str] = Field(default=None, max_length=100)
+    # Gateway reference; also the idempotency key of POST /pagos
+    referencia: Optional[str] = Field(default=None, max_length=100, unique=True)
     estado: str = Field(default="PROCESADO", max_length=20)
 
 
 class Pago(PagoBase, table=True):
     """Pago table model"""
+    __table_args__ = (
+        Index("idx_pago_matricula", "matricula_id"),
+        Index("idx_pago_estado", "estado"),
+        Index("idx_pago_fecha", "fecha_pago"),
+    )
+
     pago_id: Optional[int] = Field(default=None, primary_key=True)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class PagoCreate(PagoBase):
@@ -35,3 +48,9 @@ class PagoRead(PagoBase):
     """Schema for reading a Pago"""
     pago_id: int
     fecha_registro: datetime
+    fecha_actualizacion: datetime
+
+
+class PagoReadWithRelations(PagoRead):
+    """Pago with the relations requested with ``include=``"""
+    matricula: Optional[MatriculaReadWithRelations] = None
@@ -1,5 +1,6 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from sqlalchemy import CheckConstraint, Index, UniqueConstraint
 from sqlmodel import Field, SQLModel
 
 
@@ -11,8 +12,17 @@ class PrerequisitoBase(SQLModel):
 
 class Prerrequisito(PrerequisitoBase, table=True):
     """Prerrequisito table model"""
+    __table_args__ = (
+        UniqueConstraint("curso_id", "curso_req_id", name="uk_prerrequisito"),
+        CheckConstraint("curso_id != curso_req_id", name="ck_curso_diferente"),
+        Index("idx_prerrequisito_requerido", "curso_req_id"),
+    )
+
     prerrequisito_id: Optional[int] = Field(default=None, primary_key=True)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class PrerequisitoCreate(PrerequisitoBase):
@@ -24,3 +34,12 @@ class PrerequisitoRead(PrerequisitoBase):
     """Schema for reading a Prerrequisito"""
     prerrequisito_id: int
     fecha_registro: datetime
+    fecha_actualizacion: datetime
+
+
+class PrerrequisitosCurso(SQLModel):
+    """Prerequisites of a Curso, optionally checked against an Estudiante"""
+    curso_id: int
+    directos: List[int]
+    todos: List[int]
+    faltantes: Optional[List[int]] = None
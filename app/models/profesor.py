@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -17,8 +18,20 @@ class ProfesorBase(SQLModel):
 
 class Profesor(ProfesorBase, table=True):
     """Profesor table model"""
+    __table_args__ = (
+        Index("idx_profesor_apellido", "apellido"),
+        # Covers ?sort=apellido&fields=... with id, nombre and apellido (index-only scan)
+        Index(
+            "idx_profesor_directorio", "apellido", "profesor_id",
+            postgresql_include=["nombre", "fecha_actualizacion"]
+        ),
+    )
+
     profesor_id: Optional[int] = Field(default=None, primary_key=True)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class ProfesorCreate(ProfesorBase):
@@ -42,3 +55,4 @@ class ProfesorRead(ProfesorBase):
     """Schema for reading a Profesor"""
     profesor_id: int
     fecha_registro: datetime
+    fecha_actualizacion: datetime
@@ -1,7 +1,11 @@
 from datetime import datetime, date
 from typing import Optional
+from sqlalchemy import CheckConstraint, Index, UniqueConstraint
 from sqlmodel import Field, SQLModel
 
+from app.models.curso import CursoRead
+from app.models.profesor import ProfesorRead
+
 
 class SeccionBase(SQLModel):
     """Base model for Seccion"""
@@ -20,8 +24,23 @@ class SeccionBase(SQLModel):
 
 class Seccion(SeccionBase, table=True):
     """Seccion table model"""
+    __table_args__ = (
+        Index("idx_seccion_profesor", "profesor_id"),
+        Index("idx_seccion_periodo", "periodo_academico"),
+        UniqueConstraint("curso_id", "codigo", "periodo_academico", name="uk_seccion_periodo"),
+        CheckConstraint(
+            "matriculados >= 0 AND matriculados <= capacidad_maxima",
+            name="ck_matriculados"
+        ),
+    )
+
     seccion_id: Optional[int] = Field(default=None, primary_key=True)
+    # Seats taken by non-ANULADO matriculas, maintained by app.services.enrollment
+    matriculados: int = Field(default=0)
     fecha_registro: datetime = Field(default_factory=datetime.now)
+    fecha_actualizacion: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
 
 
 class SeccionCreate(SeccionBase):
@@ -47,4 +66,12 @@ class SeccionUpdate(SQLModel):
 class SeccionRead(SeccionBase):
     """Schema for reading a Seccion"""
     seccion_id: int
+    matriculados: int
     fecha_registro: datetime
+    fecha_actualizacion: datetime
+
+
+class SeccionReadWithRelations(SeccionRead):
+    """Seccion with the relations requested with ``include=``"""
+    curso: Optional[CursoRead] = None
+    profesor: Optional[ProfesorRead] = None
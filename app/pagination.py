@@ -0,0 +1,152 @@
+"""Offset and keyset (cursor) pagination shared by the list endpoints"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import and_, or_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+from sqlmodel import Session
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PaginationParams:
+    """Query parameters accepted by every list endpoint.
+
+    ``skip``/``limit`` keep the original offset behaviour. Passing the
+    ``X-Next-Cursor`` value of a previous response as ``cursor`` switches to
+    keyset pagination, which seeks directly to the next row instead of
+    scanning and discarding the ``skip`` rows before it.
+    """
+
+    def __init__(
+        self,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=0),
+        cursor: Optional[str] = Query(
+            None, description="Opaque cursor taken from the X-Next-Cursor header"
+        ),
+    ):
+        self.skip = skip
+        self.limit = limit
+        self.cursor = cursor
+
+
+@dataclass
+class Page:
+    """A page of results plus the cursor pointing at the following page"""
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+    def apply(self, response: Response) -> List[Any]:
+        """Expose the next cursor as a response header and return the items"""
+        if self.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = self.next_cursor
+        return self.items
+
+
+def split_key(key) -> Tuple[Any, bool]:
+    """Return ``(column, descending)`` for a plain or ``desc()`` sort key"""
+    if isinstance(key, UnaryExpression) and key.modifier is operators.desc_op:
+        return key.element, True
+    return key, False
+
+
+def _to_json(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(column, value):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        # Types without a Python counterpart (sqlmodel's AutoString) travel as JSON strings
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key values of the last row into an opaque cursor"""
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """Decode a cursor produced by ``encode_cursor`` for the given sort columns"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort order")
+        return [_from_json(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def _keyset_after(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]):
+    """Build ``(k1, k2, ...) > (v1, v2, ...)`` honouring each key's direction"""
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        prefix = [keys[j][0] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*prefix, step))
+    return or_(*clauses)
+
+
+def page_statement(statement, pagination: PaginationParams, *order_by):
+    """Apply ordering and the offset or keyset window to ``statement``.
+
+    The last entry of ``order_by`` must be unique (normally the primary key)
+    so that the keyset is a total order. One extra row is requested to know
+    whether a following page exists.
+    """
+    keys = [split_key(key) for key in order_by]
+    statement = statement.order_by(*order_by)
+    if pagination.cursor:
+        values = decode_cursor(pagination.cursor, [column for column, _ in keys])
+        statement = statement.where(_keyset_after(keys, values))
+    else:
+        statement = statement.offset(pagination.skip)
+    return statement.limit(pagination.limit + 1)
+
+
+def make_page(rows: Sequence[Any], pagination: PaginationParams, *order_by) -> Page:
+    """Trim the extra row fetched by ``page_statement`` into a cursor"""
+    if len(rows) <= pagination.limit or pagination.limit == 0:
+        return Page(items=list(rows[:pagination.limit]))
+
+    items = list(rows[:pagination.limit])
+    columns = [split_key(key)[0] for key in order_by]
+    next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return Page(items=items, next_cursor=next_cursor)
+
+
+def paginate(session: Session, statement, pagination: PaginationParams, *order_by) -> Page:
+    """Run ``statement`` ordered by ``order_by`` and return one page of rows"""
+    rows = session.exec(page_statement(statement, pagination, *order_by)).all()
+    return make_page(rows, pagination, *order_by)
+
+
+def paginate_rows(session: Session, statement, pagination: PaginationParams, *order_by) -> Page:
+    """Like ``paginate`` for column selects: the items are ``Row`` tuples"""
+    rows = session.execute(page_statement(statement, pagination, *order_by)).all()
+    return make_page(rows, pagination, *order_by)
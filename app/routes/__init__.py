@@ -3,10 +3,13 @@ from .profesor import router as profesor_router
 from .facultad import router as facultad_router
 from .carrera import router as carrera_router
 from .curso import router as curso_router
+from .prerrequisito import router as prerrequisito_router
 from .seccion import router as seccion_router
 from .matricula import router as matricula_router
 from .pago import router as pago_router
 from .calificacion import router as calificacion_router
+from .importacion import router as importacion_router
+from .estadistica import router as estadistica_router
 
 __all__ = [
     "estudiante_router",
@@ -14,8 +17,11 @@ __all__ = [
     "facultad_router",
     "carrera_router",
     "curso_router",
+    "prerrequisito_router",
     "seccion_router",
     "matricula_router",
     "pago_router",
     "calificacion_router",
+    "importacion_router",
+    "estadistica_router",
 ]
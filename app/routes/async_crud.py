@@ -0,0 +1,200 @@
+"""Async variants of the CRUD routes, enabled with ``USE_ASYNC_DB``.
+
+The handlers run on the event loop against an asyncpg engine instead of
+holding a threadpool worker while Postgres answers. ``install_async_routes``
+swaps them into the existing routers in place, so route order and the
+resource-specific endpoints (bulk, export, ...) are untouched.
+"""
+import re
+from typing import Collection, List, Optional, Type
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status
+from fastapi.routing import APIRoute
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.conditional import VERSION_COLUMN, Validators, conditional_page, page_columns
+from app.crud import delete_statement, insert_statement, update_statement
+from app.database import get_async_session
+from app.fields import Fields
+from app.filters import (
+    CalificacionFilters,
+    EstudianteFilters,
+    ListFilters,
+    MatriculaFilters,
+    PagoFilters,
+    ProfesorFilters,
+)
+from app.includes import CalificacionIncludes, Includes, MatriculaIncludes, PagoIncludes
+from app.models.calificacion import Calificacion, CalificacionCreate, CalificacionRead, CalificacionUpdate
+from app.models.estudiante import Estudiante, EstudianteCreate, EstudianteRead, EstudianteUpdate
+from app.models.matricula import Matricula, MatriculaCreate, MatriculaRead, MatriculaUpdate
+from app.models.pago import Pago, PagoCreate, PagoRead, PagoUpdate
+from app.models.profesor import Profesor, ProfesorCreate, ProfesorRead, ProfesorUpdate
+from app.pagination import Page, PaginationParams, make_page, page_statement
+from app.responses import json_response
+from app.routes.calificacion import router as calificacion_router
+from app.routes.estudiante import router as estudiante_router
+from app.routes.matricula import router as matricula_router
+from app.routes.pago import router as pago_router
+from app.routes.profesor import router as profesor_router
+
+
+CRUD_OPERATIONS = ("create", "list", "get", "update", "delete")
+READ_OPERATIONS = ("list", "get")
+
+
+def _no_includes() -> None:
+    return None
+
+
+def build_async_crud_router(
+    model: Type[SQLModel],
+    create_model: Type[SQLModel],
+    read_model: Type[SQLModel],
+    update_model: Type[SQLModel],
+    plural: str,
+    filters_model: Type[ListFilters],
+    includes_model: Optional[Type[Includes]] = None,
+    operations: Collection[str] = CRUD_OPERATIONS,
+) -> APIRouter:
+    """Build async routes for ``model``, limited to ``operations``
+
+    ``includes_model`` adds ``include=`` to the list route.
+    """
+    name = model.__tablename__
+    label = model.__name__
+    pk_name = model.__table__.primary_key.columns.keys()[0]
+    item_path = f"/{{{pk_name}}}"
+    router = APIRouter(prefix=f"/{plural}", tags=[plural])
+    fields_model = type(f"{label}Fields", (Fields,), {"read_model": read_model})
+
+    def or_404(item):
+        if not item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{label} not found"
+            )
+        return item
+
+    async def get_or_404(session: AsyncSession, item_id: int):
+        return or_404(await session.get(model, item_id))
+
+    def route(operation: str, decorator):
+        return decorator if operation in operations else (lambda endpoint: endpoint)
+
+    @route("create", router.post("/", response_model=read_model,
+                                 status_code=status.HTTP_201_CREATED, name=f"create_{name}"))
+    async def create_item(
+        item: create_model,
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        row = (await session.execute(insert_statement(model, read_model, item))).one()
+        await session.commit()
+        return read_model.model_validate(row._mapping)
+
+    list_model = includes_model.read_model if includes_model else read_model
+
+    @route("list", router.get("/", response_model=List[list_model], name=f"get_{plural}"))
+    async def list_items(
+        request: Request,
+        response: Response,
+        pagination: PaginationParams = Depends(),
+        filters: filters_model = Depends(),
+        includes: Optional[Includes] = Depends(includes_model or _no_includes),
+        fields: fields_model = Depends(),
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        order_by = filters.order_by()
+        statement = page_columns(
+            filters.apply(select(model)), read_model, *order_by, includes=includes, fields=fields
+        )
+        rows = (await session.execute(page_statement(statement, pagination, *order_by))).all()
+        page = make_page(rows, pagination, *order_by)
+        if includes:
+            page = Page(items=await includes.expand_async(session, page.items), next_cursor=page.next_cursor)
+        return conditional_page(request, response, lambda: page, pk_name, fields=fields)
+
+    @route("get", router.get(item_path, response_model=read_model, name=f"get_{name}"))
+    async def get_item(
+        request: Request,
+        response: Response,
+        item_id: int = Path(alias=pk_name),
+        fields: fields_model = Depends(),
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        if fields:
+            pk = getattr(model, pk_name)
+            item = or_404((await session.execute(
+                select(*fields.columns(model, VERSION_COLUMN)).where(pk == item_id)
+            )).first())
+        else:
+            item = await get_or_404(session, item_id)
+        validators = Validators.for_item(request, item.fecha_actualizacion)
+        if validators.matches(request):
+            return validators.not_modified()
+        validators.apply(response)
+        return json_response(request, response, fields.project(item)) if fields else item
+
+    @route("update", router.patch(item_path, response_model=read_model, name=f"update_{name}"))
+    async def update_item(
+        item_update: update_model,
+        item_id: int = Path(alias=pk_name),
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        row = or_404((await session.execute(
+            update_statement(model, read_model, item_id, item_update.model_dump(exclude_unset=True))
+        )).first())
+        await session.commit()
+        return read_model.model_validate(row._mapping)
+
+    @route("delete", router.delete(item_path, status_code=status.HTTP_204_NO_CONTENT,
+                                   name=f"delete_{name}"))
+    async def delete_item(
+        item_id: int = Path(alias=pk_name),
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        or_404((await session.execute(delete_statement(model, item_id))).first())
+        await session.commit()
+        return None
+
+    return router
+
+
+def _route_key(route: APIRoute):
+    return re.sub(r"{[^}]+}", "{}", route.path), frozenset(route.methods)
+
+
+def install_async_routes(router: APIRouter, async_router: APIRouter):
+    """Replace the routes of ``router`` that ``async_router`` also serves"""
+    replacements = {
+        _route_key(route): route
+        for route in async_router.routes
+        if isinstance(route, APIRoute)
+    }
+    router.routes[:] = [
+        replacements.get(_route_key(route), route) if isinstance(route, APIRoute) else route
+        for route in router.routes
+    ]
+
+
+# Resources whose writes carry business rules keep their sync write routes.
+# The catalog (facultades, carreras, cursos, secciones) is served from
+# app.cache by the sync routes and is not listed here.
+ASYNC_CRUD = [
+    (estudiante_router, Estudiante, EstudianteCreate, EstudianteRead, EstudianteUpdate, "estudiantes",
+     EstudianteFilters),
+    (profesor_router, Profesor, ProfesorCreate, ProfesorRead, ProfesorUpdate, "profesores",
+     ProfesorFilters),
+    (matricula_router, Matricula, MatriculaCreate, MatriculaRead, MatriculaUpdate, "matriculas",
+     MatriculaFilters, MatriculaIncludes, READ_OPERATIONS),
+    (pago_router, Pago, PagoCreate, PagoRead, PagoUpdate, "pagos", PagoFilters, PagoIncludes, READ_OPERATIONS),
+    (calificacion_router, Calificacion, CalificacionCreate, CalificacionRead, CalificacionUpdate, "calificaciones",
+     CalificacionFilters, CalificacionIncludes, READ_OPERATIONS),
+]
+
+
+def enable_async_crud():
+    """Swap every router's CRUD routes for their async variants"""
+    for router, *spec in ASYNC_CRUD:
+        install_async_routes(router, build_async_crud_router(*spec))
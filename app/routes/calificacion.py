@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 
+from app.bulk import BulkResult, finish_bulk, insert_rows
+from app.conditional import conditional_get, conditional_paginate
+from app.crud import create_row, delete_row, update_row
 from app.database import get_session
+from app.export import ExportFormat, stream_export
+from app.fields import CalificacionFields
+from app.filters import CalificacionFilters
+from app.includes import CalificacionIncludes
 from app.models.calificacion import (
     Calificacion,
     CalificacionCreate,
     CalificacionRead,
+    CalificacionReadWithRelations,
     CalificacionUpdate
 )
+from app.models.matricula import Matricula
+from app.models.seccion import Seccion
+from app.pagination import PaginationParams
+from app.services.transcripts import refresh_matriculas
 
 router = APIRouter(prefix="/calificaciones", tags=["calificaciones"])
 
@@ -19,33 +31,75 @@ def create_calificacion(
     session: Session = Depends(get_session)
 ):
     """Create a new calificacion"""
-    db_calificacion = Calificacion.model_validate(calificacion)
-    session.add(db_calificacion)
+    db_calificacion = create_row(session, Calificacion, CalificacionRead, calificacion)
+    refresh_matriculas(session, [db_calificacion.matricula_id])
     session.commit()
-    session.refresh(db_calificacion)
     return db_calificacion
 
 
-@router.get("/", response_model=List[CalificacionRead])
+@router.post("/bulk", response_model=BulkResult[CalificacionRead], status_code=status.HTTP_201_CREATED)
+def create_calificaciones_bulk(
+    calificaciones: List[CalificacionCreate],
+    atomic: bool = True,
+    session: Session = Depends(get_session)
+):
+    """Create many calificaciones in a single transaction
+
+    With ``atomic=false`` valid items are kept and failures are reported per item.
+    """
+    if not calificaciones:
+        return BulkResult()
+    created, errors = insert_rows(session, Calificacion, CalificacionRead, calificaciones)
+    refresh_matriculas(session, [item.matricula_id for _, item in created])
+    return finish_bulk(session, created, errors, atomic)
+
+
+@router.get("/", response_model=List[CalificacionReadWithRelations])
 def get_calificaciones(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: CalificacionFilters = Depends(),
+    includes: CalificacionIncludes = Depends(),
+    fields: CalificacionFields = Depends(),
     session: Session = Depends(get_session)
 ):
-    """Get all calificaciones"""
-    calificaciones = session.exec(
-        select(Calificacion).offset(skip).limit(limit)
-    ).all()
-    return calificaciones
+    """Get calificaciones, optionally filtered, sorted and with their matricula"""
+    return conditional_paginate(
+        request, response, session, filters.apply(select(Calificacion)), pagination,
+        *filters.order_by(),
+        read_model=CalificacionRead,
+        includes=includes,
+        fields=fields
+    )
+
+
+@router.get("/export")
+def export_calificaciones(
+    fmt: ExportFormat = Query(ExportFormat.csv, alias="format"),
+    periodo_academico: Optional[str] = None
+):
+    """Stream calificaciones as CSV or NDJSON, optionally for one periodo_academico"""
+    statement = select(*Calificacion.__table__.columns).order_by(Calificacion.calificacion_id)
+    if periodo_academico:
+        statement = statement.join(
+            Matricula, Calificacion.matricula_id == Matricula.matricula_id
+        ).join(
+            Seccion, Matricula.seccion_id == Seccion.seccion_id
+        ).where(Seccion.periodo_academico == periodo_academico)
+    return stream_export(statement, fmt, "calificaciones")
 
 
 @router.get("/{calificacion_id}", response_model=CalificacionRead)
 def get_calificacion(
     calificacion_id: int,
+    request: Request,
+    response: Response,
+    fields: CalificacionFields = Depends(),
     session: Session = Depends(get_session)
 ):
     """Get a specific calificacion by ID"""
-    calificacion = session.get(Calificacion, calificacion_id)
+    calificacion = conditional_get(request, response, session, Calificacion, calificacion_id, fields=fields)
     if not calificacion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,20 +115,16 @@ def update_calificacion(
     session: Session = Depends(get_session)
 ):
     """Update a calificacion"""
-    db_calificacion = session.get(Calificacion, calificacion_id)
+    calificacion_data = calificacion_update.model_dump(exclude_unset=True)
+    db_calificacion = update_row(session, Calificacion, CalificacionRead, calificacion_id, calificacion_data)
     if not db_calificacion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Calificacion not found"
         )
 
-    calificacion_data = calificacion_update.model_dump(exclude_unset=True)
-    for key, value in calificacion_data.items():
-        setattr(db_calificacion, key, value)
-
-    session.add(db_calificacion)
+    refresh_matriculas(session, [db_calificacion.matricula_id])
     session.commit()
-    session.refresh(db_calificacion)
     return db_calificacion
 
 
@@ -84,13 +134,13 @@ def delete_calificacion(
     session: Session = Depends(get_session)
 ):
     """Delete a calificacion"""
-    calificacion = session.get(Calificacion, calificacion_id)
+    calificacion = delete_row(session, Calificacion, calificacion_id, Calificacion.matricula_id)
     if not calificacion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Calificacion not found"
         )
 
-    session.delete(calificacion)
+    refresh_matriculas(session, [calificacion.matricula_id])
     session.commit()
     return None
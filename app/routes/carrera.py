@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
 from typing import List
 
+from app.cache import catalog_cache
+from app.conditional import conditional_get, conditional_page
+from app.crud import create_row, delete_row, update_row
 from app.database import get_session
+from app.export import ExportFormat, stream_export
+from app.fields import CarreraFields
+from app.filters import CarreraFilters
 from app.models.carrera import (
     Carrera,
     CarreraCreate,
     CarreraRead,
     CarreraUpdate
 )
+from app.pagination import PaginationParams, paginate
+from app.services.transcripts import refresh_carrera
 
 router = APIRouter(prefix="/carreras", tags=["carreras"])
 
@@ -19,33 +27,60 @@ def create_carrera(
     session: Session = Depends(get_session)
 ):
     """Create a new carrera"""
-    db_carrera = Carrera.model_validate(carrera)
-    session.add(db_carrera)
+    db_carrera = create_row(session, Carrera, CarreraRead, carrera)
     session.commit()
-    session.refresh(db_carrera)
+    catalog_cache.invalidate("carrera")
     return db_carrera
 
 
 @router.get("/", response_model=List[CarreraRead])
 def get_carreras(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: CarreraFilters = Depends(),
+    fields: CarreraFields = Depends(),
     session: Session = Depends(get_session)
 ):
-    """Get all carreras"""
-    carreras = session.exec(
-        select(Carrera).offset(skip).limit(limit)
-    ).all()
-    return carreras
+    """Get carreras, optionally filtered and sorted"""
+    order_by = filters.order_by()
+    return conditional_page(
+        request, response,
+        lambda: catalog_cache.get_page(
+            "carrera", pagination, CarreraRead,
+            lambda: paginate(session, filters.apply(select(Carrera)), pagination, *order_by),
+            filters.cache_key()
+        ),
+        "carrera_id",
+        fields=fields
+    )
+
+
+@router.get("/export")
+def export_carreras(
+    fmt: ExportFormat = Query(ExportFormat.csv, alias="format")
+):
+    """Stream every carrera as CSV or NDJSON"""
+    statement = select(*Carrera.__table__.columns).order_by(Carrera.carrera_id)
+    return stream_export(statement, fmt, "carreras")
 
 
 @router.get("/{carrera_id}", response_model=CarreraRead)
 def get_carrera(
     carrera_id: int,
+    request: Request,
+    response: Response,
+    fields: CarreraFields = Depends(),
     session: Session = Depends(get_session)
 ):
     """Get a specific carrera by ID"""
-    carrera = session.get(Carrera, carrera_id)
+    carrera = conditional_get(
+        request, response, session, Carrera, carrera_id,
+        load=lambda: catalog_cache.get_item(
+            "carrera", carrera_id, CarreraRead, lambda: session.get(Carrera, carrera_id)
+        ),
+        fields=fields
+    )
     if not carrera:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,20 +96,17 @@ def update_carrera(
     session: Session = Depends(get_session)
 ):
     """Update a carrera"""
-    db_carrera = session.get(Carrera, carrera_id)
+    carrera_data = carrera_update.model_dump(exclude_unset=True)
+    db_carrera = update_row(session, Carrera, CarreraRead, carrera_id, carrera_data)
     if not db_carrera:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Carrera not found"
         )
 
-    carrera_data = carrera_update.model_dump(exclude_unset=True)
-    for key, value in carrera_data.items():
-        setattr(db_carrera, key, value)
-
-    session.add(db_carrera)
+    refresh_carrera(session, carrera_id, carrera_data.keys())
     session.commit()
-    session.refresh(db_carrera)
+    catalog_cache.invalidate("carrera", [carrera_id])
     return db_carrera
 
 
@@ -84,13 +116,12 @@ def delete_carrera(
     session: Session = Depends(get_session)
 ):
     """Delete a carrera"""
-    carrera = session.get(Carrera, carrera_id)
-    if not carrera:
+    if not delete_row(session, Carrera, carrera_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Carrera not found"
         )
 
-    session.delete(carrera)
     session.commit()
+    catalog_cache.invalidate("carrera", [carrera_id])
     return None
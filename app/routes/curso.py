@@ -1,14 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 
+from app.cache import catalog_cache
+from app.conditional import conditional_get, conditional_page
+from app.crud import create_row, delete_row, update_row
 from app.database import get_session
+from app.export import ExportFormat, stream_export
+from app.fields import CursoFields
+from app.filters import CursoFilters
 from app.models.curso import (
     Curso,
     CursoCreate,
     CursoRead,
     CursoUpdate
 )
+from app.models.prerrequisito import PrerrequisitosCurso
+from app.pagination import PaginationParams, paginate
+from app.services.prerequisites import missing_prerequisites, prerequisite_graph
+from app.services.transcripts import refresh_curso
 
 router = APIRouter(prefix="/cursos", tags=["cursos"])
 
@@ -19,33 +29,60 @@ def create_curso(
     session: Session = Depends(get_session)
 ):
     """Create a new curso"""
-    db_curso = Curso.model_validate(curso)
-    session.add(db_curso)
+    db_curso = create_row(session, Curso, CursoRead, curso)
     session.commit()
-    session.refresh(db_curso)
+    catalog_cache.invalidate("curso")
     return db_curso
 
 
 @router.get("/", response_model=List[CursoRead])
 def get_cursos(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: CursoFilters = Depends(),
+    fields: CursoFields = Depends(),
     session: Session = Depends(get_session)
 ):
-    """Get all cursos"""
-    cursos = session.exec(
-        select(Curso).offset(skip).limit(limit)
-    ).all()
-    return cursos
+    """Get cursos, optionally filtered and sorted"""
+    order_by = filters.order_by()
+    return conditional_page(
+        request, response,
+        lambda: catalog_cache.get_page(
+            "curso", pagination, CursoRead,
+            lambda: paginate(session, filters.apply(select(Curso)), pagination, *order_by),
+            filters.cache_key()
+        ),
+        "curso_id",
+        fields=fields
+    )
+
+
+@router.get("/export")
+def export_cursos(
+    fmt: ExportFormat = Query(ExportFormat.csv, alias="format")
+):
+    """Stream every curso as CSV or NDJSON"""
+    statement = select(*Curso.__table__.columns).order_by(Curso.curso_id)
+    return stream_export(statement, fmt, "cursos")
 
 
 @router.get("/{curso_id}", response_model=CursoRead)
 def get_curso(
     curso_id: int,
+    request: Request,
+    response: Response,
+    fields: CursoFields = Depends(),
     session: Session = Depends(get_session)
 ):
     """Get a specific curso by ID"""
-    curso = session.get(Curso, curso_id)
+    curso = conditional_get(
+        request, response, session, Curso, curso_id,
+        load=lambda: catalog_cache.get_item(
+            "curso", curso_id, CursoRead, lambda: session.get(Curso, curso_id)
+        ),
+        fields=fields
+    )
     if not curso:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,6 +91,32 @@ def get_curso(
     return curso
 
 
+@router.get("/{curso_id}/prerrequisitos", response_model=PrerrequisitosCurso)
+def get_curso_prerrequisitos(
+    curso_id: int,
+    estudiante_id: Optional[int] = None,
+    session: Session = Depends(get_session)
+):
+    """Get the direct and transitive prerrequisitos of a curso
+
+    With ``estudiante_id``, also lists the direct ones the estudiante has not passed.
+    """
+    if not session.get(Curso, curso_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Curso not found"
+        )
+    return PrerrequisitosCurso(
+        curso_id=curso_id,
+        directos=sorted(prerequisite_graph.direct(session, curso_id)),
+        todos=sorted(prerequisite_graph.closure(session, curso_id)),
+        faltantes=(
+            missing_prerequisites(session, estudiante_id, curso_id)
+            if estudiante_id is not None else None
+        )
+    )
+
+
 @router.patch("/{curso_id}", response_model=CursoRead)
 def update_curso(
     curso_id: int,
@@ -61,20 +124,17 @@ def update_curso(
     session: Session = Depends(get_session)
 ):
     """Update a curso"""
-    db_curso = session.get(Curso, curso_id)
+    curso_data = curso_update.model_dump(exclude_unset=True)
+    db_curso = update_row(session, Curso, CursoRead, curso_id, curso_data)
     if not db_curso:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Curso not found"
         )
 
-    curso_data = curso_update.model_dump(exclude_unset=True)
-    for key, value in curso_data.items():
-        setattr(db_curso, key, value)
-
-    session.add(db_curso)
+    refresh_curso(session, curso_id, curso_data.keys())
     session.commit()
-    session.refresh(db_curso)
+    catalog_cache.invalidate("curso", [curso_id])
     return db_curso
 
 
@@ -84,13 +144,13 @@ def delete_curso(
     session: Session = Depends(get_session)
 ):
     """Delete a curso"""
-    curso = session.get(Curso, curso_id)
-    if not curso:
+    if not delete_row(session, Curso, curso_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Curso not found"
         )
 
-    session.delete(curso)
     session.commit()
+    catalog_cache.invalidate("curso", [curso_id])
+    prerequisite_graph.invalidate()
     return None
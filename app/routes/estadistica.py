@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlmodel import Session
+from typing import List, Optional
+
+from app.database import get_session
+from app.models.estadistica import (
+    EstadisticaMatriculaRead,
+    NivelEstadistica,
+    PromedioEstudianteRead,
+    RankingRead,
+)
+from app.services.analytics import get_ranking, get_student_ranking
+from app.services.statistics import get_statistics, refresh_statistics
+
+router = APIRouter(prefix="/estadisticas", tags=["estadisticas"])
+
+
+@router.get("/matriculas", response_model=List[EstadisticaMatriculaRead])
+def get_estadisticas_matricula(
+    nivel: NivelEstadistica = Query(NivelEstadistica.CARRERA),
+    periodo_academico: Optional[str] = None,
+    facultad_id: Optional[int] = None,
+    carrera_id: Optional[int] = None,
+    session: Session = Depends(get_session)
+):
+    """Get enrollment statistics per periodo, facultad or carrera"""
+    return get_statistics(session, nivel, periodo_academico, facultad_id, carrera_id)
+
+
+@router.post("/matriculas/refresh", status_code=status.HTTP_204_NO_CONTENT)
+def refresh_estadisticas_matricula(session: Session = Depends(get_session)):
+    """Refresh the enrollment statistics now instead of waiting for the schedule"""
+    refresh_statistics(session)
+    return None
+
+
+@router.get("/ranking", response_model=RankingRead)
+def get_ranking_promedios(
+    carrera_id: Optional[int] = None,
+    periodo_academico: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    session: Session = Depends(get_session)
+):
+    """Rank estudiantes by credit-weighted average, optionally per carrera and periodo"""
+    return get_ranking(session, carrera_id, periodo_academico, limit)
+
+
+@router.get("/ranking/{estudiante_id}", response_model=PromedioEstudianteRead)
+def get_ranking_estudiante(
+    estudiante_id: int,
+    carrera_id: Optional[int] = None,
+    periodo_academico: Optional[str] = None,
+    session: Session = Depends(get_session)
+):
+    """Get the weighted average, position and percentile of one estudiante"""
+    return get_student_ranking(session, estudiante_id, carrera_id, periodo_academico)
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
 from typing import List
 
+from app.bulk import BulkResult, bulk_insert
+from app.conditional import conditional_get, conditional_paginate
+from app.crud import create_row, delete_row, update_row
 from app.database import get_session
+from app.export import ExportFormat, stream_export
+from app.fields import EstudianteFields
+from app.filters import EstudianteFilters
 from app.models.estudiante import (
     Estudiante,
     EstudianteCreate,
     EstudianteRead,
     EstudianteUpdate
 )
+from app.models.historial import HistorialAcademicoRead
+from app.pagination import PaginationParams
+from app.responses import json_list_response
+from app.services.search import search_people
+from app.services.transcripts import get_transcript
 
 router = APIRouter(prefix="/estudiantes", tags=["estudiantes"])
 
@@ -19,33 +30,73 @@ def create_estudiante(
     session: Session = Depends(get_session)
 ):
     """Create a new estudiante"""
-    db_estudiante = Estudiante.model_validate(estudiante)
-    session.add(db_estudiante)
+    db_estudiante = create_row(session, Estudiante, EstudianteRead, estudiante)
     session.commit()
-    session.refresh(db_estudiante)
     return db_estudiante
 
 
+@router.post("/bulk", response_model=BulkResult[EstudianteRead], status_code=status.HTTP_201_CREATED)
+def create_estudiantes_bulk(
+    estudiantes: List[EstudianteCreate],
+    atomic: bool = True,
+    session: Session = Depends(get_session)
+):
+    """Create many estudiantes in a single transaction
+
+    With ``atomic=false`` valid items are kept and failures are reported per item.
+    """
+    return bulk_insert(session, Estudiante, EstudianteRead, estudiantes, atomic)
+
+
 @router.get("/", response_model=List[EstudianteRead])
 def get_estudiantes(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: EstudianteFilters = Depends(),
+    fields: EstudianteFields = Depends(),
     session: Session = Depends(get_session)
 ):
-    """Get all estudiantes"""
-    estudiantes = session.exec(
-        select(Estudiante).offset(skip).limit(limit)
-    ).all()
-    return estudiantes
+    """Get estudiantes, optionally filtered and sorted"""
+    return conditional_paginate(
+        request, response, session, filters.apply(select(Estudiante)), pagination,
+        *filters.order_by(),
+        read_model=EstudianteRead,
+        fields=fields
+    )
+
+
+@router.get("/export")
+def export_estudiantes(
+    fmt: ExportFormat = Query(ExportFormat.csv, alias="format")
+):
+    """Stream every estudiante as CSV or NDJSON"""
+    statement = select(*Estudiante.__table__.columns).order_by(Estudiante.estudiante_id)
+    return stream_export(statement, fmt, "estudiantes")
+
+
+@router.get("/buscar", response_model=List[EstudianteRead])
+def search_estudiantes(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=100, description="Part of the name, DNI or email"),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session)
+):
+    """Search estudiantes by partial name, apellido, DNI or email, best matches first"""
+    return json_list_response(request, response, search_people(session, Estudiante, EstudianteRead, q, limit))
 
 
 @router.get("/{estudiante_id}", response_model=EstudianteRead)
 def get_estudiante(
     estudiante_id: int,
+    request: Request,
+    response: Response,
+    fields: EstudianteFields = Depends(),
     session: Session = Depends(get_session)
 ):
     """Get a specific estudiante by ID"""
-    estudiante = session.get(Estudiante, estudiante_id)
+    estudiante = conditional_get(request, response, session, Estudiante, estudiante_id, fields=fields)
     if not estudiante:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,6 +105,15 @@ def get_estudiante(
     return estudiante
 
 
+@router.get("/{estudiante_id}/historial", response_model=HistorialAcademicoRead)
+def get_estudiante_historial(
+    estudiante_id: int,
+    session: Session = Depends(get_session)
+):
+    """Get the academic history (kardex) of an estudiante"""
+    return get_transcript(session, estudiante_id)
+
+
 @router.patch("/{estudiante_id}", response_model=EstudianteRead)
 def update_estudiante(
     estudiante_id: int,
@@ -61,20 +121,15 @@ def update_estudiante(
     session: Session = Depends(get_session)
 ):
     """Update an estudiante"""
-    db_estudiante = session.get(Estudiante, estudiante_id)
+    estudiante_data = estudiante_update.model_dump(exclude_unset=True)
+    db_estudiante = update_row(session, Estudiante, EstudianteRead, estudiante_id, estudiante_data)
     if not db_estudiante:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Estudiante not found"
         )
 
-    estudiante_data = estudiante_update.model_dump(exclude_unset=True)
-    for key, value in estudiante_data.items():
-        setattr(db_estudiante, key, value)
-
-    session.add(db_estudiante)
     session.commit()
-    session.refresh(db_estudiante)
     return db_estudiante
 
 
@@ -84,13 +139,11 @@ def delete_estudiante(
     session: Session = Depends(get_session)
 ):
     """Delete an estudiante"""
-    estudiante = session.get(Estudiante, estudiante_id)
-    if not estudiante:
+    if not delete_row(session, Estudiante, estudiante_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Estudiante not found"
         )
 
-    session.delete(estudiante)
     session.commit()
     return None
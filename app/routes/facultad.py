@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
 from typing import List
 
+from app.cache import catalog_cache
+from app.conditional import conditional_get, conditional_page
+from app.crud import create_row, delete_row, update_row
 from app.database import get_session
+from app.export import ExportFormat, stream_export
+from app.fields import FacultadFields
+from app.filters import FacultadFilters
 from app.models.facultad import (
     Facultad,
     FacultadCreate,
     FacultadRead,
     FacultadUpdate
 )
+from app.pagination import PaginationParams, paginate
 
 router = APIRouter(prefix="/facultades", tags=["facultades"])
 
@@ -19,33 +26,60 @@ def create_facultad(
     session: Session = Depends(get_session)
 ):
     """Create a new facultad"""
-    db_facultad = Facultad.model_validate(facultad)
-    session.add(db_facultad)
+    db_facultad = create_row(session, Facultad, FacultadRead, facultad)
     session.commit()
-    session.refresh(db_facultad)
+    catalog_cache.invalidate("facultad")
     return db_facultad
 
 
 @router.get("/", response_model=List[FacultadRead])
 def get_facultades(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: FacultadFilters = Depends(),
+    fields: FacultadFields = Depends(),
     session: Session = Depends(get_session)
 ):
-    """Get all facultades"""
-    facultades = session.exec(
-        select(Facultad).offset(skip).limit(limit)
-    ).all()
-    return facultades
+    """Get facultades, optionally filtered and sorted"""
+    order_by = filters.order_by()
+    return conditional_page(
+        request, response,
+        lambda: catalog_cache.get_page(
+            "facultad", pagination, FacultadRead,
+            lambda: paginate(session, filters.apply(select(Facultad)), pagination, *order_by),
+            filters.cache_key()
+        ),
+        "facultad_id",
+        fields=fields
+    )
+
+
+@router.get("/export")
+def export_facultades(
+    fmt: ExportFormat = Query(ExportFormat.csv, alias="format")
+):
+    """Stream every facultad as CSV or NDJSON"""
+    statement = select(*Facultad.__table__.columns).order_by(Facultad.facultad_id)
+    return stream_export(statement, fmt, "facultades")
 
 
 @router.get("/{facultad_id}", response_model=FacultadRead)
 def get_facultad(
     facultad_id: int,
+    request: Request,
+    response: Response,
+    fields: FacultadFields = Depends(),
     session: Session = Depends(get_session)
 ):
     """Get a specific facultad by ID"""
-    facultad = session.get(Facultad, facultad_id)
+    facultad = conditional_get(
+        request, response, session, Facultad, facultad_id,
+        load=lambda: catalog_cache.get_item(
+            "facultad", facultad_id, FacultadRead, lambda: session.get(Facultad, facultad_id)
+        ),
+        fields=fields
+    )
     if not facultad:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,20 +95,16 @@ def update_facultad(
     session: Session = Depends(get_session)
 ):
     """Update a facultad"""
-    db_facultad = session.get(Facultad, facultad_id)
+    facultad_data = facultad_update.model_dump(exclude_unset=True)
+    db_facultad = update_row(session, Facultad, FacultadRead, facultad_id, facultad_data)
     if not db_facultad:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Facultad not found"
         )
 
-    facultad_data = facultad_update.model_dump(exclude_unset=True)
-    for key, value in facultad_data.items():
-        setattr(db_facultad, key, value)
-
-    session.add(db_facultad)
     session.commit()
-    session.refresh(db_facultad)
+    catalog_cache.invalidate("facultad", [facultad_id])
     return db_facultad
 
 
@@ -84,13 +114,12 @@ def delete_facultad(
     session: Session = Depends(get_session)
 ):
     """Delete a facultad"""
-    facultad = session.get(Facultad, facultad_id)
-    if not facultad:
+    if not delete_row(session, Facultad, facultad_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Facultad not found"
         )
 
-    session.delete(facultad)
     session.commit()
+    catalog_cache.invalidate("facultad", [facultad_id])
     return None
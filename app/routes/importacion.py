@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, File, UploadFile
+from sqlmodel import Session
+
+from app.database import get_session
+from app.importer import ImportResource, ImportResult, import_csv
+
+router = APIRouter(prefix="/importaciones", tags=["importaciones"])
+
+
+@router.post("/{resource}", response_model=ImportResult)
+def import_resource(
+    resource: ImportResource,
+    file: UploadFile = File(...),
+    session: Session = Depends(get_session)
+):
+    """Load estudiantes, secciones or matriculas from a CSV file
+
+    Rows are validated against the *Create schema, staged with COPY and merged
+    with one upsert. Rejected rows are listed by line number.
+    """
+    return import_csv(session, resource, file.file)
@@ -1,14 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 
+from app.bulk import BulkResult
+from app.cache import catalog_cache
+from app.conditional import conditional_get, conditional_paginate
+from app.crud import update_row
 from app.database import get_session
+from app.export import ExportFormat, stream_export
+from app.fields import MatriculaFields
+from app.filters import MatriculaFilters
+from app.includes import MatriculaIncludes
 from app.models.matricula import (
     Matricula,
     MatriculaCreate,
     MatriculaRead,
+    MatriculaReadWithRelations,
     MatriculaUpdate
 )
+from app.models.seccion import Seccion
+from app.pagination import PaginationParams
+from app.services.enrollment import change_estado, enroll, enroll_bulk, holds_seat, unenroll
+from app.services.payments import settle
+from app.services.schedule import schedule_index
+from app.services.transcripts import refresh_matriculas
 
 router = APIRouter(prefix="/matriculas", tags=["matriculas"])
 
@@ -18,34 +33,70 @@ def create_matricula(
     matricula: MatriculaCreate,
     session: Session = Depends(get_session)
 ):
-    """Create a new matricula"""
-    db_matricula = Matricula.model_validate(matricula)
-    session.add(db_matricula)
-    session.commit()
-    session.refresh(db_matricula)
-    return db_matricula
+    """Create a new matricula
+
+    Takes a seat in the seccion atomically; answers 409 when it is full.
+    """
+    return enroll(session, matricula)
 
 
-@router.get("/", response_model=List[MatriculaRead])
+@router.post("/bulk", response_model=BulkResult[MatriculaRead], status_code=status.HTTP_201_CREATED)
+def create_matriculas_bulk(
+    matriculas: List[MatriculaCreate],
+    atomic: bool = True,
+    session: Session = Depends(get_session)
+):
+    """Create many matriculas in a single transaction
+
+    With ``atomic=false`` valid items are kept and failures are reported per item.
+    """
+    return enroll_bulk(session, matriculas, atomic)
+
+
+@router.get("/", response_model=List[MatriculaReadWithRelations])
 def get_matriculas(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: MatriculaFilters = Depends(),
+    includes: MatriculaIncludes = Depends(),
+    fields: MatriculaFields = Depends(),
     session: Session = Depends(get_session)
 ):
-    """Get all matriculas"""
-    matriculas = session.exec(
-        select(Matricula).offset(skip).limit(limit)
-    ).all()
-    return matriculas
+    """Get matriculas, optionally filtered, sorted and with their estudiante and seccion"""
+    return conditional_paginate(
+        request, response, session, filters.apply(select(Matricula)), pagination,
+        *filters.order_by(),
+        read_model=MatriculaRead,
+        includes=includes,
+        fields=fields
+    )
+
+
+@router.get("/export")
+def export_matriculas(
+    fmt: ExportFormat = Query(ExportFormat.csv, alias="format"),
+    periodo_academico: Optional[str] = None
+):
+    """Stream matriculas as CSV or NDJSON, optionally for one periodo_academico"""
+    statement = select(*Matricula.__table__.columns).order_by(Matricula.matricula_id)
+    if periodo_academico:
+        statement = statement.join(
+            Seccion, Matricula.seccion_id == Seccion.seccion_id
+        ).where(Seccion.periodo_academico == periodo_academico)
+    return stream_export(statement, fmt, "matriculas")
 
 
 @router.get("/{matricula_id}", response_model=MatriculaRead)
 def get_matricula(
     matricula_id: int,
+    request: Request,
+    response: Response,
+    fields: MatriculaFields = Depends(),
     session: Session = Depends(get_session)
 ):
     """Get a specific matricula by ID"""
-    matricula = session.get(Matricula, matricula_id)
+    matricula = conditional_get(request, response, session, Matricula, matricula_id, fields=fields)
     if not matricula:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,20 +112,26 @@ def update_matricula(
     session: Session = Depends(get_session)
 ):
     """Update a matricula"""
-    db_matricula = session.get(Matricula, matricula_id)
+    matricula_data = matricula_update.model_dump(exclude_unset=True)
+    found = "estado" not in matricula_data or change_estado(session, matricula_id, matricula_data["estado"])
+    db_matricula = update_row(session, Matricula, MatriculaRead, matricula_id, matricula_data) if found else None
     if not db_matricula:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Matricula not found"
         )
 
-    matricula_data = matricula_update.model_dump(exclude_unset=True)
-    for key, value in matricula_data.items():
-        setattr(db_matricula, key, value)
-
-    session.add(db_matricula)
+    if "costo" in matricula_data and "estado" not in matricula_data:
+        settle(session, [matricula_id])
+        db_matricula = update_row(session, Matricula, MatriculaRead, matricula_id, {})
+    refresh_matriculas(session, [matricula_id])
     session.commit()
-    session.refresh(db_matricula)
+    if "estado" in matricula_data:
+        catalog_cache.invalidate("seccion", [db_matricula.seccion_id])
+        if holds_seat(db_matricula.estado):
+            schedule_index.enrolled(db_matricula.estudiante_id, db_matricula.seccion_id)
+        else:
+            schedule_index.unenrolled(db_matricula.estudiante_id, db_matricula.seccion_id)
     return db_matricula
 
 
@@ -84,13 +141,9 @@ def delete_matricula(
     session: Session = Depends(get_session)
 ):
     """Delete a matricula"""
-    matricula = session.get(Matricula, matricula_id)
-    if not matricula:
+    if not unenroll(session, matricula_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Matricula not found"
         )
-
-    session.delete(matricula)
-    session.commit()
     return None
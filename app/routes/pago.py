@@ -1,51 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 
+from app.bulk import BulkResult, finish_bulk, insert_rows
+from app.conditional import conditional_get, conditional_paginate
+from app.crud import update_row
 from app.database import get_session
+from app.export import ExportFormat, stream_export
+from app.fields import PagoFields
+from app.filters import PagoFilters
+from app.includes import PagoIncludes
 from app.models.pago import (
     Pago,
     PagoCreate,
     PagoRead,
+    PagoReadWithRelations,
     PagoUpdate
 )
+from app.models.matricula import Matricula
+from app.models.seccion import Seccion
+from app.pagination import PaginationParams
+from app.services.payments import (
+    ConciliacionResult,
+    apply_payments,
+    change_pago_estado,
+    payment_delta,
+    reconcile_period,
+    record_payment,
+    remove_payment,
+)
 
 router = APIRouter(prefix="/pagos", tags=["pagos"])
 
+# Set when POST /pagos returns the pago created by an earlier request
+REPLAYED_HEADER = "Idempotent-Replayed"
+
 
 @router.post("/", response_model=PagoRead, status_code=status.HTTP_201_CREATED)
 def create_pago(
     pago: PagoCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=100),
     session: Session = Depends(get_session)
 ):
-    """Create a new pago"""
-    db_pago = Pago.model_validate(pago)
-    session.add(db_pago)
-    session.commit()
-    session.refresh(db_pago)
+    """Create a new pago, adding it to the matricula's paid balance
+
+    ``referencia`` (or the ``Idempotency-Key`` header, used as referencia)
+    makes the request idempotent: a retry answers 200 with the original pago.
+    """
+    if idempotency_key is not None:
+        if pago.referencia not in (None, idempotency_key):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key does not match referencia"
+            )
+        pago.referencia = idempotency_key
+
+    db_pago, created = record_payment(session, pago)
+    if not created:
+        response.status_code = status.HTTP_200_OK
+        response.headers[REPLAYED_HEADER] = "true"
     return db_pago
 
 
-@router.get("/", response_model=List[PagoRead])
+@router.post("/bulk", response_model=BulkResult[PagoRead], status_code=status.HTTP_201_CREATED)
+def create_pagos_bulk(
+    pagos: List[PagoCreate],
+    atomic: bool = True,
+    session: Session = Depends(get_session)
+):
+    """Create many pagos in a single transaction
+
+    With ``atomic=false`` valid items are kept and failures are reported per item.
+    """
+    if not pagos:
+        return BulkResult()
+    created, errors = insert_rows(session, Pago, PagoRead, pagos)
+    apply_payments(session, payment_delta(
+        (pago.matricula_id, pago.monto, pago.estado) for _, pago in created
+    ))
+    return finish_bulk(session, created, errors, atomic)
+
+
+@router.post("/conciliacion", response_model=ConciliacionResult)
+def reconcile_pagos(
+    periodo_academico: str,
+    session: Session = Depends(get_session)
+):
+    """Recompute paid balances and PENDIENTE/PAGADO of a whole periodo_academico"""
+    return reconcile_period(session, periodo_academico)
+
+
+@router.get("/", response_model=List[PagoReadWithRelations])
 def get_pagos(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: PagoFilters = Depends(),
+    includes: PagoIncludes = Depends(),
+    fields: PagoFields = Depends(),
     session: Session = Depends(get_session)
 ):
-    """Get all pagos"""
-    pagos = session.exec(
-        select(Pago).offset(skip).limit(limit)
-    ).all()
-    return pagos
+    """Get pagos, optionally filtered, sorted and with their matricula"""
+    return conditional_paginate(
+        request, response, session, filters.apply(select(Pago)), pagination,
+        *filters.order_by(),
+        read_model=PagoRead,
+        includes=includes,
+        fields=fields
+    )
+
+
+@router.get("/export")
+def export_pagos(
+    fmt: ExportFormat = Query(ExportFormat.csv, alias="format"),
+    periodo_academico: Optional[str] = None
+):
+    """Stream pagos as CSV or NDJSON, optionally for one periodo_academico"""
+    statement = select(*Pago.__table__.columns).order_by(Pago.pago_id)
+    if periodo_academico:
+        statement = statement.join(
+            Matricula, Pago.matricula_id == Matricula.matricula_id
+        ).join(
+            Seccion, Matricula.seccion_id == Seccion.seccion_id
+        ).where(Seccion.periodo_academico == periodo_academico)
+    return stream_export(statement, fmt, "pagos")
 
 
 @router.get("/{pago_id}", response_model=PagoRead)
 def get_pago(
     pago_id: int,
+    request: Request,
+    response: Response,
+    fields: PagoFields = Depends(),
     session: Session = Depends(get_session)
 ):
     """Get a specific pago by ID"""
-    pago = session.get(Pago, pago_id)
+    pago = conditional_get(request, response, session, Pago, pago_id, fields=fields)
     if not pago:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,20 +152,16 @@ def update_pago(
     session: Session = Depends(get_session)
 ):
     """Update a pago"""
-    db_pago = session.get(Pago, pago_id)
+    pago_data = pago_update.model_dump(exclude_unset=True)
+    found = "estado" not in pago_data or change_pago_estado(session, pago_id, pago_data["estado"])
+    db_pago = update_row(session, Pago, PagoRead, pago_id, pago_data) if found else None
     if not db_pago:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pago not found"
         )
 
-    pago_data = pago_update.model_dump(exclude_unset=True)
-    for key, value in pago_data.items():
-        setattr(db_pago, key, value)
-
-    session.add(db_pago)
     session.commit()
-    session.refresh(db_pago)
     return db_pago
 
 
@@ -84,13 +171,9 @@ def delete_pago(
     session: Session = Depends(get_session)
 ):
     """Delete a pago"""
-    pago = session.get(Pago, pago_id)
-    if not pago:
+    if not remove_payment(session, pago_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pago not found"
         )
-
-    session.delete(pago)
-    session.commit()
     return None
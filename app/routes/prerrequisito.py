@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlmodel import Session, select
+from typing import List
+
+from app.conditional import conditional_paginate
+from app.crud import delete_row
+from app.database import get_session
+from app.fields import PrerrequisitoFields
+from app.filters import PrerrequisitoFilters
+from app.models.prerrequisito import (
+    Prerrequisito,
+    PrerequisitoCreate,
+    PrerequisitoRead
+)
+from app.pagination import PaginationParams
+from app.services.prerequisites import add_prerequisite, prerequisite_graph
+
+router = APIRouter(prefix="/prerrequisitos", tags=["prerrequisitos"])
+
+
+@router.post("/", response_model=PrerequisitoRead, status_code=status.HTTP_201_CREATED)
+def create_prerrequisito(
+    prerrequisito: PrerequisitoCreate,
+    session: Session = Depends(get_session)
+):
+    """Create a new prerrequisito, rejecting cycles"""
+    return add_prerequisite(session, prerrequisito)
+
+
+@router.get("/", response_model=List[PrerequisitoRead])
+def get_prerrequisitos(
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: PrerrequisitoFilters = Depends(),
+    fields: PrerrequisitoFields = Depends(),
+    session: Session = Depends(get_session)
+):
+    """Get prerrequisitos, optionally filtered and sorted"""
+    return conditional_paginate(
+        request, response, session, filters.apply(select(Prerrequisito)), pagination,
+        *filters.order_by(),
+        read_model=PrerequisitoRead,
+        fields=fields
+    )
+
+
+@router.delete("/{prerrequisito_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_prerrequisito(
+    prerrequisito_id: int,
+    session: Session = Depends(get_session)
+):
+    """Delete a prerrequisito"""
+    if not delete_row(session, Prerrequisito, prerrequisito_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prerrequisito not found"
+        )
+
+    session.commit()
+    prerequisite_graph.invalidate()
+    return None
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
 from typing import List
 
+from app.conditional import conditional_get, conditional_paginate
+from app.crud import create_row, delete_row, update_row
 from app.database import get_session
+from app.export import ExportFormat, stream_export
+from app.fields import ProfesorFields
+from app.filters import ProfesorFilters
 from app.models.profesor import (
     Profesor,
     ProfesorCreate,
     ProfesorRead,
     ProfesorUpdate
 )
+from app.pagination import PaginationParams
+from app.responses import json_list_response
+from app.services.search import search_people
 
 router = APIRouter(prefix="/profesores", tags=["profesores"])
 
@@ -19,33 +27,60 @@ def create_profesor(
     session: Session = Depends(get_session)
 ):
     """Create a new profesor"""
-    db_profesor = Profesor.model_validate(profesor)
-    session.add(db_profesor)
+    db_profesor = create_row(session, Profesor, ProfesorRead, profesor)
     session.commit()
-    session.refresh(db_profesor)
     return db_profesor
 
 
 @router.get("/", response_model=List[ProfesorRead])
 def get_profesores(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: ProfesorFilters = Depends(),
+    fields: ProfesorFields = Depends(),
     session: Session = Depends(get_session)
 ):
-    """Get all profesores"""
-    profesores = session.exec(
-        select(Profesor).offset(skip).limit(limit)
-    ).all()
-    return profesores
+    """Get profesores, optionally filtered and sorted"""
+    return conditional_paginate(
+        request, response, session, filters.apply(select(Profesor)), pagination,
+        *filters.order_by(),
+        read_model=ProfesorRead,
+        fields=fields
+    )
+
+
+@router.get("/export")
+def export_profesores(
+    fmt: ExportFormat = Query(ExportFormat.csv, alias="format")
+):
+    """Stream every profesor as CSV or NDJSON"""
+    statement = select(*Profesor.__table__.columns).order_by(Profesor.profesor_id)
+    return stream_export(statement, fmt, "profesores")
+
+
+@router.get("/buscar", response_model=List[ProfesorRead])
+def search_profesores(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=100, description="Part of the name, DNI or email"),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session)
+):
+    """Search profesores by partial name, apellido, DNI or email, best matches first"""
+    return json_list_response(request, response, search_people(session, Profesor, ProfesorRead, q, limit))
 
 
 @router.get("/{profesor_id}", response_model=ProfesorRead)
 def get_profesor(
     profesor_id: int,
+    request: Request,
+    response: Response,
+    fields: ProfesorFields = Depends(),
     session: Session = Depends(get_session)
 ):
     """Get a specific profesor by ID"""
-    profesor = session.get(Profesor, profesor_id)
+    profesor = conditional_get(request, response, session, Profesor, profesor_id, fields=fields)
     if not profesor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,20 +96,15 @@ def update_profesor(
     session: Session = Depends(get_session)
 ):
     """Update a profesor"""
-    db_profesor = session.get(Profesor, profesor_id)
+    profesor_data = profesor_update.model_dump(exclude_unset=True)
+    db_profesor = update_row(session, Profesor, ProfesorRead, profesor_id, profesor_data)
     if not db_profesor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profesor not found"
         )
 
-    profesor_data = profesor_update.model_dump(exclude_unset=True)
-    for key, value in profesor_data.items():
-        setattr(db_profesor, key, value)
-
-    session.add(db_profesor)
     session.commit()
-    session.refresh(db_profesor)
     return db_profesor
 
 
@@ -84,13 +114,11 @@ def delete_profesor(
     session: Session = Depends(get_session)
 ):
     """Delete a profesor"""
-    profesor = session.get(Profesor, profesor_id)
-    if not profesor:
+    if not delete_row(session, Profesor, profesor_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profesor not found"
         )
 
-    session.delete(profesor)
     session.commit()
     return None
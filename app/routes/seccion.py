@@ -1,51 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 
+from app.cache import catalog_cache
+from app.conditional import conditional_get, conditional_page
+from app.crud import create_row, delete_row, update_row
 from app.database import get_session
+from app.export import ExportFormat, stream_export
+from app.fields import SeccionFields
+from app.filters import SeccionFilters
+from app.includes import SeccionIncludes
 from app.models.seccion import (
     Seccion,
     SeccionCreate,
     SeccionRead,
+    SeccionReadWithRelations,
     SeccionUpdate
 )
+from app.models.calificacion import CalificacionRead, NotaSeccionUpdate, RegistroNotasRead
+from app.models.horario import ReporteConflictos
+from app.pagination import PaginationParams, paginate
+from app.services.gradebook import get_gradebook, save_grades
+from app.services.schedule import check_seccion_schedule, conflict_report, schedule_index
+from app.services.transcripts import refresh_seccion
 
 router = APIRouter(prefix="/secciones", tags=["secciones"])
 
+# Fields that change where and when a seccion is booked
+SCHEDULE_FIELDS = {"aula", "horario", "dias", "profesor_id", "periodo_academico", "activo"}
+
 
 @router.post("/", response_model=SeccionRead, status_code=status.HTTP_201_CREATED)
 def create_seccion(
     seccion: SeccionCreate,
     session: Session = Depends(get_session)
 ):
-    """Create a new seccion"""
-    db_seccion = Seccion.model_validate(seccion)
-    session.add(db_seccion)
+    """Create a new seccion, rejecting aula or profesor timetable clashes"""
+    check_seccion_schedule(session, seccion)
+    db_seccion = create_row(session, Seccion, SeccionRead, seccion)
     session.commit()
-    session.refresh(db_seccion)
+    catalog_cache.invalidate("seccion")
+    schedule_index.invalidate(db_seccion.periodo_academico)
     return db_seccion
 
 
-@router.get("/", response_model=List[SeccionRead])
+@router.get("/", response_model=List[SeccionReadWithRelations])
 def get_secciones(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    pagination: PaginationParams = Depends(),
+    filters: SeccionFilters = Depends(),
+    includes: SeccionIncludes = Depends(),
+    fields: SeccionFields = Depends(),
+    session: Session = Depends(get_session)
+):
+    """Get secciones, optionally filtered, sorted and with their curso and profesor"""
+    order_by = filters.order_by()
+    return conditional_page(
+        request, response,
+        lambda: catalog_cache.get_page(
+            "seccion", pagination, SeccionRead,
+            lambda: paginate(session, filters.apply(select(Seccion)), pagination, *order_by),
+            filters.cache_key()
+        ),
+        "seccion_id",
+        expand=(lambda items: includes.expand(session, items)) if includes else None,
+        fields=fields
+    )
+
+
+@router.get("/export")
+def export_secciones(
+    fmt: ExportFormat = Query(ExportFormat.csv, alias="format"),
+    periodo_academico: Optional[str] = None
+):
+    """Stream secciones as CSV or NDJSON, optionally for one periodo_academico"""
+    statement = select(*Seccion.__table__.columns).order_by(Seccion.seccion_id)
+    if periodo_academico:
+        statement = statement.where(Seccion.periodo_academico == periodo_academico)
+    return stream_export(statement, fmt, "secciones")
+
+
+@router.get("/conflictos", response_model=ReporteConflictos)
+def get_conflictos(
+    periodo_academico: str,
     session: Session = Depends(get_session)
 ):
-    """Get all secciones"""
-    secciones = session.exec(
-        select(Seccion).offset(skip).limit(limit)
-    ).all()
-    return secciones
+    """Every aula, profesor and estudiante timetable clash in a periodo_academico"""
+    return conflict_report(session, periodo_academico)
 
 
 @router.get("/{seccion_id}", response_model=SeccionRead)
 def get_seccion(
     seccion_id: int,
+    request: Request,
+    response: Response,
+    fields: SeccionFields = Depends(),
     session: Session = Depends(get_session)
 ):
     """Get a specific seccion by ID"""
-    seccion = session.get(Seccion, seccion_id)
+    seccion = conditional_get(
+        request, response, session, Seccion, seccion_id,
+        load=lambda: catalog_cache.get_item(
+            "seccion", seccion_id, SeccionRead, lambda: session.get(Seccion, seccion_id)
+        ),
+        fields=fields
+    )
     if not seccion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,6 +114,25 @@ def get_seccion(
     return seccion
 
 
+@router.get("/{seccion_id}/calificaciones", response_model=RegistroNotasRead)
+def get_seccion_calificaciones(
+    seccion_id: int,
+    session: Session = Depends(get_session)
+):
+    """Get the roster of a seccion with the calificacion of each matricula"""
+    return get_gradebook(session, seccion_id)
+
+
+@router.put("/{seccion_id}/calificaciones", response_model=List[CalificacionRead])
+def put_seccion_calificaciones(
+    seccion_id: int,
+    notas: List[NotaSeccionUpdate],
+    session: Session = Depends(get_session)
+):
+    """Create or replace the calificaciones of many matriculas of a seccion at once"""
+    return save_grades(session, seccion_id, notas)
+
+
 @router.patch("/{seccion_id}", response_model=SeccionRead)
 def update_seccion(
     seccion_id: int,
@@ -61,20 +140,44 @@ def update_seccion(
     session: Session = Depends(get_session)
 ):
     """Update a seccion"""
-    db_seccion = session.get(Seccion, seccion_id)
+    seccion_data = seccion_update.model_dump(exclude_unset=True)
+    periodo = None
+    if SCHEDULE_FIELDS.intersection(seccion_data):
+        # The timetable check needs the merged row; other updates skip the lookup
+        current = session.get(Seccion, seccion_id)
+        if not current:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Seccion not found"
+            )
+        periodo = current.periodo_academico
+        check_seccion_schedule(
+            session, SeccionCreate.model_validate({**current.model_dump(), **seccion_data}), seccion_id
+        )
+
+    # The seat count is compared in the UPDATE itself, under its row lock
+    seats = (
+        [Seccion.matriculados <= seccion_data["capacidad_maxima"]]
+        if "capacidad_maxima" in seccion_data else []
+    )
+    db_seccion = update_row(session, Seccion, SeccionRead, seccion_id, seccion_data, *seats)
     if not db_seccion:
+        if seats and session.get(Seccion, seccion_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="capacidad_maxima is below the number of enrolled students"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Seccion not found"
         )
 
-    seccion_data = seccion_update.model_dump(exclude_unset=True)
-    for key, value in seccion_data.items():
-        setattr(db_seccion, key, value)
-
-    session.add(db_seccion)
+    refresh_seccion(session, seccion_id, seccion_data.keys())
     session.commit()
-    session.refresh(db_seccion)
+    catalog_cache.invalidate("seccion", [seccion_id])
+    if periodo is not None:
+        schedule_index.invalidate(periodo)
+        schedule_index.invalidate(db_seccion.periodo_academico)
     return db_seccion
 
 
@@ -84,13 +187,14 @@ def delete_seccion(
     session: Session = Depends(get_session)
 ):
     """Delete a seccion"""
-    seccion = session.get(Seccion, seccion_id)
-    if not seccion:
+    deleted = delete_row(session, Seccion, seccion_id, Seccion.periodo_academico)
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Seccion not found"
         )
 
-    session.delete(seccion)
     session.commit()
+    catalog_cache.invalidate("seccion", [seccion_id])
+    schedule_index.invalidate(deleted.periodo_academico)
     return None
@@ -0,0 +1 @@
+# Domain services
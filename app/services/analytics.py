@@ -0,0 +1,232 @@
+"""Credit-weighted averages and rankings per carrera and periodo.
+
+The graded transcript lines of the requested scope are read from
+``historial_academico`` in one query as three arrays (estudiante, creditos,
+nota) and aggregated with NumPy: per-student sums with ``bincount``, ranks
+and percentiles with one sort and ``searchsorted``. No per-row Python runs
+after the fetch, so ranking the whole university takes one scan. Outside
+PostgreSQL the lines are read as plain rows instead.
+
+Results are cached per scope until a transaction that rewrote transcript
+lines commits (grades, matriculas, cursos and imports all go through
+``app.services.transcripts``); ``ANALITICA_TTL_SECONDS`` bounds staleness
+for writes made by other worker processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import Float, cast, event, func
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from app.cache import KeyedLock
+from app.config import settings
+from app.models.estadistica import PromedioEstudianteRead, RankingRead
+from app.models.historial import HistorialAcademico
+from app.services.prerequisites import NOTA_APROBATORIA
+from app.services.transcripts import HISTORIAL_CHANGED
+
+Scope = Tuple[Optional[int], Optional[str]]
+
+
+@dataclass
+class Ranking:
+    """Estudiantes of one scope, sorted by position"""
+    estudiante_ids: np.ndarray
+    promedios: np.ndarray
+    creditos: np.ndarray
+    creditos_aprobados: np.ndarray
+    posiciones: np.ndarray
+    percentiles: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.estudiante_ids)
+
+    def item(self, index: int) -> PromedioEstudianteRead:
+        return PromedioEstudianteRead(
+            posicion=int(self.posiciones[index]),
+            estudiante_id=int(self.estudiante_ids[index]),
+            promedio_ponderado=float(self.promedios[index]),
+            creditos=int(self.creditos[index]),
+            creditos_aprobados=int(self.creditos_aprobados[index]),
+            percentil=float(self.percentiles[index]),
+        )
+
+
+def _load_columns(session: Session, scope: Scope) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """estudiante_id, creditos and nota of every graded, non-ANULADO line in scope.
+
+    On PostgreSQL each column comes back as one ``array_agg`` value, which
+    the driver hands over as a flat list; it is several times faster than
+    building a result row per line. Other databases read the rows.
+    """
+    carrera_id, periodo = scope
+    columns = (
+        HistorialAcademico.estudiante_id,
+        HistorialAcademico.creditos,
+        cast(HistorialAcademico.nota, Float),
+    )
+    conditions = [
+        HistorialAcademico.nota.is_not(None),
+        HistorialAcademico.estado_matricula != "ANULADO",
+    ]
+    if carrera_id is not None:
+        conditions.append(HistorialAcademico.carrera_id == carrera_id)
+    if periodo is not None:
+        conditions.append(HistorialAcademico.periodo_academico == periodo)
+
+    if session.get_bind().dialect.name == "postgresql":
+        statement = select(*(func.array_agg(column) for column in columns)).where(*conditions)
+        estudiantes, creditos, notas = session.execute(statement).one()
+    else:
+        rows = session.execute(select(*columns).where(*conditions)).all()
+        estudiantes, creditos, notas = zip(*rows) if rows else ((), (), ())
+    return (
+        np.asarray(estudiantes or [], dtype=np.int64),
+        np.asarray(creditos or [], dtype=np.float64),
+        np.asarray(notas or [], dtype=np.float64),
+    )
+
+
+def compute_ranking(estudiantes: np.ndarray, creditos: np.ndarray, notas: np.ndarray) -> Ranking:
+    """Rank estudiantes by credit-weighted average of the given lines.
+
+    Ties share a position and the next one is skipped (1, 2, 2, 4).
+    Estudiantes whose graded cursos add up to zero creditos are left out.
+    """
+    # Per-student sums indexed directly by estudiante_id: no sort or hashing
+    total = np.bincount(estudiantes, weights=creditos)
+    puntos = np.bincount(estudiantes, weights=creditos * notas)
+    aprobados = np.bincount(estudiantes, weights=np.where(notas >= NOTA_APROBATORIA, creditos, 0))
+
+    ids = np.flatnonzero(total > 0)
+    total, puntos, aprobados = total[ids], puntos[ids], aprobados[ids]
+    promedios = np.round(puntos / total, 2)
+
+    order = np.lexsort((ids, -promedios))
+    promedios = promedios[order]
+    # Sorted descending, so the first index holding a value is its position - 1
+    posiciones = np.searchsorted(-promedios, -promedios, side="left") + 1
+    below = len(promedios) - np.searchsorted(-promedios, -promedios, side="right")
+    percentiles = np.round(100 * below / max(len(promedios), 1), 2)
+    return Ranking(
+        estudiante_ids=ids[order],
+        promedios=promedios,
+        creditos=total[order].astype(np.int64),
+        creditos_aprobados=aprobados[order].astype(np.int64),
+        posiciones=posiciones,
+        percentiles=percentiles,
+    )
+
+
+class RankingCache:
+    """Process-wide LRU cache of rankings per (carrera_id, periodo_academico).
+
+    A cold scope is computed under its own lock, so concurrent requests for
+    it wait for one computation while other scopes are served meanwhile.
+    The scopes come from the query string, so at most ``max_scopes`` of them
+    are kept, and a scope's lock is dropped once no request waits for it.
+    """
+
+    def __init__(self, ttl_seconds: int, max_scopes: int):
+        self._ttl = ttl_seconds
+        self._max_scopes = max_scopes
+        # Guards the dict and the generation; never held while computing
+        self._lock = threading.Lock()
+        self._scope_locks = KeyedLock()
+        self._rankings: "OrderedDict[Scope, Tuple[float, Ranking]]" = OrderedDict()
+        # Bumped by invalidate, so a computation that started before it is not stored
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._rankings.clear()
+            self._generation += 1
+
+    def _fresh(self, scope: Scope) -> Optional[Tuple[float, Ranking]]:
+        with self._lock:
+            entry = self._rankings.get(scope)
+            if entry is None or time.monotonic() - entry[0] > self._ttl:
+                return None
+            self._rankings.move_to_end(scope)
+            return entry
+
+    def get(self, session: Session, scope: Scope) -> Ranking:
+        entry = self._fresh(scope)
+        if entry is None:
+            with self._scope_locks.hold(scope):
+                entry = self._fresh(scope)
+                if entry is None:
+                    generation = self._generation
+                    entry = (time.monotonic(), compute_ranking(*_load_columns(session, scope)))
+                    with self._lock:
+                        if generation == self._generation:
+                            self._rankings[scope] = entry
+                            self._rankings.move_to_end(scope)
+                            while len(self._rankings) > self._max_scopes:
+                                self._rankings.popitem(last=False)
+        return entry[1]
+
+
+ranking_cache = RankingCache(settings.ANALITICA_TTL_SECONDS, settings.ANALITICA_MAX_SCOPES)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_after_commit(session: OrmSession) -> None:
+    if session.info.pop(HISTORIAL_CHANGED, False):
+        ranking_cache.invalidate()
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_after_rollback(session: OrmSession) -> None:
+    session.info.pop(HISTORIAL_CHANGED, None)
+
+
+def get_ranking(
+    session: Session,
+    carrera_id: Optional[int] = None,
+    periodo_academico: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> RankingRead:
+    """The ranking of a scope (the whole university when unfiltered), top ``limit`` only"""
+    ranking = ranking_cache.get(session, (carrera_id, periodo_academico))
+    summary = {}
+    if len(ranking):
+        p25, p50, p75, p90 = np.percentile(ranking.promedios, [25, 50, 75, 90])
+        summary = dict(
+            promedio_general=round(float(ranking.promedios.mean()), 2),
+            p25=round(float(p25), 2),
+            p50=round(float(p50), 2),
+            p75=round(float(p75), 2),
+            p90=round(float(p90), 2),
+        )
+    count = len(ranking) if limit is None else min(limit, len(ranking))
+    return RankingRead(
+        carrera_id=carrera_id,
+        periodo_academico=periodo_academico,
+        total_estudiantes=len(ranking),
+        estudiantes=[ranking.item(index) for index in range(count)],
+        **summary,
+    )
+
+
+def get_student_ranking(
+    session: Session,
+    estudiante_id: int,
+    carrera_id: Optional[int] = None,
+    periodo_academico: Optional[str] = None,
+) -> PromedioEstudianteRead:
+    """Average and position of one estudiante within a scope"""
+    ranking = ranking_cache.get(session, (carrera_id, periodo_academico))
+    found = np.flatnonzero(ranking.estudiante_ids == estudiante_id)
+    if not len(found):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Estudiante has no graded cursos in this scope"
+        )
+    return ranking.item(int(found[0]))
@@ -0,0 +1,276 @@
+"""Seat accounting for matriculas.
+
+Every seccion keeps a ``matriculados`` counter of the matriculas holding a
+seat (any estado except ANULADO). A seat is taken with one conditional
+UPDATE that only matches while the counter is below ``capacidad_maxima``.
+The row lock it takes is held until the enrolling transaction commits, so
+concurrent enrollments in the same seccion queue briefly on that row instead
+of running COUNT(*) under a table lock, and the seccion can never be
+oversubscribed.
+"""
+from collections import defaultdict
+from typing import Iterable, List, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.bulk import BulkItemError, BulkResult, finish_bulk, insert_rows
+from app.cache import catalog_cache
+from app.crud import create_row, delete_row
+from app.models.matricula import Matricula, MatriculaCreate, MatriculaRead
+from app.models.seccion import Seccion
+from app.services.prerequisites import MISSING_PREREQUISITES, check_eligibility, missing_prerequisites_many
+from app.services.schedule import (
+    check_enrollment_schedule,
+    enrollment_clashes,
+    lock_enrollments,
+    schedule_index,
+)
+from app.services.transcripts import refresh_matriculas
+
+ESTADO_ANULADO = "ANULADO"
+
+SECCION_FULL = "Seccion is full"
+SECCION_INACTIVE = "Seccion is not active"
+SCHEDULE_CONFLICT = "Schedule conflict"
+
+
+def holds_seat(estado: str) -> bool:
+    """Whether a matricula in ``estado`` occupies a seat"""
+    return estado != ESTADO_ANULADO
+
+
+def reserve_seat(session: Session, seccion_id: int) -> None:
+    """Take one seat in ``seccion_id`` or raise 404/409"""
+    taken = session.execute(
+        update(Seccion)
+        .where(
+            Seccion.seccion_id == seccion_id,
+            Seccion.activo == True,  # noqa: E712
+            Seccion.matriculados < Seccion.capacidad_maxima,
+        )
+        .values(matriculados=Seccion.matriculados + 1)
+        .returning(Seccion.seccion_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if taken:
+        return
+
+    # Only the failure path pays for finding out why
+    seccion = session.get(Seccion, seccion_id)
+    if not seccion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Seccion not found"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=SECCION_INACTIVE if not seccion.activo else SECCION_FULL
+    )
+
+
+def release_seat(session: Session, seccion_id: int, seats: int = 1) -> None:
+    """Give back ``seats`` seats in ``seccion_id``"""
+    session.execute(
+        update(Seccion)
+        .where(Seccion.seccion_id == seccion_id, Seccion.matriculados >= seats)
+        .values(matriculados=Seccion.matriculados - seats)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def enroll(session: Session, matricula: MatriculaCreate) -> MatriculaRead:
+    """Create a matricula after checking prerequisites and timetable, taking a seat atomically"""
+    check_eligibility(session, matricula.estudiante_id, matricula.seccion_id)
+    if holds_seat(matricula.estado):
+        check_enrollment_schedule(session, matricula.estudiante_id, matricula.seccion_id)
+        reserve_seat(session, matricula.seccion_id)
+
+    try:
+        db_matricula = create_row(session, Matricula, MatriculaRead, matricula)
+        refresh_matriculas(session, [db_matricula.matricula_id])
+        session.commit()
+    except IntegrityError as exc:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=" ".join(str(exc.orig).split())
+        )
+    catalog_cache.invalidate("seccion", [db_matricula.seccion_id])
+    if holds_seat(db_matricula.estado):
+        schedule_index.enrolled(db_matricula.estudiante_id, db_matricula.seccion_id)
+    return db_matricula
+
+
+def change_estado(session: Session, matricula_id: int, estado: str) -> bool:
+    """Take or give back a seat when a matricula enters or leaves ANULADO.
+
+    Must be called before applying the update; the matricula row is locked
+    so that concurrent updates cannot release the same seat twice. Returns
+    whether the matricula exists.
+    """
+    current = session.execute(
+        select(Matricula.estado, Matricula.estudiante_id, Matricula.seccion_id)
+        .where(Matricula.matricula_id == matricula_id)
+        .with_for_update()
+    ).first()
+    if current is None:
+        return False
+    if holds_seat(current.estado) and not holds_seat(estado):
+        release_seat(session, current.seccion_id)
+    elif not holds_seat(current.estado) and holds_seat(estado):
+        check_enrollment_schedule(session, current.estudiante_id, current.seccion_id)
+        reserve_seat(session, current.seccion_id)
+    return True
+
+
+def unenroll(session: Session, matricula_id: int) -> bool:
+    """Delete a matricula and give back its seat; whether it existed.
+
+    The ``DELETE`` locks the row and returns its estado, so a concurrent
+    delete finds nothing and cannot release the same seat twice.
+    """
+    deleted = delete_row(session, Matricula, matricula_id,
+                         Matricula.estado, Matricula.estudiante_id, Matricula.seccion_id)
+    if deleted is None:
+        return False
+    if holds_seat(deleted.estado):
+        release_seat(session, deleted.seccion_id)
+    refresh_matriculas(session, [matricula_id])
+    session.commit()
+    catalog_cache.invalidate("seccion", [deleted.seccion_id])
+    schedule_index.unenrolled(deleted.estudiante_id, deleted.seccion_id)
+    return True
+
+
+def enroll_bulk(session: Session, items: Sequence[MatriculaCreate], atomic: bool = True) -> BulkResult:
+    """Create many matriculas, granting seats per seccion in one step each.
+
+    Items lacking prerequisites are reported and not inserted. The other
+    rows are inserted and checked for timetable clashes; then each affected
+    seccion is locked once, the free seats are granted in payload order and
+    the rows that clash or exceed capacity are removed again within the same
+    transaction and reported as errors. The seccion lock is ``FOR NO
+    KEY UPDATE``: the inserted rows already hold ``KEY SHARE`` on their
+    seccion through the foreign key, and ``FOR UPDATE`` would deadlock two
+    concurrent requests against each other.
+    """
+    if not items:
+        return BulkResult()
+    errors, eligible = [], []
+    for index, missing in enumerate(
+        missing_prerequisites_many(session, [(item.estudiante_id, item.seccion_id) for item in items])
+    ):
+        if missing:
+            detail = f"{MISSING_PREREQUISITES}: cursos {', '.join(map(str, missing))}"
+            errors.append(BulkItemError(index=index, detail=detail))
+        else:
+            eligible.append(index)
+
+    lock_enrollments(session, [
+        (items[index].estudiante_id, items[index].seccion_id) for index in eligible if holds_seat(items[index].estado)
+    ])
+    inserted, insert_errors = insert_rows(session, Matricula, MatriculaRead, [items[index] for index in eligible])
+    # insert_rows numbers the eligible items only
+    created = [(eligible[position], matricula) for position, matricula in inserted]
+    errors.extend(BulkItemError(index=eligible[error.index], detail=error.detail) for error in insert_errors)
+
+    seated = [(index, matricula) for index, matricula in created if holds_seat(matricula.estado)]
+    clashing = []
+    by_seccion = defaultdict(list)
+    for (index, matricula), others in zip(seated, enrollment_clashes(session, [m for _, m in seated])):
+        if others:
+            clashing.append(matricula.matricula_id)
+            detail = f"{SCHEDULE_CONFLICT} with secciones {', '.join(map(str, others))}"
+            errors.append(BulkItemError(index=index, detail=detail))
+        else:
+            by_seccion[matricula.seccion_id].append((index, matricula))
+    if clashing:
+        session.execute(
+            delete(Matricula)
+            .where(Matricula.matricula_id.in_(clashing))
+            .execution_options(synchronize_session=False)
+        )
+
+    rejected = {error.index for error in errors}
+    for seccion_id in sorted(by_seccion):
+        entries = by_seccion[seccion_id]
+        free, activo = session.execute(
+            select(Seccion.capacidad_maxima - Seccion.matriculados, Seccion.activo)
+            .where(Seccion.seccion_id == seccion_id)
+            .with_for_update(key_share=True)
+        ).one()
+        free = max(free, 0) if activo else 0
+        granted, excess = entries[:free], entries[free:]
+
+        if granted:
+            session.execute(
+                update(Seccion)
+                .where(Seccion.seccion_id == seccion_id)
+                .values(matriculados=Seccion.matriculados + len(granted))
+                .execution_options(synchronize_session=False)
+            )
+        if excess:
+            session.execute(
+                delete(Matricula)
+                .where(Matricula.matricula_id.in_([m.matricula_id for _, m in excess]))
+                .execution_options(synchronize_session=False)
+            )
+            detail = SECCION_FULL if activo else SECCION_INACTIVE
+            errors.extend(BulkItemError(index=index, detail=detail) for index, _ in excess)
+            rejected.update(index for index, _ in excess)
+
+    created = [(index, m) for index, m in created if index not in rejected]
+    refresh_matriculas(session, [m.matricula_id for _, m in created])
+    result = finish_bulk(session, created, errors, atomic)
+    catalog_cache.invalidate("seccion", by_seccion)
+    schedule_index.invalidate()
+    return result
+
+
+def lock_secciones(session: Session, seccion_ids: Iterable[int]) -> List[int]:
+    """Lock secciones until commit, in id order; returns the sorted ids.
+
+    ``FOR NO KEY UPDATE`` does not wait on the foreign-key locks of the
+    caller's own inserts, so set-based loads can take it before or after
+    writing their matriculas.
+    """
+    ids: List[int] = sorted(set(seccion_ids))
+    if ids:
+        session.execute(
+            select(Seccion.seccion_id)
+            .where(Seccion.seccion_id.in_(ids))
+            .order_by(Seccion.seccion_id)
+            .with_for_update(key_share=True)
+        ).all()
+    return ids
+
+
+def recount_seats(session: Session, seccion_ids: Iterable[int]) -> None:
+    """Recompute ``matriculados`` from the matricula table for some secciones.
+
+    Used after set-based loads that bypass ``reserve_seat``. The secciones
+    are locked first (see ``lock_secciones``) so the recount, run as a
+    separate statement, sees every enrollment committed before the lock was
+    granted. Exceeding capacity trips the ``ck_matriculados`` constraint and
+    aborts the transaction.
+    """
+    ids = lock_secciones(session, seccion_ids)
+    if not ids:
+        return
+    occupied = (
+        select(func.count())
+        .where(
+            Matricula.seccion_id == Seccion.seccion_id,
+            Matricula.estado != ESTADO_ANULADO,
+        )
+        .scalar_subquery()
+    )
+    session.execute(
+        update(Seccion)
+        .where(Seccion.seccion_id.in_(ids))
+        .values(matriculados=occupied)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,121 @@
+"""Per-seccion gradebook: the roster with its grades, and batch grade uploads.
+
+A professor grading a seccion reads the whole roster in one query and sends
+every grade back in one request, applied as a single
+``INSERT ... ON CONFLICT (matricula_id) DO UPDATE``: new grades are inserted
+and existing ones overwritten, instead of one POST (or PATCH) per student.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import List, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.bulk import BulkItemError
+from app.models.calificacion import (
+    Calificacion,
+    CalificacionRead,
+    NotaSeccionRead,
+    NotaSeccionUpdate,
+    RegistroNotasRead,
+)
+from app.models.estudiante import Estudiante
+from app.models.matricula import Matricula
+from app.models.seccion import Seccion
+from app.services.transcripts import refresh_matriculas
+
+
+def _get_seccion(session: Session, seccion_id: int) -> Seccion:
+    seccion = session.get(Seccion, seccion_id)
+    if not seccion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Seccion not found"
+        )
+    return seccion
+
+
+def get_gradebook(session: Session, seccion_id: int) -> RegistroNotasRead:
+    """Every matricula of the seccion with its calificacion, if graded, by apellido"""
+    seccion = _get_seccion(session, seccion_id)
+    rows = session.execute(
+        select(
+            Matricula.matricula_id,
+            Matricula.estudiante_id,
+            Estudiante.apellido,
+            Estudiante.nombre,
+            Estudiante.dni,
+            Matricula.estado.label("estado_matricula"),
+            Calificacion.calificacion_id,
+            Calificacion.nota,
+            Calificacion.observacion,
+            Calificacion.fecha_actualizacion,
+        )
+        .join(Estudiante, Matricula.estudiante_id == Estudiante.estudiante_id)
+        .outerjoin(Calificacion, Calificacion.matricula_id == Matricula.matricula_id)
+        .where(Matricula.seccion_id == seccion_id)
+        .order_by(Estudiante.apellido, Estudiante.nombre, Matricula.matricula_id)
+    )
+    return RegistroNotasRead(
+        seccion_id=seccion.seccion_id,
+        codigo=seccion.codigo,
+        periodo_academico=seccion.periodo_academico,
+        estudiantes=[NotaSeccionRead.model_validate(row._mapping) for row in rows],
+    )
+
+
+def save_grades(
+    session: Session, seccion_id: int, notas: Sequence[NotaSeccionUpdate]
+) -> List[CalificacionRead]:
+    """Insert or overwrite the grades of a seccion in one statement.
+
+    Every item must name a matricula of the seccion, at most once; otherwise
+    nothing is written and 422 lists the offending items. Both ``nota`` and
+    ``observacion`` are replaced, as with PUT.
+    """
+    _get_seccion(session, seccion_id)
+    if not notas:
+        return []
+
+    enrolled = set(session.exec(
+        select(Matricula.matricula_id).where(
+            Matricula.seccion_id == seccion_id,
+            Matricula.matricula_id.in_({nota.matricula_id for nota in notas}),
+        )
+    ).all())
+    repeated = Counter(nota.matricula_id for nota in notas)
+    errors = [
+        BulkItemError(index=index, detail="Matricula is not enrolled in this seccion")
+        for index, nota in enumerate(notas) if nota.matricula_id not in enrolled
+    ] + [
+        BulkItemError(index=index, detail="Matricula appears more than once")
+        for index, nota in enumerate(notas)
+        if nota.matricula_id in enrolled and repeated[nota.matricula_id] > 1
+    ]
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[error.model_dump() for error in sorted(errors, key=lambda e: e.index)]
+        )
+
+    now = datetime.now()
+    statement = insert(Calificacion).values([
+        {**nota.model_dump(), "fecha_registro": now, "fecha_actualizacion": now}
+        for nota in notas
+    ])
+    # ON CONFLICT bypasses the ORM onupdate, so the version column is set here
+    statement = statement.on_conflict_do_update(
+        index_elements=[Calificacion.matricula_id],
+        set_={
+            "nota": statement.excluded.nota,
+            "observacion": statement.excluded.observacion,
+            "fecha_actualizacion": statement.excluded.fecha_actualizacion,
+        },
+    ).returning(*Calificacion.__table__.columns)
+    rows = session.execute(statement).all()
+
+    refresh_matriculas(session, [row.matricula_id for row in rows])
+    session.commit()
+    return [CalificacionRead.model_validate(row._mapping) for row in rows]
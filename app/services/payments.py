@@ -0,0 +1,229 @@
+"""Running paid balance of each matricula and the PENDIENTE/PAGADO transitions.
+
+Every matricula keeps in ``monto_pagado`` the sum of its PROCESADO pagos.
+Creating, deleting or changing the estado of a pago applies the difference
+with one UPDATE of the matricula, which also moves it to PAGADO once the
+balance covers ``costo`` (or back to PENDIENTE if it no longer does). The
+UPDATE row-locks the matricula until the pago commits, so concurrent pagos
+of one matricula are applied one after the other.
+
+``referencia`` is unique, and ``record_payment`` uses it as an idempotency
+key: a gateway retrying its callback gets the pago it created the first
+time, found with one lookup on the unique index, and nothing is written.
+
+``reconcile_period`` recomputes the balances of a whole periodo from the
+pago table in one set-based statement, repairing writes that bypassed the
+API. Outside PostgreSQL the previous estados are read with a separate
+SELECT first.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import and_, case, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.crud import delete_row
+from app.models.matricula import Matricula
+from app.models.pago import Pago, PagoCreate, PagoRead
+from app.models.seccion import Seccion
+from app.responses import read_columns, select_read_columns
+from app.services.transcripts import refresh_matriculas
+
+ESTADO_PROCESADO = "PROCESADO"
+ESTADO_PENDIENTE = "PENDIENTE"
+ESTADO_PAGADO = "PAGADO"
+
+
+class ConciliacionResult(BaseModel):
+    """Outcome of reconciling the pagos of a periodo"""
+    periodo_academico: str
+    actualizadas: int = 0
+    pagadas: int = 0
+    pendientes: int = 0
+
+
+def counts(estado: Optional[str]) -> bool:
+    """Whether a pago in ``estado`` adds to the paid balance"""
+    return estado == ESTADO_PROCESADO
+
+
+def _settled_estado(balance, costo):
+    """Estado of a matricula given its paid balance; only PENDIENTE/PAGADO move"""
+    return case(
+        (and_(Matricula.estado == ESTADO_PENDIENTE, balance >= costo), ESTADO_PAGADO),
+        (and_(Matricula.estado == ESTADO_PAGADO, balance < costo), ESTADO_PENDIENTE),
+        else_=Matricula.estado,
+    )
+
+
+def apply_payments(session: Session, deltas: Dict[int, Decimal]) -> None:
+    """Add ``deltas`` (matricula_id -> amount, negative to give back) to the balances.
+
+    Runs in the caller's transaction; matriculas whose estado moved get their
+    transcript line refreshed with it.
+    """
+    moved = []
+    for matricula_id in sorted(deltas):
+        balance = Matricula.monto_pagado + deltas[matricula_id]
+        previous = (
+            select(Matricula.estado)
+            .where(Matricula.matricula_id == matricula_id)
+            .scalar_subquery()
+        )
+        row = session.execute(
+            update(Matricula)
+            .where(Matricula.matricula_id == matricula_id)
+            .values(monto_pagado=balance, estado=_settled_estado(balance, Matricula.costo))
+            .returning(Matricula.estado, previous)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row and row[0] != row[1]:
+            moved.append(matricula_id)
+    refresh_matriculas(session, moved)
+
+
+def payment_delta(pagos: Iterable[Tuple[int, Decimal, Optional[str]]]) -> Dict[int, Decimal]:
+    """Balance change per matricula of (matricula_id, monto, estado) pagos"""
+    deltas: Dict[int, Decimal] = defaultdict(Decimal)
+    for matricula_id, monto, estado in pagos:
+        if counts(estado):
+            deltas[matricula_id] += monto
+    return deltas
+
+
+def change_pago_estado(session: Session, pago_id: int, estado: str) -> bool:
+    """Update the balance when a pago enters or leaves PROCESADO.
+
+    Must be called before applying the update; the pago row is locked so
+    that concurrent updates cannot apply the same amount twice. Returns
+    whether the pago exists.
+    """
+    current = session.execute(
+        select(Pago.matricula_id, Pago.monto, Pago.estado)
+        .where(Pago.pago_id == pago_id)
+        .with_for_update()
+    ).first()
+    if current is None:
+        return False
+    if counts(current.estado) != counts(estado):
+        sign = 1 if counts(estado) else -1
+        apply_payments(session, {current.matricula_id: sign * current.monto})
+    return True
+
+
+def remove_payment(session: Session, pago_id: int) -> bool:
+    """Delete a pago and take it off the balance; whether it existed.
+
+    The ``DELETE`` locks the row and returns what it counted for, so a
+    concurrent delete finds nothing and cannot subtract it twice.
+    """
+    deleted = delete_row(session, Pago, pago_id, Pago.matricula_id, Pago.monto, Pago.estado)
+    if deleted is None:
+        return False
+    if counts(deleted.estado):
+        apply_payments(session, {deleted.matricula_id: -deleted.monto})
+    session.commit()
+    return True
+
+
+def settle(session: Session, matricula_ids: List[int]) -> None:
+    """Re-evaluate PENDIENTE/PAGADO after ``costo`` changed"""
+    apply_payments(session, {matricula_id: Decimal("0") for matricula_id in matricula_ids})
+
+
+def _by_referencia(session: Session, referencia: str) -> Optional[PagoRead]:
+    row = session.execute(
+        select_read_columns(select(Pago), PagoRead).where(Pago.referencia == referencia)
+    ).first()
+    return PagoRead.model_validate(row._mapping) if row else None
+
+
+def _replay(pago: PagoRead, data: PagoCreate) -> PagoRead:
+    """The pago already recorded for a retried request, if the request is the same"""
+    if (pago.matricula_id, pago.monto) != (data.matricula_id, data.monto):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="referencia already belongs to a different pago"
+        )
+    return pago
+
+
+def record_payment(session: Session, data: PagoCreate) -> Tuple[PagoRead, bool]:
+    """Insert a pago and apply it to the balance, unless its referencia exists.
+
+    Returns the pago and whether it was created now. Two concurrent requests
+    with the same referencia cannot both insert: the second one waits on the
+    unique index, then skips the insert and returns the first one's pago.
+    """
+    if data.referencia is not None:
+        existing = _by_referencia(session, data.referencia)
+        if existing:
+            return _replay(existing, data), False
+
+    values = Pago.model_validate(data).model_dump(exclude={"pago_id"})
+    row = session.execute(
+        insert(Pago)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=[Pago.referencia])
+        .returning(*read_columns(Pago, PagoRead))
+    ).first()
+    if row is None:
+        return _replay(_by_referencia(session, data.referencia), data), False
+
+    db_pago = PagoRead.model_validate(row._mapping)
+    if counts(db_pago.estado):
+        apply_payments(session, {db_pago.matricula_id: db_pago.monto})
+    session.commit()
+    return db_pago, True
+
+
+def reconcile_period(session: Session, periodo_academico: str) -> ConciliacionResult:
+    """Recompute balance and estado of every matricula of a periodo from its pagos"""
+    m = aliased(Matricula)
+    totals = (
+        select(
+            m.matricula_id,
+            m.estado.label("estado_anterior"),
+            func.coalesce(
+                func.sum(Pago.monto).filter(Pago.estado == ESTADO_PROCESADO), 0
+            ).label("pagado"),
+        )
+        .join(Seccion, m.seccion_id == Seccion.seccion_id)
+        .outerjoin(Pago, Pago.matricula_id == m.matricula_id)
+        .where(Seccion.periodo_academico == periodo_academico)
+        .group_by(m.matricula_id)
+        .subquery()
+    )
+    new_estado = _settled_estado(totals.c.pagado, Matricula.costo)
+    statement = (
+        update(Matricula)
+        .where(
+            Matricula.matricula_id == totals.c.matricula_id,
+            or_(Matricula.monto_pagado != totals.c.pagado, Matricula.estado != new_estado),
+        )
+        .values(monto_pagado=totals.c.pagado, estado=new_estado)
+        .execution_options(synchronize_session=False)
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        rows = session.execute(
+            statement.returning(Matricula.matricula_id, Matricula.estado, totals.c.estado_anterior)
+        ).all()
+        moved = [row for row in rows if row.estado != row.estado_anterior]
+    else:
+        # Other databases cannot return the subquery's columns; read them first
+        anteriores = dict(session.execute(select(totals.c.matricula_id, totals.c.estado_anterior)).all())
+        rows = session.execute(statement.returning(Matricula.matricula_id, Matricula.estado)).all()
+        moved = [row for row in rows if row.estado != anteriores[row.matricula_id]]
+    refresh_matriculas(session, [row.matricula_id for row in moved])
+    session.commit()
+    return ConciliacionResult(
+        periodo_academico=periodo_academico,
+        actualizadas=len(rows),
+        pagadas=sum(1 for row in moved if row.estado == ESTADO_PAGADO),
+        pendientes=sum(1 for row in moved if row.estado == ESTADO_PENDIENTE),
+    )
@@ -0,0 +1,240 @@
+"""In-memory prerequisite graph with transitive closure and eligibility checks.
+
+The ``prerrequisito`` table is small and read on every enrollment, so it is
+loaded once into adjacency sets and the transitive closure of every curso is
+precomputed. Writes through the API invalidate it; a TTL bounds staleness
+when another worker process changed the table.
+"""
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.crud import create_row
+from app.models.calificacion import Calificacion
+from app.models.matricula import Matricula
+from app.models.prerrequisito import Prerrequisito, PrerequisitoCreate, PrerequisitoRead
+from app.models.seccion import Seccion
+
+# Minimum nota to pass a curso (same threshold as v_historial_academico)
+NOTA_APROBATORIA = 11
+
+MISSING_PREREQUISITES = "Missing prerequisites"
+
+Edges = Dict[int, FrozenSet[int]]
+
+
+def _load_edges(session: Session) -> Edges:
+    edges: Dict[int, set] = {}
+    for curso_id, curso_req_id in session.exec(
+        select(Prerrequisito.curso_id, Prerrequisito.curso_req_id)
+    ):
+        edges.setdefault(curso_id, set()).add(curso_req_id)
+    return {curso_id: frozenset(reqs) for curso_id, reqs in edges.items()}
+
+
+def _closure(edges: Edges) -> Edges:
+    """Transitive closure of every node, memoised depth-first.
+
+    Tolerates cycles already present in the table (they can only come from
+    writes that bypassed the API) by not recursing into nodes on the stack.
+    """
+    closure: Dict[int, FrozenSet[int]] = {}
+    on_stack = set()
+
+    def visit(node: int) -> FrozenSet[int]:
+        if node in closure:
+            return closure[node]
+        on_stack.add(node)
+        reached = set()
+        for req in edges.get(node, ()):
+            reached.add(req)
+            if req not in on_stack:
+                reached |= visit(req)
+        on_stack.discard(node)
+        closure[node] = frozenset(reached)
+        return closure[node]
+
+    for node in edges:
+        visit(node)
+    return closure
+
+
+def _reaches(edges: Edges, start: int, target: int) -> bool:
+    stack, seen = [start], set()
+    while stack:
+        node = stack.pop()
+        if node == target:
+            return True
+        if node not in seen:
+            seen.add(node)
+            stack.extend(edges.get(node, ()))
+    return False
+
+
+class PrerequisiteGraph:
+    """Process-wide cache of the prerequisite DAG"""
+
+    def __init__(self, ttl_seconds: int):
+        self._ttl = ttl_seconds
+        # Serialises loads
+        self._lock = threading.Lock()
+        # Guards the state and the generation; never held while loading
+        self._state_lock = threading.Lock()
+        self._state: Optional[Tuple[float, Edges, Edges]] = None
+        # Bumped by invalidate, so a load that started before it is not stored
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        with self._state_lock:
+            self._state = None
+            self._generation += 1
+
+    def _fresh(self) -> Optional[Tuple[float, Edges, Edges]]:
+        state = self._state
+        if state is None or time.monotonic() - state[0] > self._ttl:
+            return None
+        return state
+
+    def _get(self, session: Session) -> Tuple[Edges, Edges]:
+        state = self._fresh()
+        if state is None:
+            with self._lock:
+                state = self._fresh()
+                if state is None:
+                    generation = self._generation
+                    edges = _load_edges(session)
+                    state = (time.monotonic(), edges, _closure(edges))
+                    with self._state_lock:
+                        if generation == self._generation:
+                            self._state = state
+        return state[1], state[2]
+
+    def direct(self, session: Session, curso_id: int) -> FrozenSet[int]:
+        """Cursos that must be passed right before ``curso_id``"""
+        return self._get(session)[0].get(curso_id, frozenset())
+
+    def closure(self, session: Session, curso_id: int) -> FrozenSet[int]:
+        """Every curso ``curso_id`` depends on, directly or transitively"""
+        return self._get(session)[1].get(curso_id, frozenset())
+
+
+prerequisite_graph = PrerequisiteGraph(settings.PRERREQUISITOS_TTL_SECONDS)
+
+
+def passed_cursos(session: Session, estudiante_id: int, curso_ids: Iterable[int]) -> set:
+    """Which of ``curso_ids`` the estudiante has passed"""
+    return set(session.exec(
+        select(Seccion.curso_id)
+        .join(Matricula, Matricula.seccion_id == Seccion.seccion_id)
+        .join(Calificacion, Calificacion.matricula_id == Matricula.matricula_id)
+        .where(
+            Matricula.estudiante_id == estudiante_id,
+            Seccion.curso_id.in_(list(curso_ids)),
+            Calificacion.nota >= NOTA_APROBATORIA,
+        )
+    ).all())
+
+
+def missing_prerequisites(session: Session, estudiante_id: int, curso_id: int) -> List[int]:
+    """Direct prerequisites of ``curso_id`` the estudiante has not passed yet.
+
+    Cursos without prerequisites, the common case, are answered from memory
+    without touching the database.
+    """
+    required = prerequisite_graph.direct(session, curso_id)
+    if not required:
+        return []
+    return sorted(required - passed_cursos(session, estudiante_id, required))
+
+
+def missing_prerequisites_many(session: Session, items: Sequence[Tuple[int, int]]) -> List[List[int]]:
+    """Direct prerequisites each (estudiante_id, seccion_id) lacks, in order.
+
+    For bulk writes: the cursos of the secciones and what the estudiantes
+    concerned have passed are read with one query each. Unknown secciones
+    lack nothing.
+    """
+    if not items:
+        return []
+    cursos = {
+        seccion_id: curso_id
+        for seccion_id, curso_id in session.exec(
+            select(Seccion.seccion_id, Seccion.curso_id)
+            .where(Seccion.seccion_id.in_(sorted({seccion_id for _, seccion_id in items})))
+        )
+    }
+    required = [
+        prerequisite_graph.direct(session, cursos[seccion_id]) if seccion_id in cursos else frozenset()
+        for _, seccion_id in items
+    ]
+    estudiantes = sorted({estudiante_id for (estudiante_id, _), reqs in zip(items, required) if reqs})
+    if not estudiantes:
+        return [[] for _ in items]
+
+    passed = {
+        (estudiante_id, curso_id)
+        for curso_id, estudiante_id in session.exec(
+            select(Seccion.curso_id, Matricula.estudiante_id)
+            .join(Matricula, Matricula.seccion_id == Seccion.seccion_id)
+            .join(Calificacion, Calificacion.matricula_id == Matricula.matricula_id)
+            .where(
+                Matricula.estudiante_id.in_(estudiantes),
+                Seccion.curso_id.in_(sorted(frozenset().union(*required))),
+                Calificacion.nota >= NOTA_APROBATORIA,
+            )
+        )
+    }
+    return [
+        sorted(req for req in reqs if (estudiante_id, req) not in passed)
+        for (estudiante_id, _), reqs in zip(items, required)
+    ]
+
+
+def check_eligibility(session: Session, estudiante_id: int, seccion_id: int) -> None:
+    """Raise 409 if the estudiante lacks prerequisites for the seccion's curso"""
+    curso_id = session.exec(
+        select(Seccion.curso_id).where(Seccion.seccion_id == seccion_id)
+    ).first()
+    if curso_id is None:
+        return  # reserve_seat answers 404
+    missing = missing_prerequisites(session, estudiante_id, curso_id)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": MISSING_PREREQUISITES, "cursos": missing}
+        )
+
+
+def add_prerequisite(session: Session, data: PrerequisitoCreate) -> PrerequisitoRead:
+    """Insert an edge, rejecting it with 409 if it would close a cycle.
+
+    Writers are serialised and the check runs on edges read inside the
+    transaction, so two concurrent inserts cannot build a cycle together.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("LOCK TABLE prerrequisito IN SHARE ROW EXCLUSIVE MODE"))
+    if _reaches(_load_edges(session), data.curso_req_id, data.curso_id):
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Prerrequisito would create a cycle"
+        )
+
+    try:
+        db_prerrequisito = create_row(session, Prerrequisito, PrerequisitoRead, data)
+        session.commit()
+    except IntegrityError as exc:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=" ".join(str(exc.orig).split())
+        )
+    finally:
+        prerequisite_graph.invalidate()
+    return db_prerrequisito
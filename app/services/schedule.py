@@ -0,0 +1,524 @@
+"""Timetable conflict detection for secciones, aulas, profesores and estudiantes.
+
+``horario`` ("08:00-10:00", several ranges separated by commas) and ``dias``
+("LU,MI,VI", "Lunes y Jueves", "L-X-V") are parsed into a weekly bitmap of
+15-minute slots: 7 days x 96 slots, one bit each, held in a Python int. Two
+timetables clash iff their bitmaps share a bit.
+
+Per periodo, an in-process index keeps the bitmap of every seccion plus the
+union of the bitmaps booked on each aula, profesor and estudiante, so that a
+new seccion or matricula is checked with a single AND per resource. Only on
+a clash are the individual secciones scanned to report which ones collide.
+Like the prerequisite graph, the index is updated or invalidated by local
+writes and reloaded after a TTL to pick up other workers' writes.
+
+The index only rejects early. A write it lets through takes a transaction
+advisory lock on each (periodo, resource) it books and is checked again
+against the rows of that resource in the database, so two concurrent
+writers, in this worker or another, cannot both book the same slots.
+"""
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import combinations
+from typing import Any, Callable, Collection, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, or_, text
+from sqlmodel import Session, select
+
+from app.cache import KeyedLock
+from app.config import settings
+from app.models.horario import ConflictoHorario, ReporteConflictos, TipoConflicto
+from app.models.matricula import Matricula
+from app.models.seccion import Seccion, SeccionBase
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+_DAYS = {
+    "L": 0, "LU": 0, "LUN": 0, "LUNES": 0,
+    "M": 1, "MA": 1, "MAR": 1, "MARTES": 1,
+    "X": 2, "MI": 2, "MIE": 2, "MIER": 2, "MIERCOLES": 2,
+    "J": 3, "JU": 3, "JUE": 3, "JUEVES": 3,
+    "V": 4, "VI": 4, "VIE": 4, "VIERNES": 4,
+    "S": 5, "SA": 5, "SAB": 5, "SABADO": 5,
+    "D": 6, "DO": 6, "DOM": 6, "DOMINGO": 6,
+}
+_DAY_SEPARATORS = re.compile(r"[\s,;/\-]+")
+_TIME_RANGE = re.compile(r"(\d{1,2})(?:[:.h](\d{2}))?\s*(?:-|a|–)\s*(\d{1,2})(?:[:.h](\d{2}))?")
+
+
+class ScheduleFormatError(ValueError):
+    """``horario`` or ``dias`` is not in a recognised format"""
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).upper()
+
+
+def parse_dias(dias: str) -> List[int]:
+    """Weekday numbers (0 = lunes) named in ``dias``"""
+    days = set()
+    for token in _DAY_SEPARATORS.split(_normalize(dias)):
+        if not token or token == "Y":
+            continue
+        if token not in _DAYS:
+            raise ScheduleFormatError(f"Unknown day {token!r} in dias")
+        days.add(_DAYS[token])
+    if not days:
+        raise ScheduleFormatError("dias names no day")
+    return sorted(days)
+
+
+def parse_horario(horario: str) -> List[Tuple[int, int]]:
+    """``[start, end)`` slot ranges of the day covered by ``horario``"""
+    ranges = []
+    for part in horario.split(","):
+        match = _TIME_RANGE.fullmatch(part.strip())
+        if not match:
+            raise ScheduleFormatError(f"Cannot read time range {part.strip()!r} in horario")
+        h1, m1, h2, m2 = (int(g) if g else 0 for g in match.groups())
+        start, end = h1 * 60 + m1, h2 * 60 + m2
+        if m1 > 59 or m2 > 59 or not 0 <= start < end <= 24 * 60:
+            raise ScheduleFormatError(f"Invalid time range {part.strip()!r} in horario")
+        # Round outwards to whole slots so partial overlaps are still caught
+        ranges.append((start // SLOT_MINUTES, -(-end // SLOT_MINUTES)))
+    return ranges
+
+
+def weekly_bitmap(horario: Optional[str], dias: Optional[str]) -> int:
+    """Bitmap of the week slots used by a seccion; 0 when it has no timetable.
+
+    Raises ``ScheduleFormatError`` if only one of the fields is set or either
+    cannot be parsed.
+    """
+    if not horario and not dias:
+        return 0
+    if not horario or not dias:
+        raise ScheduleFormatError("horario and dias must be given together")
+    bitmap = 0
+    ranges = parse_horario(horario)
+    for day in parse_dias(dias):
+        for start, end in ranges:
+            bitmap |= ((1 << (end - start)) - 1) << (day * SLOTS_PER_DAY + start)
+    return bitmap
+
+
+def _aula_key(aula: Optional[str]) -> Optional[str]:
+    return " ".join(aula.split()).upper() if aula and aula.strip() else None
+
+
+class SlotIndex:
+    """Secciones booked per resource, with the union bitmap of each resource"""
+
+    def __init__(self):
+        self._members: Dict[Hashable, Dict[int, int]] = {}
+        self._union: Dict[Hashable, int] = {}
+
+    def add(self, key: Hashable, seccion_id: int, bitmap: int) -> None:
+        if key is None or not bitmap:
+            return
+        self._members.setdefault(key, {})[seccion_id] = bitmap
+        self._union[key] = self._union.get(key, 0) | bitmap
+
+    def remove(self, key: Hashable, seccion_id: int) -> None:
+        members = self._members.get(key)
+        if not members or members.pop(seccion_id, None) is None:
+            return
+        union = 0
+        for bitmap in members.values():
+            union |= bitmap
+        self._union[key] = union
+
+    def conflicts(self, key: Hashable, bitmap: int, ignore: Optional[int] = None) -> List[int]:
+        """Secciones booked on ``key`` overlapping ``bitmap``"""
+        if key is None or not self._union.get(key, 0) & bitmap:
+            return []
+        return sorted(
+            seccion_id for seccion_id, other in self._members[key].items()
+            if seccion_id != ignore and other & bitmap
+        )
+
+    def pairs(self) -> Iterable[Tuple[Hashable, int, int]]:
+        """Every overlapping pair of secciones on the same resource"""
+        for key, members in self._members.items():
+            for (a, bitmap_a), (b, bitmap_b) in combinations(sorted(members.items()), 2):
+                if bitmap_a & bitmap_b:
+                    yield key, a, b
+
+
+class PeriodSchedule:
+    """Bitmaps of one periodo, indexed by aula, profesor and estudiante"""
+
+    def __init__(self):
+        self.bitmaps: Dict[int, int] = {}
+        self.invalid: List[int] = []
+        self.aulas = SlotIndex()
+        self.profesores = SlotIndex()
+        self.estudiantes = SlotIndex()
+
+    def add_seccion(self, seccion_id: int, aula: Optional[str], profesor_id: int, bitmap: int):
+        self.bitmaps[seccion_id] = bitmap
+        self.aulas.add(_aula_key(aula), seccion_id, bitmap)
+        self.profesores.add(profesor_id, seccion_id, bitmap)
+
+    def add_matricula(self, estudiante_id: int, seccion_id: int):
+        self.estudiantes.add(estudiante_id, seccion_id, self.bitmaps.get(seccion_id, 0))
+
+    def remove_matricula(self, estudiante_id: int, seccion_id: int):
+        self.estudiantes.remove(estudiante_id, seccion_id)
+
+
+def _load_period(session: Session, periodo: str) -> PeriodSchedule:
+    schedule = PeriodSchedule()
+    for seccion_id, aula, profesor_id, horario, dias in session.exec(
+        select(Seccion.seccion_id, Seccion.aula, Seccion.profesor_id, Seccion.horario, Seccion.dias)
+        .where(Seccion.periodo_academico == periodo, Seccion.activo == True)  # noqa: E712
+    ):
+        try:
+            bitmap = weekly_bitmap(horario, dias)
+        except ScheduleFormatError:
+            schedule.invalid.append(seccion_id)
+            continue
+        schedule.add_seccion(seccion_id, aula, profesor_id, bitmap)
+
+    # Same rule as app.services.enrollment.holds_seat
+    for estudiante_id, seccion_id in session.exec(
+        select(Matricula.estudiante_id, Matricula.seccion_id)
+        .join(Seccion, Matricula.seccion_id == Seccion.seccion_id)
+        .where(Seccion.periodo_academico == periodo, Matricula.estado != "ANULADO")
+    ):
+        schedule.add_matricula(estudiante_id, seccion_id)
+    return schedule
+
+
+class ScheduleIndex:
+    """Process-wide cache of ``PeriodSchedule`` per periodo.
+
+    Each periodo is loaded, read and updated under its own lock, so loading
+    a cold or expired periodo only holds up the writers of that periodo.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self._ttl = ttl_seconds
+        # Guards the dict and the generation; never held while loading
+        self._lock = threading.Lock()
+        self._period_locks = KeyedLock()
+        self._periods: Dict[str, Tuple[float, PeriodSchedule]] = {}
+        # Bumped by invalidate, so a load that started before it is not stored
+        self._generation = 0
+
+    def invalidate(self, periodo: Optional[str] = None) -> None:
+        """Drop one periodo, or every periodo after set-based writes"""
+        with self._lock:
+            if periodo is None:
+                self._periods.clear()
+            else:
+                self._periods.pop(periodo, None)
+            self._generation += 1
+
+    def _fresh(self, periodo: str) -> Optional[Tuple[float, PeriodSchedule]]:
+        entry = self._periods.get(periodo)
+        if entry is None or time.monotonic() - entry[0] > self._ttl:
+            return None
+        return entry
+
+    @contextmanager
+    def period(self, session: Session, periodo: str) -> Iterator[PeriodSchedule]:
+        """The schedule of ``periodo``, held locked while in use"""
+        with self._period_locks.hold(periodo):
+            entry = self._fresh(periodo)
+            if entry is None:
+                generation = self._generation
+                entry = (time.monotonic(), _load_period(session, periodo))
+                with self._lock:
+                    if generation == self._generation:
+                        self._periods[periodo] = entry
+            yield entry[1]
+
+    def _update(self, seccion_id: int, change: Callable[[PeriodSchedule], None]) -> None:
+        """Apply ``change`` to the loaded schedule holding ``seccion_id``, if any"""
+        with self._lock:
+            periodo = next(
+                (periodo for periodo, (_, schedule) in self._periods.items() if seccion_id in schedule.bitmaps),
+                None,
+            )
+        if periodo is None:
+            return
+        with self._period_locks.hold(periodo):
+            entry = self._periods.get(periodo)
+            if entry:
+                change(entry[1])
+
+    def enrolled(self, estudiante_id: int, seccion_id: int) -> None:
+        """Record a committed matricula holding a seat"""
+        self._update(seccion_id, lambda schedule: schedule.add_matricula(estudiante_id, seccion_id))
+
+    def unenrolled(self, estudiante_id: int, seccion_id: int) -> None:
+        """Forget a matricula that was deleted or became ANULADO"""
+        self._update(seccion_id, lambda schedule: schedule.remove_matricula(estudiante_id, seccion_id))
+
+
+schedule_index = ScheduleIndex(settings.HORARIOS_TTL_SECONDS)
+
+
+def _conflict(conflictos: List[ConflictoHorario]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "message": "Schedule conflict",
+            "conflictos": [conflicto.model_dump(mode="json") for conflicto in conflictos],
+        }
+    )
+
+
+def _lock_id(key: Tuple) -> int:
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def lock_bookings(session: Session, keys: Iterable[Tuple]) -> None:
+    """Serialise the writers booking the same (periodo, resource) until commit.
+
+    Takes one transaction-level advisory lock per key, in a fixed order so
+    that writers sharing several keys cannot deadlock. PostgreSQL only; the
+    SQLite fallback is for single-user development and is not locked.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    ids = sorted({_lock_id(key) for key in keys})
+    if ids:
+        session.execute(
+            text("SELECT pg_advisory_xact_lock(k) FROM (SELECT unnest(CAST(:ids AS bigint[])) AS k ORDER BY k) AS locks"),
+            {"ids": ids}
+        ).all()
+
+
+def _stored_bitmap(horario: Optional[str], dias: Optional[str]) -> int:
+    # Unreadable timetables book nothing, as in _load_period
+    try:
+        return weekly_bitmap(horario, dias)
+    except ScheduleFormatError:
+        return 0
+
+
+def _seccion_conflicts(
+    session: Session,
+    seccion: SeccionBase,
+    seccion_id: Optional[int],
+    aula: Optional[str],
+    bitmap: int,
+) -> List[ConflictoHorario]:
+    """Clashes of ``seccion`` with the aula and profesor bookings stored in the database"""
+    same_resource = Seccion.profesor_id == seccion.profesor_id
+    if aula:
+        # A superset of _aula_key matches, narrowed exactly below
+        same_resource = or_(
+            same_resource, func.upper(func.replace(Seccion.aula, " ", "")) == aula.replace(" ", "")
+        )
+    statement = select(Seccion.seccion_id, Seccion.aula, Seccion.profesor_id, Seccion.horario, Seccion.dias).where(
+        Seccion.periodo_academico == seccion.periodo_academico,
+        Seccion.activo == True,  # noqa: E712
+        same_resource,
+    )
+    if seccion_id is not None:
+        statement = statement.where(Seccion.seccion_id != seccion_id)
+    aulas, profesores = [], []
+    for other_id, other_aula, profesor_id, horario, dias in session.exec(statement.order_by(Seccion.seccion_id)):
+        if not _stored_bitmap(horario, dias) & bitmap:
+            continue
+        if aula and _aula_key(other_aula) == aula:
+            aulas.append(ConflictoHorario(tipo=TipoConflicto.AULA, recurso=aula,
+                                          seccion_id=seccion_id, seccion_conflicto_id=other_id))
+        if profesor_id == seccion.profesor_id:
+            profesores.append(ConflictoHorario(tipo=TipoConflicto.PROFESOR, recurso=str(profesor_id),
+                                               seccion_id=seccion_id, seccion_conflicto_id=other_id))
+    return aulas + profesores
+
+
+def check_seccion_schedule(session: Session, seccion: SeccionBase, seccion_id: Optional[int] = None) -> None:
+    """Raise 422 for an unreadable timetable, 409 if the aula or profesor is taken.
+
+    ``seccion`` holds the values to be written; pass the ``seccion_id`` of an
+    existing seccion so its current booking is not reported against itself.
+    Call it before modifying the row so an autoflush cannot leak the new
+    values into the index, and in the transaction that writes it: when the
+    index finds no clash, the aula and profesor are locked and checked again
+    against the database, which also sees what other workers committed.
+    """
+    try:
+        bitmap = weekly_bitmap(seccion.horario, seccion.dias)
+    except ScheduleFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    if not bitmap or not seccion.activo:
+        return
+
+    aula = _aula_key(seccion.aula)
+    periodo = seccion.periodo_academico
+    with schedule_index.period(session, periodo) as schedule:
+        conflictos = [
+            ConflictoHorario(tipo=TipoConflicto.AULA, recurso=aula,
+                             seccion_id=seccion_id, seccion_conflicto_id=other)
+            for other in schedule.aulas.conflicts(aula, bitmap, ignore=seccion_id)
+        ] + [
+            ConflictoHorario(tipo=TipoConflicto.PROFESOR, recurso=str(seccion.profesor_id),
+                             seccion_id=seccion_id, seccion_conflicto_id=other)
+            for other in schedule.profesores.conflicts(seccion.profesor_id, bitmap, ignore=seccion_id)
+        ]
+    if not conflictos:
+        keys = [("profesor", periodo, seccion.profesor_id)] + ([("aula", periodo, aula)] if aula else [])
+        lock_bookings(session, keys)
+        conflictos = _seccion_conflicts(session, seccion, seccion_id, aula, bitmap)
+        if conflictos:
+            schedule_index.invalidate(periodo)
+    if conflictos:
+        raise _conflict(conflictos)
+
+
+def _secciones(session: Session, seccion_ids: Iterable[int]) -> Dict[int, Tuple[str, int]]:
+    """Periodo and bitmap of each seccion; inactive ones book nothing"""
+    return {
+        seccion_id: (periodo, _stored_bitmap(horario, dias) if activo else 0)
+        for seccion_id, periodo, horario, dias, activo in session.exec(
+            select(Seccion.seccion_id, Seccion.periodo_academico, Seccion.horario, Seccion.dias, Seccion.activo)
+            .where(Seccion.seccion_id.in_(sorted(set(seccion_ids))))
+        )
+    }
+
+
+def _lock_estudiantes(session: Session, items: Iterable[Tuple[int, int]], secciones: Dict[int, Tuple[str, int]]):
+    lock_bookings(session, [
+        ("estudiante", secciones[seccion_id][0], estudiante_id)
+        for estudiante_id, seccion_id in items if seccion_id in secciones
+    ])
+
+
+def _enrollment_conflicts(
+    session: Session,
+    items: Sequence[Tuple[int, int]],
+    secciones: Dict[int, Tuple[str, int]],
+    exclude: Collection[int],
+) -> List[List[int]]:
+    """Secciones each (estudiante_id, seccion_id) clashes with, from the database.
+
+    Items are checked in order, each one also against the earlier items that
+    passed. Matriculas in ``exclude`` (the items themselves, when already
+    inserted) are not counted as bookings.
+    """
+    known = [(estudiante_id, seccion_id) for estudiante_id, seccion_id in items if seccion_id in secciones]
+    if not known:
+        return [[] for _ in items]
+    _lock_estudiantes(session, known, secciones)
+
+    booked: Dict[Tuple[str, int], List[Tuple[int, int]]] = defaultdict(list)
+    # Same rule as app.services.enrollment.holds_seat
+    for matricula_id, estudiante_id, seccion_id, periodo, horario, dias in session.exec(
+        select(Matricula.matricula_id, Matricula.estudiante_id, Matricula.seccion_id,
+               Seccion.periodo_academico, Seccion.horario, Seccion.dias)
+        .join(Seccion, Matricula.seccion_id == Seccion.seccion_id)
+        .where(
+            Matricula.estudiante_id.in_(sorted({estudiante_id for estudiante_id, _ in known})),
+            Seccion.periodo_academico.in_(sorted({periodo for periodo, _ in secciones.values()})),
+            Seccion.activo == True,  # noqa: E712
+            Matricula.estado != "ANULADO",
+        )
+    ):
+        if matricula_id not in exclude:
+            booked[periodo, estudiante_id].append((seccion_id, _stored_bitmap(horario, dias)))
+
+    clashes = []
+    for estudiante_id, seccion_id in items:
+        if seccion_id not in secciones:
+            clashes.append([])
+            continue
+        periodo, bitmap = secciones[seccion_id]
+        bookings = booked[periodo, estudiante_id]
+        others = sorted(other for other, other_bitmap in bookings if other != seccion_id and other_bitmap & bitmap)
+        if not others:
+            bookings.append((seccion_id, bitmap))
+        clashes.append(others)
+    return clashes
+
+
+def _enrollment_conflictos(estudiante_id: int, seccion_id: int, others: List[int]) -> List[ConflictoHorario]:
+    return [
+        ConflictoHorario(tipo=TipoConflicto.ESTUDIANTE, recurso=str(estudiante_id),
+                         seccion_id=seccion_id, seccion_conflicto_id=other)
+        for other in others
+    ]
+
+
+def check_enrollment_schedule(session: Session, estudiante_id: int, seccion_id: int) -> None:
+    """Raise 409 if the seccion overlaps another one the estudiante holds a seat in.
+
+    Call it in the transaction that takes the seat: when the index finds no
+    clash, the estudiante is locked for the periodo and checked again against
+    the database, which also sees what other workers committed.
+    """
+    secciones = _secciones(session, [seccion_id])
+    if seccion_id not in secciones:
+        return  # reserve_seat answers 404
+    periodo = secciones[seccion_id][0]
+
+    with schedule_index.period(session, periodo) as schedule:
+        others = schedule.estudiantes.conflicts(
+            estudiante_id, schedule.bitmaps.get(seccion_id, 0), ignore=seccion_id
+        )
+    if not others:
+        others = _enrollment_conflicts(session, [(estudiante_id, seccion_id)], secciones, ())[0]
+        if others:
+            schedule_index.invalidate(periodo)
+    if others:
+        raise _conflict(_enrollment_conflictos(estudiante_id, seccion_id, others))
+
+
+def lock_enrollments(session: Session, items: Sequence[Tuple[int, int]]) -> None:
+    """Lock the (periodo, estudiante) of each (estudiante_id, seccion_id) until commit.
+
+    Bulk writes call it before inserting, so they take the locks in the same
+    order as ``check_enrollment_schedule``: lock first, then write the row.
+    """
+    _lock_estudiantes(session, items, _secciones(session, [seccion_id for _, seccion_id in items]))
+
+
+def enrollment_clashes(session: Session, matriculas: Sequence[Any]) -> List[List[int]]:
+    """Secciones each of the inserted ``matriculas`` clashes with, in payload order.
+
+    For bulk writes, after ``lock_enrollments``: the matriculas are checked
+    against the database only, each against the estudiante's other seats and
+    the earlier ones that pass.
+    """
+    secciones = _secciones(session, [matricula.seccion_id for matricula in matriculas])
+    return _enrollment_conflicts(
+        session,
+        [(matricula.estudiante_id, matricula.seccion_id) for matricula in matriculas],
+        secciones,
+        {matricula.matricula_id for matricula in matriculas},
+    )
+
+
+def conflict_report(session: Session, periodo: str) -> ReporteConflictos:
+    """Every overlapping pair of secciones per aula, profesor and estudiante in ``periodo``"""
+    # The report reads the database directly rather than a possibly stale index
+    schedule = _load_period(session, periodo)
+    conflictos = []
+    for tipo, index in (
+        (TipoConflicto.AULA, schedule.aulas),
+        (TipoConflicto.PROFESOR, schedule.profesores),
+        (TipoConflicto.ESTUDIANTE, schedule.estudiantes),
+    ):
+        conflictos.extend(
+            ConflictoHorario(tipo=tipo, recurso=str(key), seccion_id=a, seccion_conflicto_id=b)
+            for key, a, b in index.pairs()
+        )
+    return ReporteConflictos(
+        periodo_academico=periodo,
+        conflictos=conflictos,
+        sin_horario_valido=sorted(schedule.invalid),
+    )
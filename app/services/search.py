@@ -0,0 +1,148 @@
+"""Ranked search of estudiantes and profesores by partial name, DNI or email.
+
+The query is normalized like the indexed columns (see app.models.busqueda)
+and matched in one of two ways:
+
+* as a prefix of "nombre apellido", of apellido, of the DNI or of the
+  email, served by the b-tree prefix indexes; an exact DNI ranks first;
+* if that leaves places free, with ``pg_trgm`` and three or more
+  characters, as a substring of the whole document or a fuzzy word match
+  (``<%``), both served by the trigram GIN index and ranked by
+  ``word_similarity``.
+
+On other databases the prefix search runs on ``lower()`` without accent
+folding or indexes.
+"""
+import threading
+from typing import Any, List, Optional, Tuple, Type
+
+from sqlalchemy import case, func, literal, literal_column, or_, text, union
+from sqlmodel import Session, SQLModel, select
+
+from app.models.busqueda import (
+    ACCENTED,
+    DOCUMENT,
+    EMAIL,
+    FULL_NAME,
+    PLAIN,
+    SURNAME,
+    normalized_sql,
+    prefix_sql,
+)
+from app.responses import select_read_columns
+
+# Shortest query matched as a substring; shorter ones only match prefixes
+MIN_TRIGRAM_LENGTH = 3
+
+_FOLD = str.maketrans(ACCENTED, PLAIN)
+_trigram: Optional[bool] = None
+_trigram_lock = threading.Lock()
+
+
+def normalize(query: str) -> str:
+    """``query`` as the indexed columns store it: lower case, no accents, single spaces"""
+    return " ".join(query.lower().translate(_FOLD).split())
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def trigram_available(session: Session) -> bool:
+    """Whether ``pg_trgm`` is installed; checked once per process"""
+    global _trigram
+    if _trigram is None:
+        with _trigram_lock:
+            if _trigram is None:
+                _trigram = session.get_bind().dialect.name == "postgresql" and bool(session.execute(
+                    text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+                ).scalar())
+    return _trigram
+
+
+def _text(model: Type[SQLModel], columns: Tuple[str, ...], postgresql: bool, prefix: bool = False):
+    """A searchable text in the same form as its index"""
+    if postgresql:
+        return literal_column(prefix_sql(columns) if prefix else normalized_sql(columns))
+    joined = getattr(model, columns[0])
+    for name in columns[1:]:
+        joined = joined + " " + getattr(model, name)
+    return func.lower(joined)
+
+
+def _pk(model: Type[SQLModel]):
+    return getattr(model, model.__table__.primary_key.columns.keys()[0])
+
+
+def _prefix_matches(session: Session, model, read_model, normalized: str, raw: str, postgresql: bool, limit: int):
+    """Rows whose name, apellido, DNI or email starts with the query, exact DNI first.
+
+    Each prefix is read in index order and cut at ``limit`` before ranking,
+    so a short, common prefix costs four small index range scans.
+    """
+    prefix = _escape_like(normalized) + "%"
+    branches = []
+    for expression, pattern in (
+        (_text(model, FULL_NAME, postgresql, prefix=True), prefix),
+        (_text(model, SURNAME, postgresql, prefix=True), prefix),
+        (model.dni.collate("C") if postgresql else model.dni, _escape_like(raw) + "%"),
+        (_text(model, EMAIL, postgresql, prefix=True), prefix),
+    ):
+        branch = (
+            select_read_columns(select(model), read_model)
+            .where(expression.like(pattern, escape="\\"))
+            .order_by(expression)
+            .limit(limit)
+            .subquery()
+        )
+        branches.append(select(*branch.c))
+    matches = union(*branches).subquery()
+    pk = matches.c[_pk(model).key]
+    return session.execute(
+        select(matches)
+        .order_by(case((matches.c.dni == raw, 0), else_=1), matches.c.apellido, matches.c.nombre, pk)
+        .limit(limit)
+    ).all()
+
+
+def _similar_matches(session: Session, model, read_model, normalized: str, limit: int):
+    """Rows containing the query, or a word close to it, by trigram similarity"""
+    document = _text(model, DOCUMENT, True)
+    return session.execute(
+        select_read_columns(select(model), read_model)
+        .where(or_(
+            document.like(f"%{_escape_like(normalized)}%", escape="\\"),
+            literal(normalized).op("<%")(document),
+        ))
+        .order_by(func.word_similarity(normalized, document).desc(), model.apellido, _pk(model))
+        .limit(limit)
+    ).all()
+
+
+def search_people(
+    session: Session,
+    model: Type[SQLModel],
+    read_model: Type[SQLModel],
+    query: str,
+    limit: int,
+) -> List[Any]:
+    """Best ``limit`` matches of ``query`` among the rows of ``model``, as read-model rows.
+
+    Prefix matches come first; the trigram search only runs to fill the
+    remaining places.
+    """
+    postgresql = session.get_bind().dialect.name == "postgresql"
+    normalized = normalize(query)
+    if not normalized:
+        return []
+
+    rows = list(_prefix_matches(session, model, read_model, normalized, query.strip(), postgresql, limit))
+    if len(rows) < limit and len(normalized) >= MIN_TRIGRAM_LENGTH and trigram_available(session):
+        pk = _pk(model).key
+        seen = {getattr(row, pk) for row in rows}
+        for row in _similar_matches(session, model, read_model, normalized, limit):
+            if len(rows) == limit:
+                break
+            if getattr(row, pk) not in seen:
+                rows.append(row)
+    return rows
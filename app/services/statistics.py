@@ -0,0 +1,112 @@
+"""Enrollment statistics served from the ``mv_estadisticas_matricula`` materialized view.
+
+The view is refreshed with ``REFRESH MATERIALIZED VIEW CONCURRENTLY`` so
+readers are never blocked, either on a schedule by ``StatisticsRefresher``
+or on demand. Between refreshes the figures may lag behind the latest
+writes by at most ``ESTADISTICAS_REFRESH_SECONDS``.
+"""
+import logging
+import threading
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, text
+from sqlmodel import Session
+
+from app.config import settings
+from app.database import engine
+from app.models.estadistica import (
+    EstadisticaMatriculaRead,
+    NivelEstadistica,
+    mv_estadisticas_matricula,
+)
+
+logger = logging.getLogger(__name__)
+
+# Serialises refreshes across worker processes sharing the database
+_REFRESH_LOCK_KEY = 0x65737461  # "esta"
+
+
+def _require_postgresql(session: Session):
+    if session.get_bind().dialect.name != "postgresql":
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Enrollment statistics require PostgreSQL"
+        )
+
+
+def get_statistics(
+    session: Session,
+    nivel: NivelEstadistica,
+    periodo_academico: Optional[str] = None,
+    facultad_id: Optional[int] = None,
+    carrera_id: Optional[int] = None,
+) -> List[EstadisticaMatriculaRead]:
+    """Read the precomputed rows of one aggregation level"""
+    _require_postgresql(session)
+    mv = mv_estadisticas_matricula.c
+    statement = (
+        select(*[c for c in mv if c.name != "grupo_id"])
+        .where(mv.nivel == nivel.value)
+        .order_by(mv.periodo_academico, mv.grupo_id)
+    )
+    if periodo_academico is not None:
+        statement = statement.where(mv.periodo_academico == periodo_academico)
+    if facultad_id is not None:
+        statement = statement.where(mv.facultad_id == facultad_id)
+    if carrera_id is not None:
+        statement = statement.where(mv.carrera_id == carrera_id)
+    return [
+        EstadisticaMatriculaRead.model_validate(row._mapping)
+        for row in session.execute(statement)
+    ]
+
+
+def refresh_statistics(session: Session) -> bool:
+    """Refresh the view unless another process is already doing it.
+
+    Returns whether this call performed the refresh.
+    """
+    _require_postgresql(session)
+    locked = session.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _REFRESH_LOCK_KEY}
+    ).scalar()
+    if locked:
+        session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_estadisticas_matricula"))
+    session.commit()
+    return bool(locked)
+
+
+class StatisticsRefresher:
+    """Daemon thread refreshing the statistics view every ``interval`` seconds"""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0 or engine.dialect.name != "postgresql":
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="statistics-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with Session(engine) as session:
+                    refresh_statistics(session)
+            except Exception:
+                logger.exception("Refreshing mv_estadisticas_matricula failed")
+
+
+statistics_refresher = StatisticsRefresher(settings.ESTADISTICAS_REFRESH_SECONDS)
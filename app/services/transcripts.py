@@ -0,0 +1,145 @@
+"""Per-student transcripts served from the ``historial_academico`` summary table.
+
+Each matricula has one precomputed transcript line with the curso, carrera,
+periodo and nota it would take a five-table join to assemble. The writers of
+those tables call the ``refresh_*`` helpers inside their own transaction, so
+the summary commits (or rolls back) together with the change that made it
+stale and a transcript read is one lookup on ``idx_historial_estudiante``.
+"""
+from typing import Collection
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, delete, insert, literal_column
+from sqlmodel import Session, select
+
+from app.models.calificacion import Calificacion
+from app.models.carrera import Carrera
+from app.models.curso import Curso
+from app.models.estudiante import Estudiante
+from app.models.historial import HistorialAcademico, HistorialAcademicoRead, HistorialCursoRead
+from app.models.matricula import Matricula
+from app.models.seccion import Seccion
+from app.services.prerequisites import NOTA_APROBATORIA
+
+# Same classification as v_historial_academico
+_ESTADO = case(
+    (Calificacion.nota >= NOTA_APROBATORIA, literal_column("'APROBADO'")),
+    (Calificacion.nota > 0, literal_column("'DESAPROBADO'")),
+    else_=literal_column("'PENDIENTE'"),
+)
+
+
+def _source():
+    """The transcript lines as computed from the base tables"""
+    return (
+        select(
+            Matricula.matricula_id,
+            Matricula.estudiante_id,
+            Seccion.seccion_id,
+            Curso.curso_id,
+            Carrera.carrera_id,
+            Curso.codigo,
+            Curso.nombre,
+            Curso.creditos,
+            Curso.nivel_semestre,
+            Carrera.nombre,
+            Seccion.periodo_academico,
+            Matricula.estado,
+            Calificacion.nota,
+            _ESTADO,
+        )
+        .join(Seccion, Matricula.seccion_id == Seccion.seccion_id)
+        .join(Curso, Seccion.curso_id == Curso.curso_id)
+        .join(Carrera, Curso.carrera_id == Carrera.carrera_id)
+        .outerjoin(Calificacion, Calificacion.matricula_id == Matricula.matricula_id)
+    )
+
+
+# Flag left in ``session.info`` by transactions that rewrote transcript lines
+HISTORIAL_CHANGED = "historial_changed"
+
+_COLUMNS = [
+    "matricula_id", "estudiante_id", "seccion_id", "curso_id", "carrera_id",
+    "codigo_curso", "nombre_curso", "creditos", "nivel_semestre", "carrera",
+    "periodo_academico", "estado_matricula", "nota", "estado",
+]
+
+
+def _refresh(session: Session, stale, current) -> None:
+    """Replace the lines matching ``stale`` with the source rows matching ``current``"""
+    session.flush()
+    session.execute(
+        delete(HistorialAcademico).where(stale).execution_options(synchronize_session=False)
+    )
+    session.execute(
+        insert(HistorialAcademico).from_select(_COLUMNS, _source().where(current))
+    )
+    session.info[HISTORIAL_CHANGED] = True
+
+
+def refresh_matriculas(session: Session, matricula_ids: Collection[int]) -> None:
+    """Recompute the transcript lines of some matriculas (deleted ones are dropped)"""
+    ids = list(matricula_ids)
+    if ids:
+        _refresh(
+            session,
+            HistorialAcademico.matricula_id.in_(ids),
+            Matricula.matricula_id.in_(ids),
+        )
+
+
+def refresh_matriculas_where(session: Session, matricula_ids) -> None:
+    """Recompute the lines of the matriculas returned by a ``select`` of ids"""
+    _refresh(
+        session,
+        HistorialAcademico.matricula_id.in_(matricula_ids),
+        Matricula.matricula_id.in_(matricula_ids),
+    )
+
+
+# Columns copied into the transcript lines, per source table
+_SECCION_FIELDS = {"curso_id", "periodo_academico"}
+_CURSO_FIELDS = {"carrera_id", "codigo", "nombre", "creditos", "nivel_semestre"}
+_CARRERA_FIELDS = {"nombre"}
+
+
+def refresh_seccion(session: Session, seccion_id: int, changed: Collection[str]) -> None:
+    """Recompute the lines of a seccion if ``changed`` fields are copied into them"""
+    if _SECCION_FIELDS.intersection(changed):
+        _refresh(session, HistorialAcademico.seccion_id == seccion_id, Seccion.seccion_id == seccion_id)
+
+
+def refresh_curso(session: Session, curso_id: int, changed: Collection[str]) -> None:
+    """Recompute the lines of a curso if ``changed`` fields are copied into them"""
+    if _CURSO_FIELDS.intersection(changed):
+        _refresh(session, HistorialAcademico.curso_id == curso_id, Curso.curso_id == curso_id)
+
+
+def refresh_carrera(session: Session, carrera_id: int, changed: Collection[str]) -> None:
+    """Recompute the lines of a carrera if ``changed`` fields are copied into them"""
+    if _CARRERA_FIELDS.intersection(changed):
+        _refresh(session, HistorialAcademico.carrera_id == carrera_id, Carrera.carrera_id == carrera_id)
+
+
+def get_transcript(session: Session, estudiante_id: int) -> HistorialAcademicoRead:
+    """Read a student's transcript, ordered by periodo and curso"""
+    estudiante = session.get(Estudiante, estudiante_id)
+    if not estudiante:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Estudiante not found"
+        )
+
+    lines = session.exec(
+        select(HistorialAcademico)
+        .where(HistorialAcademico.estudiante_id == estudiante_id)
+        .order_by(HistorialAcademico.periodo_academico, HistorialAcademico.codigo_curso)
+    ).all()
+    passed = {line.curso_id: line.creditos for line in lines if line.estado == "APROBADO"}
+    return HistorialAcademicoRead(
+        estudiante_id=estudiante.estudiante_id,
+        estudiante=f"{estudiante.nombre} {estudiante.apellido}",
+        dni=estudiante.dni,
+        creditos_aprobados=sum(passed.values()),
+        cursos=[HistorialCursoRead.model_validate(line) for line in lines],
+    )
@@ -0,0 +1,106 @@
+"""Concurrency stress check for seat accounting in app.services.enrollment.
+
+Many threads try to enroll distinct students in one small seccion at the same
+moment. The run fails (exit code 1) unless exactly ``capacidad_maxima``
+enrollments succeed, every other attempt is rejected as full, and the
+``matriculados`` counter matches the rows in ``matricula``.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.enrollment_stress --students 500
+"""
+import argparse
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlmodel import Session, func, select
+
+from app.database import create_db_and_tables, engine
+from app.models import Carrera, Curso, Estudiante, Facultad, Matricula, Profesor, Seccion
+from app.models.matricula import MatriculaCreate
+from app.services.enrollment import SECCION_FULL, enroll
+
+
+def _setup(capacity: int, students: int):
+    tag = uuid.uuid4().hex[:8]
+    with Session(engine) as session:
+        facultad = Facultad(nombre=f"Stress {tag}")
+        session.add(facultad)
+        session.flush()
+        carrera = Carrera(facultad_id=facultad.facultad_id, nombre=f"Stress {tag}", duracion_semestres=10)
+        profesor = Profesor(nombre="Stress", apellido=tag, dni=f"SP{tag}", email=f"sp{tag}@stress.test")
+        session.add_all([carrera, profesor])
+        session.flush()
+        curso = Curso(carrera_id=carrera.carrera_id, codigo=f"ST{tag}", nombre="Stress",
+                      creditos=3, nivel_semestre=1)
+        session.add(curso)
+        session.flush()
+        seccion = Seccion(curso_id=curso.curso_id, profesor_id=profesor.profesor_id, codigo="S1",
+                          capacidad_maxima=capacity, periodo_academico=f"ST-{tag}")
+        estudiantes = [
+            Estudiante(nombre="Stress", apellido=str(i), dni=f"S{tag}{i}",
+                       email=f"s{tag}{i}@stress.test", fecha_nacimiento=date(2000, 1, 1))
+            for i in range(students)
+        ]
+        session.add(seccion)
+        session.add_all(estudiantes)
+        session.commit()
+        return seccion.seccion_id, [e.estudiante_id for e in estudiantes]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--capacity", type=int, default=25)
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=25,
+                        help="keep within the engine pool (pool_size + max_overflow)")
+    args = parser.parse_args(argv)
+
+    engine.echo = False
+    create_db_and_tables()
+    seccion_id, estudiante_ids = _setup(args.capacity, args.students)
+
+    start = threading.Barrier(min(args.threads, len(estudiante_ids)))
+    outcomes = {"ok": 0, "full": 0, "other": 0}
+    lock = threading.Lock()
+
+    def attempt(estudiante_id: int, wait: bool):
+        if wait:
+            start.wait()
+        with Session(engine) as session:
+            try:
+                enroll(session, MatriculaCreate(
+                    estudiante_id=estudiante_id, seccion_id=seccion_id, costo=Decimal("100")
+                ))
+                outcome = "ok"
+            except HTTPException as exc:
+                outcome = "full" if exc.detail == SECCION_FULL else "other"
+        with lock:
+            outcomes[outcome] += 1
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for i, estudiante_id in enumerate(estudiante_ids):
+            pool.submit(attempt, estudiante_id, i < args.threads)
+
+    with Session(engine) as session:
+        seccion = session.get(Seccion, seccion_id)
+        rows = session.exec(
+            select(func.count()).select_from(Matricula).where(Matricula.seccion_id == seccion_id)
+        ).one()
+
+    print(f"attempts={len(estudiante_ids)} enrolled={outcomes['ok']} full={outcomes['full']} "
+          f"other_errors={outcomes['other']} matriculados={seccion.matriculados} rows={rows} "
+          f"capacidad_maxima={seccion.capacidad_maxima}")
+    expected = min(args.capacity, len(estudiante_ids))
+    if not (outcomes["ok"] == rows == seccion.matriculados == expected and outcomes["other"] == 0):
+        print("FAIL: seccion oversubscribed or counter out of sync")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Scripted HTTP load against the API on a dataset made by ``benchmarks.seed``.
+
+Simulated users run four scenarios, mixed by weight (or one of them alone):
+
+* ``catalog``: browse facultades, carreras, cursos with their prerequisites
+  and secciones (the cached, read-only part of the API);
+* ``rush``: enrollment day, ingresantes racing for the seats of the first
+  level secciones of their carrera; one in ten tries the second level and
+  is rejected for its missing prerequisite;
+* ``grades``: a profesor loads the gradebook of a seccion and saves a nota
+  for every estudiante in it;
+* ``payments``: the gateway posts the callback of a pending matricula with
+  an ``Idempotency-Key``, and retries one callback in five.
+
+Requests go to the app in process (no server needed) or, with ``--url``, to
+a running server; the ids used are read from ``DATABASE_URL`` in both cases.
+The report gives throughput, p50/p99 latency and status codes per route.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.load --users 32 --duration 60
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.load --scenario catalog
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+import httpx
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.database import engine
+from app.models import Carrera, Curso, Estudiante, Facultad, Matricula, Seccion
+from benchmarks.seed import PERIODO_ACTUAL
+
+API = settings.API_V1_STR
+
+# Relative frequency of each scenario in the default mix
+WEIGHTS = {"catalog": 60, "rush": 20, "grades": 5, "payments": 15}
+# Share of the payment callbacks sent twice, as a gateway retrying would
+RETRY_RATE = 0.2
+
+
+@dataclass
+class Fixtures:
+    """Ids the scenarios pick from, read from the seeded database"""
+    facultades: int
+    carreras: int
+    cursos: List[int]
+    secciones: List[int]
+    # carrera_id -> seccion_id of each nivel in PERIODO_ACTUAL
+    secciones_actuales: Dict[int, Dict[int, int]]
+    # Rosters with estudiantes, for the gradebook
+    graded: List[int]
+    ingresantes: List[int]
+    pendientes: List[Tuple[int, Decimal]]
+
+
+def load_fixtures() -> Fixtures:
+    """Read the ids the scenarios need from ``DATABASE_URL``"""
+    with Session(engine) as session:
+        n_carreras = session.exec(select(func.count()).select_from(Carrera)).one()
+        actuales: Dict[int, Dict[int, int]] = defaultdict(dict)
+        graded = []
+        rows = session.exec(
+            select(Seccion.seccion_id, Curso.carrera_id, Curso.nivel_semestre, Seccion.matriculados)
+            .join(Curso, Seccion.curso_id == Curso.curso_id)
+            .where(Seccion.periodo_academico == PERIODO_ACTUAL)
+        ).all()
+        for seccion_id, carrera_id, nivel, matriculados in rows:
+            actuales[carrera_id][nivel] = seccion_id
+            if matriculados:
+                graded.append(seccion_id)
+        enrolled = select(Matricula.estudiante_id).where(
+            Matricula.estudiante_id == Estudiante.estudiante_id
+        ).exists()
+        ingresantes = list(session.exec(select(Estudiante.estudiante_id).where(~enrolled)).all())
+        pendientes = session.exec(
+            select(Matricula.matricula_id, Matricula.costo)
+            .join(Seccion, Matricula.seccion_id == Seccion.seccion_id)
+            .where(Seccion.periodo_academico == PERIODO_ACTUAL, Matricula.estado == "PENDIENTE")
+        ).all()
+        return Fixtures(
+            facultades=session.exec(select(func.count()).select_from(Facultad)).one(),
+            carreras=n_carreras,
+            cursos=list(session.exec(select(Curso.curso_id)).all()),
+            secciones=[row[0] for row in rows],
+            secciones_actuales=dict(actuales),
+            graded=graded,
+            ingresantes=ingresantes,
+            pendientes=[tuple(row) for row in pendientes],
+        )
+
+
+@dataclass
+class Recorder:
+    """Latencies and status codes per route template"""
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+
+    async def request(self, client: httpx.AsyncClient, route: str, url: str, **kwargs) -> httpx.Response:
+        method = route.split(" ", 1)[0]
+        started = time.perf_counter()
+        response = await client.request(method, API + url, **kwargs)
+        self.latencies[route].append(time.perf_counter() - started)
+        self.statuses[route][response.status_code] += 1
+        return response
+
+
+async def browse_catalog(client, rec: Recorder, fx: Fixtures, rng: random.Random):
+    await rec.request(client, "GET /facultades/", "/facultades/")
+    await rec.request(client, "GET /carreras/", "/carreras/",
+                      params={"skip": rng.randrange(max(fx.carreras - 20, 1)), "limit": 20})
+    curso_id = rng.choice(fx.cursos)
+    await rec.request(client, "GET /cursos/{curso_id}", f"/cursos/{curso_id}")
+    await rec.request(client, "GET /cursos/{curso_id}/prerrequisitos", f"/cursos/{curso_id}/prerrequisitos")
+    seccion_id = rng.choice(fx.secciones)
+    await rec.request(client, "GET /secciones/{seccion_id}", f"/secciones/{seccion_id}")
+
+
+async def enrollment_rush(client, rec: Recorder, fx: Fixtures, rng: random.Random):
+    if not fx.ingresantes:
+        return False
+    estudiante_id = fx.ingresantes.pop()
+    # Carrera assigned by benchmarks.seed: estudiante i goes to carrera i % carreras
+    carrera_id = (estudiante_id - 1) % fx.carreras + 1
+    nivel = 2 if rng.random() < 0.1 else 1
+    await rec.request(client, "POST /matriculas/", "/matriculas/", json={
+        "estudiante_id": estudiante_id,
+        "seccion_id": fx.secciones_actuales[carrera_id][nivel],
+        "costo": "400.00",
+    })
+
+
+async def grade_entry(client, rec: Recorder, fx: Fixtures, rng: random.Random):
+    seccion_id = rng.choice(fx.graded)
+    roster = await rec.request(client, "GET /secciones/{seccion_id}/calificaciones",
+                               f"/secciones/{seccion_id}/calificaciones")
+    notas = [
+        {"matricula_id": line["matricula_id"], "nota": f"{rng.uniform(5, 20):.2f}"}
+        for line in roster.json()["estudiantes"]
+    ]
+    await rec.request(client, "PUT /secciones/{seccion_id}/calificaciones",
+                      f"/secciones/{seccion_id}/calificaciones", json=notas)
+
+
+async def payment_callback(client, rec: Recorder, fx: Fixtures, rng: random.Random):
+    if not fx.pendientes:
+        return False
+    matricula_id, costo = fx.pendientes.pop()
+    key = f"LOAD-{matricula_id}-{rng.getrandbits(32):08x}"
+    body = {"matricula_id": matricula_id, "monto": str(costo), "metodo_pago": "TARJETA"}
+    for _ in range(2 if rng.random() < RETRY_RATE else 1):
+        await rec.request(client, "POST /pagos/", "/pagos/", json=body,
+                          headers={"Idempotency-Key": key})
+
+
+SCENARIOS = {
+    "catalog": browse_catalog,
+    "rush": enrollment_rush,
+    "grades": grade_entry,
+    "payments": payment_callback,
+}
+
+
+async def _user(client, rec: Recorder, fx: Fixtures, weights: Dict[str, int], deadline: float, seed: int):
+    rng = random.Random(seed)
+    weights = dict(weights)
+    while weights and time.perf_counter() < deadline:
+        name = rng.choices(list(weights), weights=list(weights.values()))[0]
+        # A scenario returns False once it has run out of work (no ingresantes left...)
+        if await SCENARIOS[name](client, rec, fx, rng) is False:
+            del weights[name]
+
+
+async def run(url: str, users: int, duration: float, weights: Dict[str, int], seed: int) -> Tuple[Recorder, float]:
+    fx = load_fixtures()
+    random.Random(seed).shuffle(fx.ingresantes)
+    random.Random(seed).shuffle(fx.pendientes)
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=60)
+    else:
+        from main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    rec = Recorder()
+    async with client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _user(client, rec, fx, weights, deadline, seed + i) for i in range(users)
+        ))
+        elapsed = time.perf_counter() - started
+    return rec, elapsed
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 < q <= 1)"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def report(rec: Recorder, elapsed: float) -> None:
+    print(f"{'route':<45} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}  status")
+    total = 0
+    for route in sorted(rec.latencies):
+        values = rec.latencies[route]
+        total += len(values)
+        codes = " ".join(f"{code}:{count}" for code, count in sorted(rec.statuses[route].items()))
+        print(f"{route:<45} {len(values):>9} {len(values) / elapsed:>8.1f} "
+              f"{percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.99) * 1000:>8.1f}  {codes}")
+    print(f"{'total':<45} {total:>9} {total / elapsed:>8.1f}   ({elapsed:.1f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--users", type=int, default=16,
+                        help="concurrent simulated users; keep within the engine pool in process")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--url", default="", help="base URL of a running server, e.g. http://localhost:8000")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    args = parser.parse_args()
+
+    engine.echo = False
+    weights = WEIGHTS if args.scenario == "all" else {args.scenario: 1}
+    rec, elapsed = asyncio.run(run(args.url, args.users, args.duration, weights, args.seed))
+    report(rec, elapsed)
+
+
+if __name__ == "__main__":
+    main()
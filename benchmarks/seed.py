@@ -0,0 +1,317 @@
+"""Synthetic university dataset for load tests.
+
+At ``--scale 1`` the database gets 50 facultades with 5 carreras each, 10
+cursos per carrera (one per nivel_semestre, each requiring the previous
+level and sometimes the one before it, so prerequisites form a DAG),
+5,000 secciones over two periodos, 100,000 estudiantes and about 900,000
+matriculas with their calificaciones and pagos:
+
+* ``PERIODO_PASADO``: every returning estudiante completed the cursos of
+  levels 1-5 of their carrera, graded and paid;
+* ``PERIODO_ACTUAL``: returning estudiantes are enrolled in levels 6-10,
+  some already paid; one estudiante in ten is an ``ingresante`` with no
+  matriculas yet, left for the enrollment rush of ``benchmarks.load``. The
+  level 1-5 secciones of this periodo only have seats for most of them.
+
+Timetables never clash for a returning estudiante, so the schedule checks
+pass for the existing data. Rows are written with set-based inserts through
+the SQLModel tables (bypassing the services), with explicit ids, and the
+derived data (``matriculados``, ``monto_pagado``, ``historial_academico``,
+the statistics view) is filled in at the end. Works on PostgreSQL and SQLite:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.seed --reset
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --reset --scale 0.1
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List
+
+from sqlalchemy import bindparam, func, insert, text, update
+from sqlmodel import Session, SQLModel, select
+
+from app.database import create_db_and_tables, engine
+from app.models import (
+    Calificacion,
+    Carrera,
+    Curso,
+    Estudiante,
+    Facultad,
+    Matricula,
+    Pago,
+    Prerrequisito,
+    Profesor,
+    Seccion,
+)
+from app.services.statistics import refresh_statistics
+from app.services.transcripts import refresh_matriculas_where
+
+PERIODO_PASADO = "2025-1"
+PERIODO_ACTUAL = "2025-2"
+
+CARRERAS_POR_FACULTAD = 5
+NIVELES = 10
+# Levels taken by returning estudiantes in each periodo
+NIVELES_PASADO = range(1, 6)
+NIVELES_ACTUAL = range(6, 11)
+# One estudiante in this many is an ingresante
+INGRESANTE_CADA = 10
+# Share of the ingresantes the level 1-5 secciones of PERIODO_ACTUAL can take
+CUPO_INGRESANTES = 0.8
+# Share of the PERIODO_ACTUAL matriculas already paid
+PAGADAS_ACTUAL = 0.6
+COSTO_CREDITO = Decimal("100.00")
+
+# One non-overlapping timetable per nivel
+HORARIOS = [
+    (dias, horario)
+    for dias in ("LU,MI", "MA,JU")
+    for horario in ("08:00-10:00", "10:00-12:00", "14:00-16:00", "16:00-18:00", "18:00-20:00")
+]
+
+BATCH_SIZE = 10_000
+
+_TABLES = [Facultad, Carrera, Profesor, Curso, Prerrequisito, Seccion, Estudiante, Matricula,
+           Calificacion, Pago]
+
+
+@dataclass
+class SeedSummary:
+    """Rows written per table"""
+    rows: Dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+def estudiantes_por_carrera(estudiantes: int, carreras: int) -> List[int]:
+    """How many estudiantes each carrera gets (estudiante i goes to carrera i % carreras)"""
+    return [len(range(c, estudiantes, carreras)) for c in range(carreras)]
+
+
+def is_ingresante(estudiante_index: int, carreras: int) -> bool:
+    """Whether the estudiante at 0-based ``estudiante_index`` has no matriculas yet"""
+    return (estudiante_index // carreras) % INGRESANTE_CADA == 0
+
+
+class _Writer:
+    """Buffers rows per table and inserts them in batches.
+
+    Tables are flushed together in ``_TABLES`` order, so that parents are
+    always written before the rows referencing them.
+    """
+
+    def __init__(self, session: Session, summary: SeedSummary):
+        self.session = session
+        self.summary = summary
+        self._pending: Dict[type, List[dict]] = {}
+
+    def add(self, model, row: dict) -> None:
+        rows = self._pending.setdefault(model, [])
+        rows.append(row)
+        if len(rows) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        for table in _TABLES:
+            rows = self._pending.pop(table, None)
+            if rows:
+                self.session.execute(insert(table), rows)
+                name = table.__tablename__
+                self.summary.rows[name] = self.summary.rows.get(name, 0) + len(rows)
+
+
+def reset_database() -> None:
+    """Drop and recreate every table (and the statistics view on PostgreSQL)"""
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("DROP MATERIALIZED VIEW IF EXISTS mv_estadisticas_matricula"))
+        SQLModel.metadata.drop_all(connection)
+    create_db_and_tables()
+
+
+def _fix_sequences(session: Session) -> None:
+    """Move the id sequences past the explicit ids written by the seed"""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    for model in _TABLES:
+        table = model.__tablename__
+        pk = model.__table__.primary_key.columns.values()[0].name
+        session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{pk}'), "
+            f"COALESCE((SELECT MAX({pk}) FROM {table}), 0) + 1, false)"
+        ))
+
+
+def seed(scale: float = 1.0, random_seed: int = 42) -> SeedSummary:
+    """Fill an empty database with the dataset described in the module docstring"""
+    rng = random.Random(random_seed)
+    started = time.perf_counter()
+    summary = SeedSummary()
+    now = datetime.now()
+    stamps = {"fecha_registro": now, "fecha_actualizacion": now}
+
+    n_facultades = max(1, round(50 * scale))
+    n_carreras = n_facultades * CARRERAS_POR_FACULTAD
+    n_estudiantes = max(n_carreras * INGRESANTE_CADA, round(100_000 * scale))
+    per_carrera = estudiantes_por_carrera(n_estudiantes, n_carreras)
+    ingresantes = [len(range(0, size, INGRESANTE_CADA)) for size in per_carrera]
+
+    with Session(engine) as session:
+        if session.exec(select(func.count()).select_from(Estudiante)).one():
+            raise SystemExit("the database is not empty; run with --reset to recreate it")
+        writer = _Writer(session, summary)
+
+        for f in range(1, n_facultades + 1):
+            writer.add(Facultad, {
+                "facultad_id": f, "nombre": f"Facultad {f:03d}", "descripcion": None,
+                "ubicacion": f"Pabellon {f:03d}", "decano": f"Decano {f:03d}", "activo": True,
+                **stamps,
+            })
+        for c in range(1, n_carreras + 1):
+            writer.add(Carrera, {
+                "carrera_id": c, "facultad_id": (c - 1) // CARRERAS_POR_FACULTAD + 1,
+                "nombre": f"Carrera {c:04d}", "descripcion": None, "duracion_semestres": NIVELES,
+                "titulo_otorgado": f"Titulo {c:04d}", "activo": True, **stamps,
+            })
+
+        # One curso per (carrera, nivel) with ids carrera-major, and one profesor per curso
+        creditos: Dict[int, int] = {}
+        for c in range(1, n_carreras + 1):
+            for nivel in range(1, NIVELES + 1):
+                curso_id = (c - 1) * NIVELES + nivel
+                creditos[curso_id] = rng.choice((3, 3, 4, 4, 5))
+                writer.add(Profesor, {
+                    "profesor_id": curso_id, "nombre": "Profesor", "apellido": f"P{curso_id:06d}",
+                    "dni": f"P{curso_id:08d}", "email": f"p{curso_id}@bench.test", "telefono": None,
+                    "especialidad": None, "titulo_academico": None, "activo": True, **stamps,
+                })
+                writer.add(Curso, {
+                    "curso_id": curso_id, "carrera_id": c, "codigo": f"C{c:04d}-{nivel:02d}",
+                    "nombre": f"Curso {nivel} de la carrera {c}", "descripcion": None,
+                    "creditos": creditos[curso_id], "nivel_semestre": nivel, "activo": True,
+                    **stamps,
+                })
+        writer.flush()
+
+        prerrequisito_id = 0
+        for curso_id in creditos:
+            nivel = (curso_id - 1) % NIVELES + 1
+            requeridos = [curso_id - 1] if nivel > 1 else []
+            if nivel > 2 and rng.random() < 0.3:
+                requeridos.append(curso_id - 2)
+            for curso_req_id in requeridos:
+                prerrequisito_id += 1
+                writer.add(Prerrequisito, {
+                    "prerrequisito_id": prerrequisito_id, "curso_id": curso_id,
+                    "curso_req_id": curso_req_id, **stamps,
+                })
+
+        # Seccion ids: periodo-major, then curso
+        n_cursos = len(creditos)
+        matriculados: Dict[int, int] = {}
+        for p, periodo in enumerate((PERIODO_PASADO, PERIODO_ACTUAL)):
+            for curso_id in creditos:
+                c = (curso_id - 1) // NIVELES
+                nivel = (curso_id - 1) % NIVELES + 1
+                seccion_id = p * n_cursos + curso_id
+                if periodo == PERIODO_ACTUAL and nivel in NIVELES_PASADO:
+                    capacidad = max(1, int(ingresantes[c] * CUPO_INGRESANTES))
+                else:
+                    capacidad = per_carrera[c] - ingresantes[c] + 10
+                matriculados[seccion_id] = 0
+                dias, horario = HORARIOS[nivel - 1]
+                writer.add(Seccion, {
+                    "seccion_id": seccion_id, "curso_id": curso_id, "profesor_id": curso_id,
+                    "codigo": "A", "capacidad_maxima": capacidad, "aula": f"AULA-{curso_id}",
+                    "horario": horario, "dias": dias, "periodo_academico": periodo,
+                    "fecha_inicio": None, "fecha_fin": None, "activo": True,
+                    "matriculados": 0, **stamps,
+                })
+        writer.flush()
+
+        matricula_id = 0
+        for e in range(n_estudiantes):
+            estudiante_id = e + 1
+            writer.add(Estudiante, {
+                "estudiante_id": estudiante_id, "nombre": f"Nombre{e % 997}",
+                "apellido": f"Apellido{e:06d}", "dni": f"E{estudiante_id:08d}",
+                "email": f"e{estudiante_id}@bench.test", "telefono": None,
+                "fecha_nacimiento": date(1995 + e % 10, e % 12 + 1, e % 28 + 1),
+                "direccion": None, "activo": True, **stamps,
+            })
+            if is_ingresante(e, n_carreras):
+                continue
+            c = e % n_carreras
+            for p, niveles in enumerate((NIVELES_PASADO, NIVELES_ACTUAL)):
+                for nivel in niveles:
+                    curso_id = c * NIVELES + nivel
+                    seccion_id = p * n_cursos + curso_id
+                    matricula_id += 1
+                    matriculados[seccion_id] += 1
+                    costo = COSTO_CREDITO * creditos[curso_id]
+                    pagada = p == 0 or rng.random() < PAGADAS_ACTUAL
+                    estado = "COMPLETADO" if p == 0 else ("PAGADO" if pagada else "PENDIENTE")
+                    writer.add(Matricula, {
+                        "matricula_id": matricula_id, "estudiante_id": estudiante_id,
+                        "seccion_id": seccion_id, "fecha_matricula": date(2025, 3 + 5 * p, 1),
+                        "estado": estado, "costo": costo, "metodo_pago": "TARJETA",
+                        "monto_pagado": costo if pagada else Decimal("0"), **stamps,
+                    })
+                    if pagada:
+                        writer.add(Pago, {
+                            "pago_id": matricula_id, "matricula_id": matricula_id,
+                            "fecha_pago": date(2025, 3 + 5 * p, 2), "monto": costo,
+                            "metodo_pago": "TARJETA", "referencia": f"SEED-{matricula_id}",
+                            "estado": "PROCESADO", **stamps,
+                        })
+                    if p == 0:
+                        nota = min(20.0, max(0.0, rng.gauss(13.5, 3.0)))
+                        writer.add(Calificacion, {
+                            "calificacion_id": matricula_id, "matricula_id": matricula_id,
+                            "nota": Decimal(f"{nota:.2f}"), "observacion": None, **stamps,
+                        })
+        writer.flush()
+
+        seccion = Seccion.__table__
+        session.execute(
+            update(seccion)
+            .where(seccion.c.seccion_id == bindparam("id"))
+            .values(matriculados=bindparam("count")),
+            [{"id": seccion_id, "count": count} for seccion_id, count in matriculados.items() if count],
+        )
+        refresh_matriculas_where(session, select(Matricula.matricula_id))
+        _fix_sequences(session)
+        session.commit()
+
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(text("ANALYZE"))
+            refresh_statistics(session)
+
+    summary.rows["historial_academico"] = matricula_id
+    summary.seconds = time.perf_counter() - started
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="1.0 = 50 facultades, 100k estudiantes, ~900k matriculas")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate every table first")
+    args = parser.parse_args()
+
+    engine.echo = False
+    if args.reset:
+        reset_database()
+    else:
+        create_db_and_tables()
+    summary = seed(args.scale, args.seed)
+    for table, rows in sorted(summary.rows.items(), key=lambda item: -item[1]):
+        print(f"{table:>20}: {rows:>10,}")
+    print(f"seeded in {summary.seconds:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Throughput of list-response serialization, before and after app.responses.
+
+Compares, for pages of ``MatriculaRead`` (Decimal, date and datetime fields):
+
+* ``pydantic``: load ORM objects, re-validate them through the route's
+  ``response_model`` and render with ``JSONResponse`` (the previous path);
+* ``orjson``: load the read-model columns as rows and encode them with
+  ``app.responses.dumps`` (the current path).
+
+Both include fetching the rows. Runs on an in-memory SQLite database unless
+``--database-url`` points at a scratch database.
+
+    python -m benchmarks.serialization --rows 20000 --page-size 1000
+"""
+import argparse
+import asyncio
+import gzip
+import time
+import warnings
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy import insert
+from sqlalchemy.exc import SAWarning
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models.matricula import Matricula, MatriculaRead
+from app.responses import brotli, dumps, select_read_columns
+
+
+def _seed(engine, rows: int):
+    SQLModel.metadata.create_all(engine, tables=[Matricula.__table__])
+    now = datetime.now()
+    with Session(engine) as session:
+        session.execute(insert(Matricula), [
+            {
+                "estudiante_id": i + 1,
+                "seccion_id": i % 500 + 1,
+                "fecha_matricula": date(2024, 3, 1) + timedelta(days=i % 30),
+                "estado": "CONFIRMADO" if i % 7 else "PENDIENTE",
+                "costo": Decimal("350.00") + Decimal(i % 100) / 4,
+                "metodo_pago": "TARJETA" if i % 2 else None,
+                "fecha_registro": now,
+                "fecha_actualizacion": now,
+            }
+            for i in range(rows)
+        ])
+        session.commit()
+
+
+def _pages(rows: int, page_size: int):
+    return [(offset, page_size) for offset in range(0, rows, page_size)]
+
+
+def _pydantic_path(engine, pages) -> int:
+    field = APIRoute("/", endpoint=lambda: None, response_model=List[MatriculaRead]).response_field
+    size = 0
+    with Session(engine) as session:
+        for offset, limit in pages:
+            items = session.exec(
+                select(Matricula).order_by(Matricula.matricula_id).offset(offset).limit(limit)
+            ).all()
+            content = asyncio.run(serialize_response(field=field, response_content=items))
+            size += len(JSONResponse(content).body)
+            session.expunge_all()
+    return size
+
+
+def _orjson_path(engine, pages) -> int:
+    statement = select_read_columns(select(Matricula), MatriculaRead).order_by(Matricula.matricula_id)
+    size = 0
+    with Session(engine) as session:
+        for offset, limit in pages:
+            rows = session.execute(statement.offset(offset).limit(limit)).all()
+            size += len(dumps([row._asdict() for row in rows]))
+    return size
+
+
+def _measure(name: str, run, engine, pages, rows: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = run(engine, pages)
+        best = min(best, time.perf_counter() - started)
+    rate = rows / best
+    print(f"{name:>9}: {rate:>12,.0f} rows/s  ({best * 1000:.1f} ms, {size / 1024:.0f} KiB)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default="sqlite://",
+                        help="scratch database; the matricula table is created and filled")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=SAWarning)
+    engine = create_engine(args.database_url)
+    _seed(engine, args.rows)
+    pages = _pages(args.rows, args.page_size)
+
+    print(f"{args.rows} MatriculaRead rows in pages of {args.page_size}, best of {args.repeat}")
+    before = _measure("pydantic", _pydantic_path, engine, pages, args.rows, args.repeat)
+    after = _measure("orjson", _orjson_path, engine, pages, args.rows, args.repeat)
+    print(f"  speedup: {after / before:.1f}x")
+
+    with Session(engine) as session:
+        statement = select_read_columns(select(Matricula), MatriculaRead).limit(args.page_size)
+        body = dumps([row._asdict() for row in session.execute(statement)])
+    sizes = [f"identity {len(body) / 1024:.0f} KiB", f"gzip {len(gzip.compress(body, 5)) / 1024:.0f} KiB"]
+    if brotli is not None:
+        sizes.append(f"br {len(brotli.compress(body, quality=4)) / 1024:.0f} KiB")
+    print(f"one page: {', '.join(sizes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,35 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.cache import catalog_cache
 from app.config import settings
-from app.database import create_db_and_tables
+from app.database import async_engine, create_db_and_tables, engine
+from app.metrics import MetricsMiddleware, render_metrics
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routes.pago import REPLAYED_HEADER
+from app.services.statistics import statistics_refresher
 from app.routes import (
     estudiante_router,
     profesor_router,
     facultad_router,
     carrera_router,
     curso_router,
+    prerrequisito_router,
     seccion_router,
     matricula_router,
     pago_router,
     calificacion_router,
+    importacion_router,
+    estadistica_router,
 )
 
+# Serve the CRUD routes with async handlers when configured
+if settings.USE_ASYNC_DB:
+    from app.routes.async_crud import enable_async_crud
+
+    enable_async_crud()
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -29,7 +44,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", REPLAYED_HEADER],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 # Event handlers
@@ -37,6 +54,15 @@ app.add_middleware(
 def on_startup():
     """Create database tables on startup"""
     create_db_and_tables()
+    statistics_refresher.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Stop background work and release pooled async connections"""
+    statistics_refresher.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 # Health check endpoint
@@ -56,16 +82,31 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Request, SQL and pool metrics of this worker in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(engine), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters of the catalog cache in this worker"""
+    return catalog_cache.stats()
+
+
 # Include routers
 app.include_router(estudiante_router, prefix=settings.API_V1_STR)
 app.include_router(profesor_router, prefix=settings.API_V1_STR)
 app.include_router(facultad_router, prefix=settings.API_V1_STR)
 app.include_router(carrera_router, prefix=settings.API_V1_STR)
 app.include_router(curso_router, prefix=settings.API_V1_STR)
+app.include_router(prerrequisito_router, prefix=settings.API_V1_STR)
 app.include_router(seccion_router, prefix=settings.API_V1_STR)
 app.include_router(matricula_router, prefix=settings.API_V1_STR)
 app.include_router(pago_router, prefix=settings.API_V1_STR)
 app.include_router(calificacion_router, prefix=settings.API_V1_STR)
+app.include_router(importacion_router, prefix=settings.API_V1_STR)
+app.include_router(estadistica_router, prefix=settings.API_V1_STR)
 
 
 if __name__ == "__main__":
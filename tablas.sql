@@ -11,6 +11,7 @@ CREATE TABLE estudiante (
     fecha_nacimiento DATE NOT NULL,
     direccion VARCHAR(200),
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     activo BOOLEAN DEFAULT TRUE
 );
 
@@ -25,6 +26,7 @@ CREATE TABLE profesor (
     especialidad VARCHAR(100),
     titulo_academico VARCHAR(100),
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     activo BOOLEAN DEFAULT TRUE
 );
 
@@ -36,6 +38,7 @@ CREATE TABLE facultad (
     ubicacion VARCHAR(100),
     decano VARCHAR(100),
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     activo BOOLEAN DEFAULT TRUE
 );
 
@@ -48,6 +51,7 @@ CREATE TABLE carrera (
     duracion_semestres INTEGER NOT NULL,
     titulo_otorgado VARCHAR(100),
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     activo BOOLEAN DEFAULT TRUE,
     CONSTRAINT fk_facultad FOREIGN KEY (facultad_id) REFERENCES facultad(facultad_id) ON DELETE RESTRICT,
     CONSTRAINT uk_carrera_nombre UNIQUE (nombre)
@@ -63,6 +67,7 @@ CREATE TABLE curso (
     creditos INTEGER NOT NULL,
     nivel_semestre INTEGER NOT NULL,
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     activo BOOLEAN DEFAULT TRUE,
     CONSTRAINT fk_carrera FOREIGN KEY (carrera_id) REFERENCES carrera(carrera_id) ON DELETE RESTRICT,
     CONSTRAINT ck_creditos CHECK (creditos > 0),
@@ -75,6 +80,7 @@ CREATE TABLE prerrequisito (
     curso_id INTEGER NOT NULL,
     curso_req_id INTEGER NOT NULL,
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT fk_curso FOREIGN KEY (curso_id) REFERENCES curso(curso_id) ON DELETE CASCADE,
     CONSTRAINT fk_curso_req FOREIGN KEY (curso_req_id) REFERENCES curso(curso_id) ON DELETE CASCADE,
     CONSTRAINT uk_prerrequisito UNIQUE (curso_id, curso_req_id),
@@ -94,12 +100,15 @@ CREATE TABLE seccion (
     periodo_academico VARCHAR(20) NOT NULL,
     fecha_inicio DATE,
     fecha_fin DATE,
+    matriculados INTEGER NOT NULL DEFAULT 0,
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     activo BOOLEAN DEFAULT TRUE,
     CONSTRAINT fk_curso FOREIGN KEY (curso_id) REFERENCES curso(curso_id) ON DELETE RESTRICT,
     CONSTRAINT fk_profesor FOREIGN KEY (profesor_id) REFERENCES profesor(profesor_id) ON DELETE RESTRICT,
     CONSTRAINT uk_seccion_periodo UNIQUE (curso_id, codigo, periodo_academico),
-    CONSTRAINT ck_capacidad_maxima CHECK (capacidad_maxima > 0)
+    CONSTRAINT ck_capacidad_maxima CHECK (capacidad_maxima > 0),
+    CONSTRAINT ck_matriculados CHECK (matriculados >= 0 AND matriculados <= capacidad_maxima)
 );
 
 -- Tabla MATRICULA
@@ -111,7 +120,9 @@ CREATE TABLE matricula (
     estado VARCHAR(20) NOT NULL DEFAULT 'PENDIENTE',
     costo NUMERIC(10, 2) NOT NULL,
     metodo_pago VARCHAR(50),
+    monto_pagado NUMERIC(10, 2) NOT NULL DEFAULT 0,
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT fk_estudiante FOREIGN KEY (estudiante_id) REFERENCES estudiante(estudiante_id) ON DELETE RESTRICT,
     CONSTRAINT fk_seccion FOREIGN KEY (seccion_id) REFERENCES seccion(seccion_id) ON DELETE RESTRICT,
     CONSTRAINT uk_matricula_seccion UNIQUE (estudiante_id, seccion_id),
@@ -126,9 +137,10 @@ CREATE TABLE pago (
     fecha_pago DATE NOT NULL DEFAULT CURRENT_DATE,
     monto NUMERIC(10, 2) NOT NULL,
     metodo_pago VARCHAR(50) NOT NULL,
-    referencia VARCHAR(100),
+    referencia VARCHAR(100) UNIQUE,
     estado VARCHAR(20) NOT NULL DEFAULT 'PROCESADO',
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT fk_matricula FOREIGN KEY (matricula_id) REFERENCES matricula(matricula_id) ON DELETE RESTRICT,
     CONSTRAINT ck_monto CHECK (monto > 0),
     CONSTRAINT ck_estado_pago CHECK (estado IN ('PENDIENTE', 'PROCESADO', 'RECHAZADO'))
@@ -141,22 +153,64 @@ CREATE TABLE calificacion (
     nota NUMERIC(5, 2),
     observacion TEXT,
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT fk_matricula FOREIGN KEY (matricula_id) REFERENCES matricula(matricula_id) ON DELETE RESTRICT,
     CONSTRAINT uk_calificacion_matricula UNIQUE (matricula_id),
     CONSTRAINT ck_nota CHECK (nota >= 0 AND nota <= 20)
 );
 
+-- Historial academico precalculado (una fila por matricula), mantenido por la
+-- aplicacion al escribir matriculas, calificaciones, secciones, cursos y carreras
+CREATE TABLE historial_academico (
+    matricula_id INTEGER PRIMARY KEY,
+    estudiante_id INTEGER NOT NULL,
+    seccion_id INTEGER NOT NULL,
+    curso_id INTEGER NOT NULL,
+    carrera_id INTEGER NOT NULL,
+    codigo_curso VARCHAR(20) NOT NULL,
+    nombre_curso VARCHAR(100) NOT NULL,
+    creditos INTEGER NOT NULL,
+    nivel_semestre INTEGER NOT NULL,
+    carrera VARCHAR(100) NOT NULL,
+    periodo_academico VARCHAR(20) NOT NULL,
+    estado_matricula VARCHAR(20) NOT NULL,
+    nota NUMERIC(5, 2),
+    estado VARCHAR(20) NOT NULL
+);
+
 -- Indices para mejorar el rendimiento
 CREATE INDEX idx_estudiante_apellido ON estudiante(apellido);
 CREATE INDEX idx_profesor_apellido ON profesor(apellido);
+CREATE INDEX idx_estudiante_directorio ON estudiante(apellido, estudiante_id) INCLUDE (nombre, fecha_actualizacion);
+CREATE INDEX idx_profesor_directorio ON profesor(apellido, profesor_id) INCLUDE (nombre, fecha_actualizacion);
 CREATE INDEX idx_curso_nombre ON curso(nombre);
 CREATE INDEX idx_curso_codigo ON curso(codigo);
+CREATE INDEX idx_curso_carrera ON curso(carrera_id, nivel_semestre);
 CREATE INDEX idx_matricula_estudiante ON matricula(estudiante_id);
 CREATE INDEX idx_matricula_seccion ON matricula(seccion_id);
+CREATE INDEX idx_matricula_estado ON matricula(estado);
+CREATE INDEX idx_matricula_fecha ON matricula(fecha_matricula);
+CREATE INDEX idx_pago_matricula ON pago(matricula_id);
+CREATE INDEX idx_pago_estado ON pago(estado);
+CREATE INDEX idx_pago_fecha ON pago(fecha_pago);
+CREATE INDEX idx_prerrequisito_requerido ON prerrequisito(curso_req_id);
 CREATE INDEX idx_seccion_curso ON seccion(curso_id);
 CREATE INDEX idx_seccion_profesor ON seccion(profesor_id);
 CREATE INDEX idx_seccion_periodo ON seccion(periodo_academico);
 CREATE INDEX idx_carrera_facultad ON carrera(facultad_id);
+CREATE INDEX idx_historial_estudiante ON historial_academico(estudiante_id, periodo_academico, codigo_curso);
+CREATE INDEX idx_historial_seccion ON historial_academico(seccion_id);
+CREATE INDEX idx_historial_curso ON historial_academico(curso_id);
+
+-- Busqueda por prefijo de nombre, apellido, DNI y email (ver README, pg_trgm es opcional)
+CREATE INDEX idx_estudiante_nombre_completo ON estudiante ((translate(lower(nombre || ' ' || apellido), 'ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç', 'aaaaeeeeiiiioooouuuuncaaaaeeeeiiiioooouuuunc')) COLLATE "C");
+CREATE INDEX idx_estudiante_apellido_prefijo ON estudiante ((translate(lower(apellido), 'ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç', 'aaaaeeeeiiiioooouuuuncaaaaeeeeiiiioooouuuunc')) COLLATE "C");
+CREATE INDEX idx_estudiante_dni_prefijo ON estudiante ((dni COLLATE "C"));
+CREATE INDEX idx_estudiante_email_prefijo ON estudiante ((translate(lower(email), 'ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç', 'aaaaeeeeiiiioooouuuuncaaaaeeeeiiiioooouuuunc')) COLLATE "C");
+CREATE INDEX idx_profesor_nombre_completo ON profesor ((translate(lower(nombre || ' ' || apellido), 'ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç', 'aaaaeeeeiiiioooouuuuncaaaaeeeeiiiioooouuuunc')) COLLATE "C");
+CREATE INDEX idx_profesor_apellido_prefijo ON profesor ((translate(lower(apellido), 'ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç', 'aaaaeeeeiiiioooouuuuncaaaaeeeeiiiioooouuuunc')) COLLATE "C");
+CREATE INDEX idx_profesor_dni_prefijo ON profesor ((dni COLLATE "C"));
+CREATE INDEX idx_profesor_email_prefijo ON profesor ((translate(lower(email), 'ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç', 'aaaaeeeeiiiioooouuuuncaaaaeeeeiiiioooouuuunc')) COLLATE "C");
 
 -- Vistas útiles para el sistema
 
@@ -249,4 +303,37 @@ FROM
     JOIN carrera ca ON c.carrera_id = ca.carrera_id
     JOIN facultad f ON ca.facultad_id = f.facultad_id
 GROUP BY 
-    s.periodo_academico, c.carrera_id, ca.nombre, f.nombre;
\ No newline at end of file
+    s.periodo_academico, c.carrera_id, ca.nombre, f.nombre;
+
+-- Resumen materializado de v_estadisticas_matricula por periodo, facultad y carrera.
+-- Se refresca con REFRESH MATERIALIZED VIEW CONCURRENTLY (requiere el indice unico).
+CREATE MATERIALIZED VIEW mv_estadisticas_matricula AS
+SELECT
+    CASE
+        WHEN GROUPING(f.facultad_id) = 1 THEN 'PERIODO'
+        WHEN GROUPING(ca.carrera_id) = 1 THEN 'FACULTAD'
+        ELSE 'CARRERA'
+    END AS nivel,
+    s.periodo_academico,
+    COALESCE(ca.carrera_id, f.facultad_id, 0) AS grupo_id,
+    f.facultad_id,
+    f.nombre AS facultad,
+    ca.carrera_id,
+    ca.nombre AS carrera,
+    COUNT(DISTINCT m.estudiante_id) AS total_estudiantes,
+    COUNT(m.matricula_id) AS total_matriculas,
+    SUM(m.costo) AS ingresos_totales
+FROM
+    matricula m
+    JOIN seccion s ON m.seccion_id = s.seccion_id
+    JOIN curso c ON s.curso_id = c.curso_id
+    JOIN carrera ca ON c.carrera_id = ca.carrera_id
+    JOIN facultad f ON ca.facultad_id = f.facultad_id
+GROUP BY GROUPING SETS (
+    (s.periodo_academico),
+    (s.periodo_academico, f.facultad_id, f.nombre),
+    (s.periodo_academico, f.facultad_id, f.nombre, ca.carrera_id, ca.nombre)
+);
+
+CREATE UNIQUE INDEX uk_mv_estadisticas_matricula
+    ON mv_estadisticas_matricula (nivel, periodo_academico, grupo_id);